@@ -1,13 +1,33 @@
 from __future__ import annotations
 
+import hashlib
 import json
+import mmap
+import os
+import re
+import secrets
+import shutil
+import struct
+import time
 from pathlib import Path
 from typing import Any
 
-import joblib
+import numpy as np
 
-from data_layer.settings import ARTIFACTS_DIR, METADATA_FILENAME, PIPELINE_FILENAME
+from data_layer.jobs_repository import owner_alive
+from data_layer.settings import (
+    ARTIFACTS_DIR,
+    CURRENT_FILENAME,
+    ENGINE_FILENAME,
+    METADATA_FILENAME,
+    ONLINE_LOCK_FILENAME,
+    PIPELINE_FILENAME,
+    PROFILES_FILENAME,
+    SWEEP_FILENAME,
+    VERSIONS_DIRNAME,
+)
 from logic_layer.domain import ModelBundle
+from logic_layer.inference_engine import InferenceEngine, compile_pipeline
 
 
 def _extract_metadata(bundle: Any) -> dict[str, Any]:
@@ -55,42 +75,484 @@ def save_bundle(bundle: Any, artifacts_dir: str | None = None) -> None:
 
     meta = _extract_metadata(bundle)
 
+    import joblib
+
     joblib.dump(pipeline, pipeline_path)
     metadata_path.write_text(json.dumps(meta, indent=2), encoding="utf-8")
 
+    # Export NumPy du moteur (mode inference-only)
+    engine = getattr(bundle, "engine", None)
+    if engine is not None:
+        save_engine(engine, base / ENGINE_FILENAME, source=pipeline_path)
+
+
+class ArtifactFormatError(ValueError):
+    """Artefact moteur illisible : magic, version ou checksum invalide."""
+
+
+# Format binaire plat du moteur (lisible sans pickle, mappable en mémoire) :
+#   magic (8 o) | version (u32) | taille header (u32) | header JSON | padding | données
+# Chaque tableau est aligné sur _ALIGN octets ; le sha256 couvre spec + données.
+ENGINE_FORMAT_VERSION = 1
+_ENGINE_MAGIC = b"DMAIENG\0"
+_PREAMBLE = struct.Struct("<8sII")
+_ALIGN = 64
+
+
+def _aligned(n: int) -> int:
+    return -(-n // _ALIGN) * _ALIGN
+
 
-def read_metadata(artifacts_dir: str | None = None) -> dict[str, Any]:
+def _engine_digest(spec: str, data: Any) -> str:
+    digest = hashlib.sha256(spec.encode("utf-8"))
+    digest.update(data)
+    return digest.hexdigest()
+
+
+def save_engine(
+    engine: InferenceEngine,
+    path: str | Path,
+    source: str | Path | None = None,
+) -> None:
     """
-    Lit metadata.json
+    Écrit le moteur au format binaire plat versionné (écriture atomique).
+    `source` : pipeline joblib dont le moteur est extrait (empreinte stockée dans le header).
     """
-    base = Path(artifacts_dir) if artifacts_dir else ARTIFACTS_DIR
+    arrays = engine.to_arrays()
+    spec = str(arrays.pop("spec"))
+
+    table: dict[str, dict[str, Any]] = {}
+    chunks: list[bytes] = []
+    offset = 0
+    for name, arr in arrays.items():
+        arr = np.ascontiguousarray(arr)
+        # dtype explicite little-endian : le fichier est portable entre machines
+        dtype = arr.dtype.newbyteorder("<")
+        raw = arr.astype(dtype, copy=False).tobytes()
+        table[name] = {"dtype": dtype.str, "shape": list(arr.shape), "offset": offset}
+        chunks.append(raw + b"\0" * (_aligned(len(raw)) - len(raw)))
+        offset += _aligned(len(raw))
+    data = b"".join(chunks)
+
+    header = json.dumps(
+        {
+            "spec": spec,
+            "arrays": table,
+            "data_size": len(data),
+            "sha256": _engine_digest(spec, data),
+            "source": file_fingerprint(source) if source is not None else None,
+        }
+    ).encode("utf-8")
+    preamble = _PREAMBLE.pack(_ENGINE_MAGIC, ENGINE_FORMAT_VERSION, len(header))
+    head = preamble + header
+    head += b"\0" * (_aligned(len(head)) - len(head))
+
+    path = Path(path)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(head + data)
+    os.replace(tmp, path)
+
+
+def load_engine(
+    path: str | Path,
+    verify: bool = True,
+    source: str | Path | None = None,
+) -> InferenceEngine:
+    """
+    Recharge le moteur en memory-map : les tableaux sont des vues sur le fichier,
+    partagées (cache de pages) entre tous les workers qui le chargent.
+    `source` : pipeline attendu ; artefact extrait d'un autre pipeline -> ArtifactFormatError.
+    """
+    mm = np.memmap(path, dtype=np.uint8, mode="r")
+    if len(mm) < _PREAMBLE.size:
+        raise ArtifactFormatError(f"Truncated engine artifact: {path}")
+
+    magic, version, header_size = _PREAMBLE.unpack(mm[: _PREAMBLE.size].tobytes())
+    if magic != _ENGINE_MAGIC:
+        raise ArtifactFormatError(f"Not an engine artifact: {path}")
+    if version != ENGINE_FORMAT_VERSION:
+        raise ArtifactFormatError(
+            f"Unsupported engine artifact version {version} (expected {ENGINE_FORMAT_VERSION})"
+        )
+
+    try:
+        header_end = _PREAMBLE.size + header_size
+        header = json.loads(mm[_PREAMBLE.size : header_end].tobytes())
+    except ValueError as e:
+        raise ArtifactFormatError(f"Corrupted engine artifact header: {e}") from e
+
+    if source is not None and header.get("source") is not None:
+        if not _fingerprint_matches(Path(source), header["source"]):
+            raise ArtifactFormatError(f"Engine artifact is stale (pipeline changed): {path}")
+
+    start = _aligned(header_end)
+    data = mm[start : start + header["data_size"]]
+    if len(data) != header["data_size"]:
+        raise ArtifactFormatError(f"Truncated engine artifact: {path}")
+    if verify and _engine_digest(header["spec"], data) != header["sha256"]:
+        raise ArtifactFormatError(f"Checksum mismatch for engine artifact: {path}")
+
+    arrays: dict[str, np.ndarray] = {"spec": np.array(header["spec"])}
+    for name, info in header["arrays"].items():
+        dtype = np.dtype(info["dtype"])
+        count = int(np.prod(info["shape"], dtype=np.int64))
+        arrays[name] = np.frombuffer(
+            data, dtype=dtype, count=count, offset=info["offset"]
+        ).reshape(info["shape"])
+    return InferenceEngine.from_arrays(arrays)
+
+
+# --- Registre de versions ---------------------------------------------------
+
+_VERSION_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]{0,63}$")
+
+
+def _base_dir(artifacts_dir: str | Path | None) -> Path:
+    return Path(artifacts_dir) if artifacts_dir else ARTIFACTS_DIR
+
+
+def new_version_id() -> str:
+    # triable chronologiquement + suffixe aléatoire (deux entraînements dans la même seconde)
+    return time.strftime("%Y%m%dT%H%M%SZ", time.gmtime()) + "-" + secrets.token_hex(3)
+
+
+def version_dir(version: str, artifacts_dir: str | Path | None = None) -> Path:
+    if not _VERSION_RE.match(version):
+        raise ValueError(f"Invalid model version: {version!r}")
+    return _base_dir(artifacts_dir) / VERSIONS_DIRNAME / version
+
+
+def list_versions(artifacts_dir: str | Path | None = None) -> list[str]:
+    root = _base_dir(artifacts_dir) / VERSIONS_DIRNAME
+    if not root.is_dir():
+        return []
+    return sorted(
+        p.name for p in root.iterdir()
+        if p.is_dir() and _VERSION_RE.match(p.name) and (p / METADATA_FILENAME).exists()
+    )
+
+
+def current_version(artifacts_dir: str | Path | None = None) -> str | None:
+    """
+    Version pointée par CURRENT (None : pas de registre, layout plat historique).
+    """
+    try:
+        raw = (_base_dir(artifacts_dir) / CURRENT_FILENAME).read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return None
+    return raw.strip() or None
+
+
+def set_current_version(version: str, artifacts_dir: str | Path | None = None) -> None:
+    """
+    Bascule atomique du pointeur (os.replace) : un lecteur voit l'ancienne ou la nouvelle version.
+    """
+    if not (version_dir(version, artifacts_dir) / METADATA_FILENAME).exists():
+        raise FileNotFoundError(f"Unknown model version: {version}")
+    path = _base_dir(artifacts_dir) / CURRENT_FILENAME
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(version + "\n", encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def resolve_artifacts_dir(
+    artifacts_dir: str | Path | None = None,
+    version: str | None = None,
+) -> tuple[Path, str | None]:
+    """
+    (dossier des artefacts, version) :
+    - version explicite -> versions/<version>/
+    - sinon version pointée par CURRENT
+    - sinon layout plat historique (artifacts/*.joblib, version None)
+    """
+    base = _base_dir(artifacts_dir)
+    version = version or current_version(base)
+    if version is None:
+        return base, None
+
+    path = version_dir(version, base)
+    if not path.is_dir():
+        raise FileNotFoundError(f"Unknown model version: {version}")
+    return path, version
+
+
+def publish_bundle(
+    bundle: Any,
+    artifacts_dir: str | Path | None = None,
+    activate: bool = True,
+) -> str:
+    """
+    Écrit une nouvelle version complète dans versions/<id>/ (dossier temporaire
+    renommé en une fois), puis met à jour CURRENT si activate=True.
+    """
+    version = new_version_id()
+    target = version_dir(version, artifacts_dir)
+    target.parent.mkdir(parents=True, exist_ok=True)
+
+    tmp = target.with_name(f".{version}.tmp")
+    try:
+        save_bundle(bundle, str(tmp))
+        os.rename(tmp, target)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+    if activate:
+        set_current_version(version, artifacts_dir)
+    return version
+
+
+def delete_version(version: str, artifacts_dir: str | Path | None = None) -> None:
+    """
+    Supprime versions/<id>/ (jamais la version pointée par CURRENT).
+    Renommage puis suppression : list_versions ne voit pas de version à moitié effacée.
+    """
+    if version == current_version(artifacts_dir):
+        raise ValueError(f"Cannot delete the current model version: {version}")
+    path = version_dir(version, artifacts_dir)
+    tmp = path.with_name(f".{version}.{os.getpid()}.deleted")
+    os.rename(path, tmp)
+    shutil.rmtree(tmp, ignore_errors=True)
+
+
+def _online_published_at(version: str, artifacts_dir: str | Path | None) -> int | None:
+    # date d'écriture d'un checkpoint en ligne (params["online"]), None pour les autres versions
+    path = version_dir(version, artifacts_dir) / METADATA_FILENAME
+    try:
+        params = json.loads(path.read_text(encoding="utf-8")).get("params") or {}
+        return path.stat().st_mtime_ns if "online" in params else None
+    except (OSError, ValueError):
+        return None
+
+
+def prune_online_versions(keep: int, artifacts_dir: str | Path | None = None) -> list[str]:
+    """
+    Rétention des checkpoints de l'apprentissage en ligne (params["online"] dans metadata.json) :
+    garde les `keep` plus récents. Versions entraînées hors ligne et CURRENT jamais supprimées.
+    """
+    # ordre de publication (deux checkpoints dans la même seconde : suffixe aléatoire non trié)
+    published = {v: _online_published_at(v, artifacts_dir) for v in list_versions(artifacts_dir)}
+    online = sorted((v for v, t in published.items() if t is not None), key=published.__getitem__)
+    current = current_version(artifacts_dir)
+    removed = []
+    for version in online[: -max(1, keep)]:
+        if version == current:
+            continue
+        try:
+            delete_version(version, artifacts_dir)
+        except FileNotFoundError:
+            continue  # déjà supprimée par un autre worker
+        removed.append(version)
+    return removed
+
+
+def acquire_online_lock(artifacts_dir: str | Path | None = None) -> bool:
+    """
+    Désigne le seul worker qui apprend en ligne sur ce registre (plusieurs workers uvicorn) :
+    fichier verrou créé atomiquement avec le pid du propriétaire. False si un autre process
+    vivant le détient ; verrou d'un process mort (ou d'un démarrage précédent) repris.
+    """
+    path = _base_dir(artifacts_dir) / ONLINE_LOCK_FILENAME
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(str(os.getpid()), encoding="utf-8")
+    try:
+        for _ in range(2):
+            try:
+                os.link(tmp, path)  # création atomique, pid déjà écrit
+                return True
+            except FileExistsError:
+                try:
+                    pid = int(path.read_text(encoding="utf-8").strip())
+                except (OSError, ValueError):
+                    pid = None
+                if owner_alive(pid):
+                    return False
+                path.unlink(missing_ok=True)  # verrou orphelin
+        return False
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def release_online_lock(artifacts_dir: str | Path | None = None) -> None:
+    path = _base_dir(artifacts_dir) / ONLINE_LOCK_FILENAME
+    try:
+        if int(path.read_text(encoding="utf-8").strip()) == os.getpid():
+            path.unlink()
+    except (OSError, ValueError):
+        pass
+
+
+def save_sweep_results(
+    results: list[dict[str, Any]],
+    artifacts_dir: str | None = None,
+    version: str | None = None,
+) -> Path:
+    """
+    Sauvegarde les runs d'un sweep (k, seed, inertie, métriques) à côté de la version retenue.
+    """
+    base, _ = resolve_artifacts_dir(artifacts_dir, version)
+    path = base / SWEEP_FILENAME
+    path.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    return path
+
+
+def read_metadata(artifacts_dir: str | None = None, version: str | None = None) -> dict[str, Any]:
+    """
+    Lit metadata.json (version courante par défaut)
+    """
+    base, _ = resolve_artifacts_dir(artifacts_dir, version)
     metadata_path = base / METADATA_FILENAME
     if not metadata_path.exists():
         raise FileNotFoundError(f"Metadata not found: {metadata_path}")
     return json.loads(metadata_path.read_text(encoding="utf-8"))
 
 
-def load_bundle(artifacts_dir: str | None = None) -> ModelBundle:
+def load_bundle(
+    artifacts_dir: str | None = None,
+    inference_only: bool = False,
+    version: str | None = None,
+) -> ModelBundle:
     """
-    Charge pipeline + metadata depuis artifacts/
+    Charge pipeline + metadata depuis artifacts/ (version courante ou `version`)
+    Le moteur est chargé depuis l'artefact binaire (mmap, checksum vérifié) ;
+    artefact absent ou invalide -> recompilé depuis le pipeline joblib.
+    inference_only=True : seul le moteur est chargé (pipeline=None, ni joblib
+    ni sklearn importés). Fallback sur le pipeline si l'artefact est inutilisable.
     """
-    base = Path(artifacts_dir) if artifacts_dir else ARTIFACTS_DIR
+    base, _ = resolve_artifacts_dir(artifacts_dir, version)
 
     pipeline_path = base / PIPELINE_FILENAME
     metadata_path = base / METADATA_FILENAME
+    engine_path = base / ENGINE_FILENAME
 
-    if not pipeline_path.exists():
-        raise FileNotFoundError(f"Pipeline not found: {pipeline_path}")
     if not metadata_path.exists():
         raise FileNotFoundError(f"Metadata not found: {metadata_path}")
+    metadata = json.loads(metadata_path.read_text(encoding="utf-8"))
+    expected_columns = metadata.get("expected_columns", [])
+
+    # Moteur NumPy depuis l'artefact binaire (memory-map), sinon recompilé depuis le pipeline
+    engine = None
+    if engine_path.exists():
+        try:
+            source = pipeline_path if pipeline_path.exists() else None
+            engine = load_engine(engine_path, source=source)
+        except (ValueError, KeyError):
+            engine = None
+
+    if inference_only and engine is not None:
+        return _make_bundle(metadata, pipeline=None, engine=engine)
+
+    if not pipeline_path.exists():
+        raise FileNotFoundError(f"Pipeline not found: {pipeline_path}")
+
+    import joblib
 
     pipeline = joblib.load(pipeline_path)
-    metadata = json.loads(metadata_path.read_text(encoding="utf-8"))
 
+    # Fallback : moteur compilé depuis le pipeline (None -> chemin sklearn)
+    if engine is None:
+        try:
+            engine = compile_pipeline(pipeline, expected_columns)
+        except ValueError:
+            engine = None
+
+    return _make_bundle(metadata, pipeline=pipeline, engine=engine)
+
+
+def _make_bundle(
+    metadata: dict[str, Any],
+    pipeline: Any,
+    engine: InferenceEngine | None,
+) -> ModelBundle:
     return ModelBundle(
         pipeline=pipeline,
         model_name=metadata.get("model_name", "kmeans"),
         expected_columns=metadata.get("expected_columns", []),
         params=metadata.get("params", {}),
         metrics=metadata.get("metrics", {}),
+        engine=engine,
     )
+
+
+def file_fingerprint(path: str | Path) -> dict[str, Any]:
+    """
+    Empreinte d'un fichier : sha256 du contenu (lu en memory-map) + taille / mtime.
+    """
+    p = Path(path)
+    st = p.stat()
+    digest = hashlib.sha256()
+    if st.st_size:
+        with p.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            digest.update(mm)
+    return {"sha256": digest.hexdigest(), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def _fingerprint_matches(path: Path, expected: dict[str, Any] | None) -> bool:
+    if not expected or not path.is_file():
+        return False
+    st = path.stat()
+    if st.st_size != expected.get("size"):
+        return False
+    # chemin rapide : fichier inchangé depuis l'entraînement (O(1), sans relire le contenu)
+    if st.st_mtime_ns == expected.get("mtime_ns"):
+        return True
+    # mtime modifié (checkout git, COPY Docker...) : on compare le contenu
+    return file_fingerprint(path)["sha256"] == expected.get("sha256")
+
+
+def save_reference_profiles(
+    profile: dict[str, Any],
+    data_path: str | Path,
+    artifacts_dir: str | None = None,
+    version: str | None = None,
+    data_fingerprint: dict[str, Any] | None = None,
+) -> Path:
+    """
+    Sauvegarde les profils du dataset de référence (sortie de profile_clusters),
+    indexés par l'empreinte du pipeline sauvegardé et du dataset.
+    `data_fingerprint` : empreinte de data_path déjà calculée (évite un 2e sha256).
+    Écriture atomique : plusieurs workers peuvent régénérer le cache en même temps.
+    """
+    base, _ = resolve_artifacts_dir(artifacts_dir, version)
+    pipeline_path = base / PIPELINE_FILENAME
+    if not pipeline_path.exists():
+        raise FileNotFoundError(f"Pipeline not found: {pipeline_path}")
+
+    payload = {
+        "pipeline": file_fingerprint(pipeline_path),
+        "data": data_fingerprint or file_fingerprint(data_path),
+        "profile": profile,
+    }
+
+    path = base / PROFILES_FILENAME
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(payload), encoding="utf-8")
+    os.replace(tmp, path)
+    return path
+
+
+def load_reference_profiles(
+    data_path: str | Path,
+    artifacts_dir: str | None = None,
+    version: str | None = None,
+) -> dict[str, Any] | None:
+    """
+    Profils précalculés si le cache correspond au pipeline et au dataset courants,
+    None sinon (absent, illisible ou périmé).
+    """
+    base, _ = resolve_artifacts_dir(artifacts_dir, version)
+    path = base / PROFILES_FILENAME
+    if not path.exists():
+        return None
+
+    try:
+        payload = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+    if not _fingerprint_matches(base / PIPELINE_FILENAME, payload.get("pipeline")):
+        return None
+    if not _fingerprint_matches(Path(data_path), payload.get("data")):
+        return None
+    return payload.get("profile")
@@ -1,16 +1,257 @@
 from __future__ import annotations
 
+from collections.abc import Iterator
 from pathlib import Path
+from typing import IO, TYPE_CHECKING, Any
 
-import pandas as pd
+import numpy as np
 
-from .settings import DROP_COLUMNS
+from .settings import DROP_COLUMNS, UPLOAD_CHUNK_ROWS
 
+if TYPE_CHECKING:
+    import pandas as pd
 
-def load_csv(path: str | Path) -> pd.DataFrame:
-    df = pd.read_csv(path)
+# Formats tabulaires supportés : détectés par extension, sinon par content-type
+FORMAT_EXTENSIONS: dict[str, str] = {
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".arrow": "arrow",
+    ".arrows": "arrow",
+    ".feather": "arrow",
+    ".ipc": "arrow",
+}
+FORMAT_CONTENT_TYPES: dict[str, str] = {
+    "text/csv": "csv",
+    "application/vnd.apache.parquet": "parquet",
+    "application/x-parquet": "parquet",
+    "application/vnd.apache.arrow.file": "arrow",
+    "application/vnd.apache.arrow.stream": "arrow",
+}
+MEDIA_TYPES: dict[str, str] = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.file",
+}
+_ARROW_FILE_MAGIC = b"ARROW1"
+
+
+class DatasetReadError(ValueError):
+    """Erreur de lecture d'un fichier (distincte des erreurs de validation des colonnes)."""
+
+
+class CsvReadError(DatasetReadError):
+    """Erreur de parsing CSV."""
+
+
+def detect_format(filename: str | Path | None, content_type: str | None = None) -> str | None:
+    ext = Path(str(filename or "")).suffix.lower()
+    if ext in FORMAT_EXTENSIONS:
+        return FORMAT_EXTENSIONS[ext]
+    return FORMAT_CONTENT_TYPES.get((content_type or "").split(";")[0].strip().lower())
+
+
+def _drop_unused(df: pd.DataFrame) -> pd.DataFrame:
     # drop colonnes inutiles si présentes
     for col in DROP_COLUMNS:
         if col in df.columns:
             df = df.drop(columns=[col])
     return df
+
+
+def _pyarrow() -> Any:
+    # dépendance optionnelle : seulement requise pour Parquet / Arrow IPC
+    try:
+        import pyarrow as pa
+        import pyarrow.ipc  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError as e:
+        raise DatasetReadError("pyarrow is required for Parquet / Arrow IPC support") from e
+    return pa
+
+
+def _project(names: list[str], columns: list[str] | None) -> list[str]:
+    if columns is None:
+        return [c for c in names if c not in DROP_COLUMNS]
+    missing = [c for c in columns if c not in names]
+    if missing:
+        raise ValueError(f"Missing required columns: {missing}")
+    return list(columns)
+
+
+def load_csv(path: str | Path, columns: list[str] | None = None) -> pd.DataFrame:
+    """
+    Charge un dataset (CSV, Parquet ou Arrow IPC selon l'extension).
+    `columns` : projection (seules ces colonnes sont lues).
+    """
+    fmt = detect_format(path) or "csv"
+    if fmt == "csv":
+        import pandas as pd
+
+        # memory-map : le fichier est parsé depuis le cache de pages, sans tampon intermédiaire
+        df = pd.read_csv(path, usecols=columns, memory_map=True)
+        return _drop_unused(df)
+
+    pa = _pyarrow()
+    if fmt == "parquet":
+        names = pa.parquet.ParquetFile(path).schema_arrow.names
+        table = pa.parquet.read_table(path, columns=_project(names, columns), memory_map=True)
+    else:
+        # memory-map : les buffers numériques ne sont pas copiés en lecture
+        with pa.memory_map(str(path)) as source:
+            table = pa.ipc.open_file(source).read_all()
+        table = table.select(_project(table.schema.names, columns))
+    return table.to_pandas()
+
+
+def iter_csv_chunks(
+    source: str | Path | IO[Any],
+    chunk_rows: int = UPLOAD_CHUNK_ROWS,
+    columns: list[str] | None = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Lit un CSV par blocs de `chunk_rows` lignes (mémoire bornée).
+    Les erreurs de parsing sont remontées en CsvReadError.
+    """
+    # projection tolérante : les colonnes absentes sont signalées par la validation en aval
+    usecols = None if columns is None else set(columns).__contains__
+    import pandas as pd
+
+    try:
+        reader = pd.read_csv(source, chunksize=chunk_rows, usecols=usecols)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise CsvReadError(str(e)) from e
+
+    with reader:
+        while True:
+            try:
+                chunk = next(reader)
+            except StopIteration:
+                return
+            except (ValueError, UnicodeDecodeError) as e:
+                raise CsvReadError(str(e)) from e
+            yield _drop_unused(chunk)
+
+
+def _open_ipc(pa: Any, source: Any) -> tuple[Any, Iterator[Any]]:
+    # format fichier (magic ARROW1, accès aléatoire) ou format stream
+    head = source.read(len(_ARROW_FILE_MAGIC))
+    source.seek(0)
+    if head == _ARROW_FILE_MAGIC:
+        reader = pa.ipc.open_file(source)
+        return reader.schema, (reader.get_batch(i) for i in range(reader.num_record_batches))
+    reader = pa.ipc.open_stream(source)
+    return reader.schema, iter(reader)
+
+
+def iter_arrow_batches(
+    source: Any,
+    fmt: str,
+    columns: list[str] | None = None,
+    chunk_rows: int = UPLOAD_CHUNK_ROWS,
+) -> Iterator[Any]:
+    """
+    Lit un fichier Parquet / Arrow IPC par RecordBatch d'au plus `chunk_rows` lignes,
+    en ne lisant que les colonnes projetées.
+    """
+    pa = _pyarrow()
+    try:
+        if fmt == "parquet":
+            pf = pa.parquet.ParquetFile(source)
+            cols = _project(pf.schema_arrow.names, columns)
+            batches = pf.iter_batches(batch_size=chunk_rows, columns=cols)
+        else:
+            schema, raw = _open_ipc(pa, source)
+            cols = _project(schema.names, columns)
+            batches = (b.select(cols) for b in raw)
+
+        for batch in batches:
+            if batch.num_rows == 0:
+                yield batch
+            for offset in range(0, batch.num_rows, chunk_rows):
+                yield batch.slice(offset, chunk_rows)  # slice Arrow : sans copie
+    except pa.ArrowException as e:
+        raise DatasetReadError(str(e)) from e
+
+
+def iter_dataset_chunks(
+    path: str | Path,
+    chunk_rows: int = UPLOAD_CHUNK_ROWS,
+    columns: list[str] | None = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Lit un dataset sur disque (CSV, Parquet ou Arrow IPC) par DataFrames d'au plus
+    `chunk_rows` lignes : utilisé pour l'entraînement out-of-core.
+    """
+    fmt = detect_format(path) or "csv"
+    if fmt == "csv":
+        yield from iter_csv_chunks(path, chunk_rows, columns)
+        return
+
+    with open(path, "rb") as source:
+        for batch in iter_arrow_batches(source, fmt, columns, chunk_rows):
+            yield _drop_unused(batch.to_pandas())
+
+
+def arrow_columns(batch: Any, columns: list[str]) -> dict[str, np.ndarray]:
+    """
+    RecordBatch -> dict de tableaux NumPy. Colonnes numériques sans null : zéro copie.
+    """
+    missing = [c for c in columns if c not in batch.schema.names]
+    if missing:
+        raise ValueError(f"Missing required columns: {missing}")
+    return {c: batch.column(c).to_numpy(zero_copy_only=False) for c in columns}
+
+
+class _ByteSink:
+    """
+    Sortie fichier minimale pour les writers pyarrow : les octets écrits sont
+    récupérés (drain) au fil de l'eau au lieu d'être accumulés.
+    """
+
+    def __init__(self) -> None:
+        self._parts: list[bytes] = []
+        self._pos = 0
+        self.closed = False
+
+    def write(self, data: Any) -> int:
+        data = bytes(data)
+        self._parts.append(data)
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data, self._parts = b"".join(self._parts), []
+        return data
+
+
+def write_arrow_batches(batches: Iterator[Any], fmt: str) -> Iterator[bytes]:
+    """
+    Sérialise des RecordBatch en Parquet / Arrow IPC, bloc par bloc (générateur d'octets).
+    """
+    pa = _pyarrow()
+    sink = _ByteSink()
+    writer = None
+    for batch in batches:
+        if writer is None:
+            if fmt == "parquet":
+                writer = pa.parquet.ParquetWriter(sink, batch.schema)
+            else:
+                writer = pa.ipc.new_file(sink, batch.schema)
+        writer.write_batch(batch)
+        data = sink.drain()
+        if data:
+            yield data
+
+    if writer is not None:
+        writer.close()
+        yield sink.drain()
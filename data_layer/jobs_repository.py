@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import IO, Any
+
+from data_layer.settings import ARTIFACTS_DIR, JOB_TTL_S, JOBS_DIRNAME
+
+_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+_FILES = {"state": "state.json", "result": "result.json", "input": "input", "export": "export"}
+
+ACTIVE = ("queued", "running")
+
+
+def owner_alive(pid: int | None) -> bool:
+    # pid == le nôtre au démarrage : ancien process (pid réutilisé, ex. conteneur redémarré)
+    if not pid or pid == os.getpid():
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobStore:
+    """
+    Jobs de segmentation sur disque (artifacts/jobs/<id>/) :
+    state.json (statut + progression), input (fichier soumis, supprimé en fin de job),
+    result.json (résumé ClusterFileResponse), export (fichier enrichi).
+    Les jobs terminés depuis plus de `ttl_s` secondes sont supprimés par cleanup().
+    """
+
+    def __init__(self, directory: str | Path | None = None, ttl_s: float = JOB_TTL_S) -> None:
+        self.directory = Path(directory) if directory else ARTIFACTS_DIR / JOBS_DIRNAME
+        self.ttl_s = ttl_s
+        self._lock = threading.Lock()
+
+    def path(self, job_id: str, name: str) -> Path:
+        if not _ID_RE.match(job_id) or name not in _FILES:
+            raise FileNotFoundError(f"Unknown job: {job_id}")
+        return self.directory / job_id / _FILES[name]
+
+    def _write(self, job_id: str, name: str, data: dict[str, Any]) -> None:
+        # écriture atomique : un lecteur concurrent voit l'ancien ou le nouvel état, jamais un mélange
+        target = self.path(job_id, name)
+        tmp = target.with_name(f".{target.name}.tmp")
+        tmp.write_text(json.dumps(data), encoding="utf-8")
+        os.replace(tmp, target)
+
+    def create(self, source: IO[bytes], **fields: Any) -> dict[str, Any]:
+        """
+        Copie le fichier soumis dans le store (par blocs) et enregistre un job "queued".
+        """
+        self.cleanup()
+        job_id = uuid.uuid4().hex
+        (self.directory / job_id).mkdir(parents=True)
+        with open(self.path(job_id, "input"), "wb") as out:
+            shutil.copyfileobj(source, out, 1 << 20)
+
+        state = {
+            **fields,
+            "job_id": job_id,
+            "status": "queued",
+            "pid": os.getpid(),
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "input_bytes": self.path(job_id, "input").stat().st_size,
+            "rows_done": 0,
+            "rows_total": None,
+            "rows_per_s": None,
+            "progress": 0.0,
+            "eta_s": None,
+            "error": None,
+        }
+        self._write(job_id, "state", state)
+        return state
+
+    def get(self, job_id: str) -> dict[str, Any]:
+        path = self.path(job_id, "state")
+        if not path.is_file():
+            raise FileNotFoundError(f"Unknown job: {job_id}")
+        return json.loads(path.read_text(encoding="utf-8"))
+
+    def update(self, job_id: str, **fields: Any) -> dict[str, Any]:
+        with self._lock:
+            state = {**self.get(job_id), **fields}
+            self._write(job_id, "state", state)
+        return state
+
+    def start(self, job_id: str) -> dict[str, Any]:
+        return self.update(job_id, status="running", started_at=time.time())
+
+    def progress(self, job_id: str, rows_done: int, elapsed_s: float, fraction: float) -> None:
+        """
+        `fraction` : part du fichier d'entrée lue (octets), d'où l'estimation du total et de l'ETA.
+        """
+        fraction = min(max(fraction, 0.0), 1.0)
+        self.update(
+            job_id,
+            rows_done=rows_done,
+            rows_total=round(rows_done / fraction) if fraction > 0 else None,
+            rows_per_s=rows_done / elapsed_s if elapsed_s > 0 else None,
+            progress=fraction,
+            eta_s=elapsed_s * (1 - fraction) / fraction if fraction > 0 else None,
+        )
+
+    def finish(self, job_id: str, result: dict[str, Any], **fields: Any) -> dict[str, Any]:
+        self._write(job_id, "result", result)
+        self.path(job_id, "input").unlink(missing_ok=True)
+        state = self.get(job_id)
+        elapsed = time.time() - (state["started_at"] or state["created_at"])
+        n_rows = result["n_rows"]
+        return self.update(
+            job_id,
+            **fields,
+            status="succeeded",
+            finished_at=time.time(),
+            rows_done=n_rows,
+            rows_total=n_rows,
+            rows_per_s=n_rows / elapsed if elapsed > 0 else None,
+            progress=1.0,
+            eta_s=0.0,
+        )
+
+    def fail(self, job_id: str, error: str) -> dict[str, Any]:
+        self.path(job_id, "input").unlink(missing_ok=True)
+        self.path(job_id, "export").unlink(missing_ok=True)
+        return self.update(job_id, status="failed", finished_at=time.time(), eta_s=None, error=error)
+
+    def result(self, job_id: str) -> dict[str, Any]:
+        return json.loads(self.path(job_id, "result").read_text(encoding="utf-8"))
+
+    def _ids(self) -> list[str]:
+        if not self.directory.is_dir():
+            return []
+        return [p.name for p in self.directory.iterdir() if _ID_RE.match(p.name)]
+
+    def list(self) -> list[dict[str, Any]]:
+        """
+        Jobs du plus récent au plus ancien.
+        """
+        jobs = []
+        for job_id in self._ids():
+            try:
+                jobs.append(self.get(job_id))
+            except (FileNotFoundError, ValueError):
+                continue
+        return sorted(jobs, key=lambda j: j["created_at"], reverse=True)
+
+    def recover(self) -> int:
+        """
+        Au démarrage : les jobs restés "queued" / "running" dont le process propriétaire
+        n'existe plus passent en échec (les jobs d'un autre worker vivant sont laissés).
+        """
+        n = 0
+        for job in self.list():
+            if job["status"] in ACTIVE and not owner_alive(job.get("pid")):
+                self.fail(job["job_id"], "Interrupted by a server restart, please resubmit.")
+                n += 1
+        return n
+
+    def cleanup(self, now: float | None = None) -> int:
+        """
+        Supprime les jobs terminés depuis plus de ttl_s (les jobs actifs ne sont jamais purgés).
+        """
+        now = time.time() if now is None else now
+        removed = 0
+        for job_id in self._ids():
+            try:
+                job = self.get(job_id)
+            except FileNotFoundError:
+                # répertoire sans état : création en cours ou interrompue -> âge du répertoire
+                try:
+                    mtime = (self.directory / job_id).stat().st_mtime
+                except FileNotFoundError:
+                    continue  # déjà supprimé
+                job = {"status": "failed", "finished_at": None, "created_at": mtime}
+            except ValueError:
+                continue
+            if job["status"] in ACTIVE:
+                continue
+            if now - (job["finished_at"] or job["created_at"]) > self.ttl_s:
+                shutil.rmtree(self.directory / job_id, ignore_errors=True)
+                removed += 1
+        return removed
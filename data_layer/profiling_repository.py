@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+import secrets
+import time
+from pathlib import Path
+from typing import Any
+
+from data_layer.settings import ARTIFACTS_DIR, PROFILING_DIRNAME
+
+_ID_RE = re.compile(r"^\d{8}T\d{6}Z-[0-9a-f]{8}$")
+_KINDS = {"meta": ".json", "cpu": ".prof", "alloc": ".tracemalloc"}
+
+
+def new_profile_id() -> str:
+    return time.strftime("%Y%m%dT%H%M%SZ", time.gmtime()) + "-" + secrets.token_hex(4)
+
+
+class ProfileStore:
+    """
+    Profils de requêtes sur disque (artifacts/request_profiles/) :
+    <id>.json (métadonnées + résumés), <id>.prof (pstats), <id>.tracemalloc.
+    Rétention bornée : seuls les `max_profiles` plus récents sont gardés.
+    """
+
+    def __init__(self, directory: str | Path | None = None, max_profiles: int = 20) -> None:
+        self.directory = Path(directory) if directory else ARTIFACTS_DIR / PROFILING_DIRNAME
+        self.max_profiles = max(1, int(max_profiles))
+
+    def path(self, profile_id: str, kind: str) -> Path:
+        if not _ID_RE.match(profile_id) or kind not in _KINDS:
+            raise FileNotFoundError(f"Unknown profile: {profile_id}")
+        return self.directory / f"{profile_id}{_KINDS[kind]}"
+
+    def save(self, profile_id: str, meta: dict[str, Any], profile: Any) -> None:
+        """
+        `profile` : RequestProfile terminé (stats CPU + instantané tracemalloc).
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        if profile.stats is not None:
+            profile.stats.dump_stats(self.path(profile_id, "cpu"))
+        if profile.snapshot is not None:
+            profile.snapshot.dump(str(self.path(profile_id, "alloc")))
+
+        meta = {
+            **meta,
+            "id": profile_id,
+            "files": [k for k in ("cpu", "alloc") if self.path(profile_id, k).exists()],
+        }
+        # métadonnées écrites en dernier (atomique) : un profil listé est complet
+        target = self.path(profile_id, "meta")
+        tmp = target.with_name(f".{target.name}.tmp")
+        tmp.write_text(json.dumps(meta, indent=2), encoding="utf-8")
+        os.replace(tmp, target)
+        self._prune()
+
+    def _ids(self) -> list[str]:
+        if not self.directory.is_dir():
+            return []
+        # id triable chronologiquement
+        return sorted(
+            p.stem for p in self.directory.glob("*.json") if _ID_RE.match(p.stem)
+        )
+
+    def _prune(self) -> None:
+        for profile_id in self._ids()[: -self.max_profiles]:
+            for kind in _KINDS:
+                self.path(profile_id, kind).unlink(missing_ok=True)
+
+    def get(self, profile_id: str) -> dict[str, Any]:
+        path = self.path(profile_id, "meta")
+        if not path.is_file():
+            raise FileNotFoundError(f"Unknown profile: {profile_id}")
+        return json.loads(path.read_text(encoding="utf-8"))
+
+    def list(self) -> list[dict[str, Any]]:
+        """
+        Profils du plus récent au plus ancien (sans les résumés détaillés).
+        """
+        out = []
+        for profile_id in reversed(self._ids()):
+            try:
+                meta = self.get(profile_id)
+            except (FileNotFoundError, ValueError):
+                continue
+            out.append({k: v for k, v in meta.items() if k not in ("cpu_top", "alloc_top")})
+        return out
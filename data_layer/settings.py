@@ -1,5 +1,12 @@
+import os
 from pathlib import Path
 
+
+def _env_int(name: str, default: int) -> int:
+    raw = os.environ.get(name)
+    return int(raw) if raw else default
+
+
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 ARTIFACTS_DIR = PROJECT_ROOT / "artifacts"
 
@@ -8,3 +15,85 @@ DROP_COLUMNS: list[str] = ["CustomerID"]
 
 PIPELINE_FILENAME = "clustering_pipeline.joblib"
 METADATA_FILENAME = "metadata.json"
+# Moteur d'inférence au format binaire plat (sans pickle, mappable en mémoire)
+ENGINE_FILENAME = "inference_engine.bin"
+# Profils du dataset de référence précalculés par scripts.train (clé : hash pipeline + dataset)
+PROFILES_FILENAME = "reference_profiles.json"
+# Résultats de la recherche de k (scripts.train --sweep) : un run par (k, seed)
+SWEEP_FILENAME = "sweep.json"
+# Suivi des entraînements (params, métriques, timings, hash dataset) : SQLite local
+TRACKING_DB_FILENAME = "tracking.sqlite3"
+
+# Registre de modèles : artifacts/versions/<version>/ + pointeur CURRENT (swap atomique)
+VERSIONS_DIRNAME = "versions"
+CURRENT_FILENAME = "CURRENT"
+# Apprentissage en ligne : un seul learner par registre (pid du worker propriétaire)
+ONLINE_LOCK_FILENAME = "online.lock"
+
+# Uploads CSV : lecture par blocs de lignes (mémoire bornée)
+UPLOAD_CHUNK_ROWS = _env_int("UPLOAD_CHUNK_ROWS", 50_000)
+PREVIEW_ROWS = 20
+
+# /api/cluster/rows : nb max de lignes par requête JSON (413 au-delà)
+BULK_ROWS_LIMIT = _env_int("BULK_ROWS_LIMIT", 200_000)
+# ... et taille max du body JSON (413 avant lecture / parsing complet)
+BULK_BODY_LIMIT_BYTES = _env_int("BULK_BODY_LIMIT_BYTES", 32 * 1024 * 1024)
+
+# Scoring multi-process : désactivé si SCORING_WORKERS <= 1
+SCORING_WORKERS = _env_int("SCORING_WORKERS", 0)
+PARALLEL_MIN_ROWS = _env_int("PARALLEL_MIN_ROWS", 200_000)
+
+# Lanes d'exécution : workers dédiés + profondeur de file (429 au-delà)
+FILE_LANE_WORKERS = _env_int("FILE_LANE_WORKERS", 2)
+FILE_LANE_QUEUE = _env_int("FILE_LANE_QUEUE", 8)
+ROW_LANE_WORKERS = _env_int("ROW_LANE_WORKERS", 4)
+ROW_LANE_QUEUE = _env_int("ROW_LANE_QUEUE", 256)
+
+# Micro-batching de /api/cluster/row (opt-in)
+ROW_BATCHING = _env_int("ROW_BATCHING", 0) > 0
+ROW_BATCH_MAX_SIZE = _env_int("ROW_BATCH_MAX_SIZE", 64)
+ROW_BATCH_MAX_WAIT_US = _env_int("ROW_BATCH_MAX_WAIT_US", 500)
+
+# Cache des prédictions /api/cluster/row : LRU + TTL en mémoire (0 = désactivé),
+# clé = version du modèle + features arrondies à PREDICTION_CACHE_DECIMALS décimales
+PREDICTION_CACHE_SIZE = _env_int("PREDICTION_CACHE_SIZE", 10_000)
+PREDICTION_CACHE_TTL_S = _env_int("PREDICTION_CACHE_TTL_S", 300)
+PREDICTION_CACHE_DECIMALS = _env_int("PREDICTION_CACHE_DECIMALS", 6)
+# Fichier SQLite partagé entre workers (optionnel, 2e niveau derrière le LRU)
+PREDICTION_CACHE_PATH = os.environ.get("PREDICTION_CACHE_PATH") or None
+
+# Métriques Prometheus (/api/metrics) : timers par étape sur un % des requêtes
+METRICS_ENABLED = bool(_env_int("METRICS_ENABLED", 1))
+METRICS_SAMPLE_PERCENT = _env_int("METRICS_SAMPLE_PERCENT", 100)
+
+# Profilage à la demande (CPU cProfile + tracemalloc) : middleware absent si désactivé.
+# Déclenché par l'en-tête X-Profile: 1 (+ X-Profile-Token si PROFILING_TOKEN) ou échantillonné
+PROFILING_ENABLED = bool(_env_int("PROFILING_ENABLED", 0))
+PROFILING_SAMPLE_PERCENT = _env_int("PROFILING_SAMPLE_PERCENT", 0)
+PROFILING_MAX_PROFILES = _env_int("PROFILING_MAX_PROFILES", 20)
+PROFILING_TOKEN = os.environ.get("PROFILING_TOKEN") or None
+PROFILING_DIRNAME = "request_profiles"
+
+# Jobs de segmentation asynchrones (gros fichiers) : lane dédiée + stockage disque avec TTL
+JOB_WORKERS = _env_int("JOB_WORKERS", 1)
+JOB_QUEUE = _env_int("JOB_QUEUE", 16)
+JOB_TTL_S = _env_int("JOB_TTL_S", 86_400)
+JOBS_DIRNAME = "jobs"
+
+# Apprentissage en ligne des centroïdes (opt-in) : lignes scorées -> sommes décroissantes
+# par cluster, checkpoint périodique dans le registre (nouvelle version + swap)
+ONLINE_LEARNING = bool(_env_int("ONLINE_LEARNING", 0))
+ONLINE_HALF_LIFE_ROWS = _env_int("ONLINE_HALF_LIFE_ROWS", 100_000)
+ONLINE_CHECKPOINT_S = _env_int("ONLINE_CHECKPOINT_S", 300)
+ONLINE_MIN_ROWS = _env_int("ONLINE_MIN_ROWS", 1_000)
+ONLINE_QUEUE_ROWS = _env_int("ONLINE_QUEUE_ROWS", 200_000)
+# checkpoints gardés dans le registre (les plus récents ; 0 : tous)
+ONLINE_KEEP_VERSIONS = _env_int("ONLINE_KEEP_VERSIONS", 12)
+
+# Mode inference-only : moteur NumPy exporté, pipeline sklearn jamais chargé
+INFERENCE_ONLY = bool(_env_int("INFERENCE_ONLY", 0))
+
+# Hot reload : période de scrutation du pointeur CURRENT (0 = désactivé)
+MODEL_RELOAD_INTERVAL_S = _env_int("MODEL_RELOAD_INTERVAL_S", 5)
+# Nb max de versions épinglées (?model_version=...) gardées en mémoire
+MODEL_CACHE_SIZE = _env_int("MODEL_CACHE_SIZE", 4)
@@ -0,0 +1,322 @@
+from __future__ import annotations
+
+import json
+import logging
+import math
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+from data_layer.settings import ARTIFACTS_DIR, TRACKING_DB_FILENAME
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id        TEXT PRIMARY KEY,
+    parent_id     TEXT,
+    name          TEXT NOT NULL,
+    model_name    TEXT,
+    status        TEXT NOT NULL,
+    started_at    REAL NOT NULL,
+    ended_at      REAL,
+    params        TEXT NOT NULL DEFAULT '{}',
+    dataset_path  TEXT,
+    dataset_hash  TEXT,
+    n_rows        INTEGER,
+    artifact_path TEXT,
+    version       TEXT
+);
+CREATE TABLE IF NOT EXISTS metrics (
+    run_id TEXT NOT NULL,
+    key    TEXT NOT NULL,
+    value  REAL,
+    PRIMARY KEY (run_id, key)
+);
+CREATE TABLE IF NOT EXISTS timings (
+    run_id  TEXT NOT NULL,
+    stage   TEXT NOT NULL,
+    seconds REAL NOT NULL,
+    PRIMARY KEY (run_id, stage)
+);
+CREATE INDEX IF NOT EXISTS runs_started ON runs (started_at);
+CREATE INDEX IF NOT EXISTS runs_parent ON runs (parent_id);
+"""
+
+_INSERT_RUN = (
+    "INSERT INTO runs (run_id, parent_id, name, model_name, status, started_at, params,"
+    " dataset_path, dataset_hash, n_rows) VALUES (?, ?, ?, ?, 'running', ?, ?, ?, ?, ?)"
+)
+_UPDATE_RUN = (
+    "UPDATE runs SET status = ?, ended_at = ?,"
+    " model_name = COALESCE(?, model_name), n_rows = COALESCE(?, n_rows),"
+    " artifact_path = COALESCE(?, artifact_path), version = COALESCE(?, version)"
+    " WHERE run_id = ?"
+)
+_UPSERT_METRIC = "INSERT OR REPLACE INTO metrics (run_id, key, value) VALUES (?, ?, ?)"
+_UPSERT_TIMING = "INSERT OR REPLACE INTO timings (run_id, stage, seconds) VALUES (?, ?, ?)"
+
+_STOP = object()
+
+
+def _connect(path: Path) -> sqlite3.Connection:
+    con = sqlite3.connect(path, timeout=30)
+    # WAL : les lectures (requêtes de comparaison) ne bloquent pas l'écrivain
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("PRAGMA synchronous=NORMAL")
+    con.executescript(_SCHEMA)
+    return con
+
+
+def _number(value: Any) -> float | None:
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(value) else value
+
+
+class TrackingStore:
+    """
+    Suivi local des entraînements (SQLite embarqué, artifacts/tracking.sqlite3).
+    Les écritures sont mises en file et appliquées par un thread dédié, par
+    lots dans une seule transaction : l'appelant (entraînement) ne fait jamais
+    d'I/O. Les lectures ouvrent leur propre connexion (vidage préalable de la file).
+    """
+
+    def __init__(
+        self,
+        path: str | Path | None = None,
+        batch_size: int = 512,
+        flush_interval_s: float = 0.2,
+    ) -> None:
+        self.path = Path(path) if path else ARTIFACTS_DIR / TRACKING_DB_FILENAME
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        _connect(self.path).close()  # schéma créé avant le 1er run (erreurs remontées ici)
+
+        self._batch_size = max(1, int(batch_size))
+        self._interval = flush_interval_s
+        self._queue: queue.Queue[Any] = queue.Queue()
+        self._writer = threading.Thread(target=self._run, name="tracking-writer", daemon=True)
+        self._writer.start()
+
+    # --- écriture (non bloquante) ------------------------------------------
+
+    def start_run(
+        self,
+        name: str,
+        params: dict[str, Any] | None = None,
+        parent_id: str | None = None,
+        model_name: str | None = None,
+        dataset_path: str | Path | None = None,
+        dataset_hash: str | None = None,
+        n_rows: int | None = None,
+    ) -> str:
+        run_id = uuid.uuid4().hex
+        self._queue.put((_INSERT_RUN, (
+            run_id,
+            parent_id,
+            name,
+            model_name,
+            time.time(),
+            json.dumps(params or {}, default=str),
+            None if dataset_path is None else str(dataset_path),
+            dataset_hash,
+            n_rows,
+        )))
+        return run_id
+
+    def log_metrics(self, run_id: str, metrics: dict[str, Any]) -> None:
+        for key, value in metrics.items():
+            self._queue.put((_UPSERT_METRIC, (run_id, key, _number(value))))
+
+    def log_timing(self, run_id: str, stage: str, seconds: float) -> None:
+        self._queue.put((_UPSERT_TIMING, (run_id, stage, float(seconds))))
+
+    @contextmanager
+    def timer(self, run_id: str, stage: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.log_timing(run_id, stage, time.perf_counter() - t0)
+
+    def end_run(
+        self,
+        run_id: str,
+        status: str = "finished",
+        model_name: str | None = None,
+        n_rows: int | None = None,
+        artifact_path: str | Path | None = None,
+        version: str | None = None,
+    ) -> None:
+        self._queue.put((_UPDATE_RUN, (
+            status,
+            time.time(),
+            model_name,
+            n_rows,
+            None if artifact_path is None else str(artifact_path),
+            version,
+            run_id,
+        )))
+
+    # --- thread écrivain -------------------------------------------------------
+
+    def _run(self) -> None:
+        con = _connect(self.path)
+        try:
+            stop = False
+            while not stop:
+                try:
+                    item = self._queue.get(timeout=self._interval)
+                except queue.Empty:
+                    continue
+                batch, done = [], []
+                # regroupe tout ce qui est déjà en file : une transaction par lot
+                while True:
+                    if item is _STOP:
+                        stop = True
+                    elif isinstance(item, threading.Event):
+                        done.append(item)
+                    else:
+                        batch.append(item)
+                    if len(batch) >= self._batch_size:
+                        break
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                self._write(con, batch)
+                for event in done:
+                    event.set()
+        finally:
+            con.close()
+
+    def _write(self, con: sqlite3.Connection, batch: list[tuple[str, tuple]]) -> None:
+        if not batch:
+            return
+        try:
+            with con:
+                for sql, args in batch:
+                    con.execute(sql, args)
+        except sqlite3.Error:
+            # le suivi ne doit jamais faire échouer un entraînement
+            logger.exception("Failed to write %d tracking records", len(batch))
+
+    def flush(self, timeout: float | None = 10.0) -> bool:
+        """
+        Attend que tout ce qui a été mis en file soit écrit.
+        """
+        if not self._writer.is_alive():
+            return self._queue.empty()
+        event = threading.Event()
+        self._queue.put(event)
+        return event.wait(timeout)
+
+    def close(self) -> None:
+        if self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join()
+
+    def __enter__(self) -> TrackingStore:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    # --- requêtes --------------------------------------------------------------
+
+    @contextmanager
+    def _read(self) -> Iterator[sqlite3.Connection]:
+        self.flush()
+        con = sqlite3.connect(self.path, timeout=30)
+        con.row_factory = sqlite3.Row
+        try:
+            yield con
+        finally:
+            con.close()
+
+    def _hydrate(self, con: sqlite3.Connection, rows: list[sqlite3.Row]) -> list[dict[str, Any]]:
+        runs = {row["run_id"]: dict(row) for row in rows}
+        if not runs:
+            return []
+        marks = ",".join("?" * len(runs))
+        for run in runs.values():
+            run["params"] = json.loads(run["params"])
+            run["metrics"], run["timings"] = {}, {}
+        for run_id, key, value in con.execute(
+            f"SELECT run_id, key, value FROM metrics WHERE run_id IN ({marks})", list(runs)
+        ):
+            runs[run_id]["metrics"][key] = value
+        for run_id, stage, seconds in con.execute(
+            f"SELECT run_id, stage, seconds FROM timings WHERE run_id IN ({marks})", list(runs)
+        ):
+            runs[run_id]["timings"][stage] = seconds
+
+        for run in runs.values():
+            end, start = run["ended_at"], run["started_at"]
+            run["duration_s"] = None if end is None else end - start
+            fit_s = run["timings"].get("fit")
+            run["rows_per_s"] = run["n_rows"] / fit_s if run["n_rows"] and fit_s else None
+        return list(runs.values())
+
+    def get_run(self, run_id: str) -> dict[str, Any] | None:
+        with self._read() as con:
+            rows = con.execute("SELECT * FROM runs WHERE run_id = ?", (run_id,)).fetchall()
+            runs = self._hydrate(con, rows)
+        return runs[0] if runs else None
+
+    def list_runs(
+        self,
+        name: str | None = None,
+        model_name: str | None = None,
+        parent_id: str | None = None,
+        dataset_hash: str | None = None,
+        status: str | None = None,
+        limit: int | None = 100,
+    ) -> list[dict[str, Any]]:
+        """
+        Runs les plus récents d'abord, avec params / métriques / timings / débit.
+        """
+        filters = {
+            "name": name,
+            "model_name": model_name,
+            "parent_id": parent_id,
+            "dataset_hash": dataset_hash,
+            "status": status,
+        }
+        where = [f"{col} = ?" for col, v in filters.items() if v is not None]
+        args: list[Any] = [v for v in filters.values() if v is not None]
+        sql = "SELECT * FROM runs"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY started_at DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            args.append(int(limit))
+        with self._read() as con:
+            return self._hydrate(con, con.execute(sql, args).fetchall())
+
+    def compare_runs(
+        self,
+        metric: str,
+        higher_is_better: bool = True,
+        **filters: Any,
+    ) -> list[dict[str, Any]]:
+        """
+        Runs triés du meilleur au moins bon selon `metric` (runs sans la métrique en dernier).
+        """
+        runs = self.list_runs(limit=None, **filters)
+        sign = -1.0 if higher_is_better else 1.0
+
+        def key(run: dict[str, Any]) -> tuple[bool, float]:
+            value = run["metrics"].get(metric)
+            return value is None, 0.0 if value is None else sign * value
+
+        return sorted(runs, key=key)
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from .domain import ClusteringBundle
+from .prediction_service import predict_one, predict_rows
+
+# Exécuteur de la prédiction batch (ex: lane du router) ; défaut = inline
+Runner = Callable[..., Awaitable[Any]]
+_Pending = list[tuple[dict[str, Any], asyncio.Future]]
+
+
+async def _run_inline(fn: Callable[..., Any], *args: Any) -> Any:
+    return fn(*args)
+
+
+class MicroBatcher:
+    """
+    Regroupe les prédictions unitaires concurrentes :
+    jusqu'à max_batch_size lignes ou max_wait_us microsecondes, puis une seule
+    prédiction vectorisée dont les résultats sont redistribués aux appelants.
+    """
+
+    def __init__(
+        self,
+        max_batch_size: int = 64,
+        max_wait_us: int = 500,
+        runner: Runner | None = None,
+    ) -> None:
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait_us = max(0, int(max_wait_us))
+        self._runner = runner or _run_inline
+        # bundle -> lignes en attente (un batch ne mélange jamais deux modèles)
+        self._pending: dict[int, tuple[ClusteringBundle, _Pending]] = {}
+        self._timers: dict[int, asyncio.TimerHandle] = {}
+        # références fortes vers les flushs en cours (sinon collectables par le GC)
+        self._tasks: set[asyncio.Task] = set()
+        # histogramme des tailles de batch : borne sup. (puissance de 2) -> nb de batchs
+        self._histogram: dict[int, int] = {}
+        self.batches = 0
+        self.rows = 0
+
+    async def submit(self, bundle: ClusteringBundle, features: dict[str, Any]) -> int:
+        loop = asyncio.get_running_loop()
+        fut: asyncio.Future = loop.create_future()
+        key = id(bundle)
+
+        _, items = self._pending.setdefault(key, (bundle, []))
+        items.append((features, fut))
+
+        if len(items) >= self.max_batch_size:
+            self._dispatch(key)
+        elif len(items) == 1:
+            self._timers[key] = loop.call_later(self.max_wait_us / 1e6, self._dispatch, key)
+
+        return await fut
+
+    def _dispatch(self, key: int) -> None:
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        entry = self._pending.pop(key, None)
+        if entry is not None:
+            task = asyncio.ensure_future(self._flush(*entry))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _flush(
+        self,
+        bundle: ClusteringBundle,
+        items: _Pending,
+    ) -> None:
+        rows = [features for features, _ in items]
+        self._record(len(rows))
+
+        try:
+            labels = await self._runner(predict_rows, bundle, rows)
+            results: list[Any] = [int(x) for x in labels]
+        except Exception:
+            # une ligne invalide ne doit pas faire échouer tout le batch
+            try:
+                results = await self._runner(_predict_each, bundle, rows)
+            except BaseException as e:
+                # runner indisponible (lane arrêtée, annulation) : aucun appelant ne reste bloqué
+                error = e if isinstance(e, Exception) else RuntimeError("Row batch cancelled.")
+                for _, fut in items:
+                    if not fut.done():
+                        fut.set_exception(error)
+                if not isinstance(e, Exception):
+                    raise
+                return
+
+        for (_, fut), res in zip(items, results, strict=True):
+            if fut.done():
+                continue
+            if isinstance(res, Exception):
+                fut.set_exception(res)
+            else:
+                fut.set_result(res)
+
+    def _record(self, size: int) -> None:
+        self.batches += 1
+        self.rows += size
+        bucket = 1 << (size - 1).bit_length()
+        self._histogram[bucket] = self._histogram.get(bucket, 0) + 1
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_us": self.max_wait_us,
+            "batches": self.batches,
+            "rows": self.rows,
+            "mean_batch_size": float(self.rows / self.batches) if self.batches else 0.0,
+            "batch_size_histogram": {
+                f"le_{b}": self._histogram[b] for b in sorted(self._histogram)
+            },
+        }
+
+
+def _predict_each(bundle: ClusteringBundle, rows: list[dict[str, Any]]) -> list[Any]:
+    results: list[Any] = []
+    for row in rows:
+        try:
+            results.append(predict_one(bundle, row))
+        except Exception as e:  # propagé à l'appelant concerné uniquement
+            results.append(e)
+    return results
+
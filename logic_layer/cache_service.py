@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import json
+import math
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Hashable, Mapping, Sequence
+from pathlib import Path
+from typing import Any, Protocol
+
+
+def cache_key(
+    version: str | None,
+    features: Mapping[str, Any],
+    columns: Sequence[str],
+    decimals: int = 6,
+) -> tuple[Any, ...]:
+    """
+    Clé normalisée : (version, valeurs dans l'ordre de `columns`).
+    Numériques arrondis à `decimals` (30 == 30.0), manquants -> None,
+    catégories telles quelles (le moteur est sensible à la casse).
+    """
+    key: list[Any] = [version]
+    for col in columns:
+        v = features.get(col)
+        if isinstance(v, bool) or not isinstance(v, int | float):
+            key.append(v)
+        elif math.isnan(v):
+            key.append(None)
+        else:
+            # + 0.0 : -0.0 et 0.0 donnent la même clé
+            key.append(round(float(v), decimals) + 0.0)
+    return tuple(key)
+
+
+class CacheBackend(Protocol):
+    """
+    Cache partagé entre workers (2e niveau, derrière le LRU en mémoire).
+    """
+
+    def get(self, key: Hashable) -> int | None: ...
+
+    def set(self, key: Hashable, value: int) -> None: ...
+
+
+class SqliteCacheBackend:
+    """
+    Cache partagé par fichier SQLite (tous les workers d'une machine).
+    Entrées expirées ignorées à la lecture et purgées périodiquement.
+    """
+
+    def __init__(self, path: str | Path, ttl_s: float = 300.0) -> None:
+        self.path = Path(path)
+        self.ttl_s = ttl_s
+        self._local = threading.local()
+        self._writes = 0
+        con = self._con()
+        con.execute(
+            "CREATE TABLE IF NOT EXISTS predictions ("
+            " key TEXT PRIMARY KEY, value INTEGER NOT NULL, expires REAL NOT NULL)"
+        )
+        con.commit()
+
+    def _con(self) -> sqlite3.Connection:
+        # une connexion par thread (lanes / threadpool)
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=OFF")
+            self._local.con = con
+        return con
+
+    @staticmethod
+    def _encode(key: Hashable) -> str:
+        return json.dumps(key, separators=(",", ":"))
+
+    def get(self, key: Hashable) -> int | None:
+        try:
+            row = self._con().execute(
+                "SELECT value FROM predictions WHERE key = ? AND expires > ?",
+                (self._encode(key), time.time()),
+            ).fetchone()
+        except sqlite3.Error:
+            return None  # cache indisponible : on recalcule
+        return None if row is None else int(row[0])
+
+    def set(self, key: Hashable, value: int) -> None:
+        now = time.time()
+        try:
+            con = self._con()
+            con.execute(
+                "INSERT OR REPLACE INTO predictions (key, value, expires) VALUES (?, ?, ?)",
+                (self._encode(key), int(value), now + self.ttl_s),
+            )
+            self._writes += 1
+            if self._writes % 1000 == 0:
+                con.execute("DELETE FROM predictions WHERE expires <= ?", (now,))
+        except sqlite3.Error:
+            pass
+
+
+class PredictionCache:
+    """
+    LRU + TTL en mémoire devant la prédiction unitaire, avec un backend partagé
+    optionnel (consulté sur miss local). Thread-safe ; compteurs hits / misses /
+    évictions / expirations exposés par stats().
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 10_000,
+        ttl_s: float = 300.0,
+        backend: CacheBackend | None = None,
+    ) -> None:
+        self.maxsize = max(1, int(maxsize))
+        self.ttl_s = ttl_s
+        self.backend = backend
+        self._data: OrderedDict[Hashable, tuple[int, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable) -> int | None:
+        value = self.get_local(key)
+        if value is None and self.backend is not None:
+            value = self.get_shared(key)
+        return value
+
+    def get_local(self, key: Hashable) -> int | None:
+        """
+        Niveau mémoire seul (sans I/O) : appelable depuis la boucle asyncio.
+        """
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                if item[1] > now:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return item[0]
+                del self._data[key]
+                self.expirations += 1
+            if self.backend is None:
+                self.misses += 1
+        return None
+
+    def get_shared(self, key: Hashable) -> int | None:
+        """
+        Backend partagé (I/O bloquante, à appeler hors de la boucle) ; un hit est recopié en local.
+        """
+        value = self.backend.get(key) if self.backend is not None else None
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.shared_hits += 1
+        self._store(key, value)
+        return value
+
+    def put(self, key: Hashable, value: int) -> None:
+        self.put_local(key, value)
+        self.put_shared(key, value)
+
+    def put_local(self, key: Hashable, value: int) -> None:
+        self._store(key, value)
+
+    def put_shared(self, key: Hashable, value: int) -> None:
+        if self.backend is not None:
+            self.backend.set(key, value)
+
+    def _store(self, key: Hashable, value: int) -> None:
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl_s)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """
+        Vide le niveau local (nouveau bundle servi). Le backend partagé est
+        indexé par version : ses entrées d'une ancienne version ne sont plus lues.
+        """
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_s": self.ttl_s,
+                "shared": self.backend is not None,
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_ratio": (self.hits + self.shared_hits) / lookups if lookups else 0.0,
+            }
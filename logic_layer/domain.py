@@ -1,18 +1,24 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Any
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
 
-from sklearn.pipeline import Pipeline
+from .inference_engine import InferenceEngine
+
+if TYPE_CHECKING:
+    from sklearn.pipeline import Pipeline
 
 
 @dataclass(frozen=True)
 class ClusteringBundle:
-    pipeline: Pipeline
+    # None en mode inference-only (seul le moteur NumPy est chargé)
+    pipeline: Pipeline | None
     expected_columns: list[str]
     params: dict[str, Any]
     metrics: dict[str, float]
     model_name: str = "kmeans"
+    # Moteur NumPy extrait du pipeline (None -> fallback sklearn)
+    engine: InferenceEngine | None = field(default=None, repr=False, compare=False)
 
     @property
     def metadata(self) -> dict[str, Any]:
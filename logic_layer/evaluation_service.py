@@ -1,18 +1,297 @@
+from __future__ import annotations
+
+from typing import Any
 
 import numpy as np
-from sklearn.metrics import calinski_harabasz_score, davies_bouldin_score, silhouette_score
 
+# Au-delà : silhouette estimée sur un échantillon stratifié (l'exact est O(n²) en temps)
+EXACT_SILHOUETTE_MAX_ROWS = 20_000
+SILHOUETTE_SAMPLE_SIZE = 5_000
+# Budget mémoire d'un bloc de la matrice de distances (lignes par bloc = budget / n)
+SILHOUETTE_WORKING_MEMORY_MB = 64
+_Z_95 = 1.959963984540054
+
+
+def combine_moments(
+    n_a: Any, mean_a: Any, m2_a: Any, n_b: Any, mean_b: Any, m2_b: Any
+) -> tuple[Any, Any, Any]:
+    """
+    Fusion parallèle de Welford (Chan et al.) : (effectif, moyenne, M2) de A ∪ B.
+    Scalaires ou tableaux par cluster ; moyennes vectorielles (k, d) : M2 somme sur les d features.
+    """
+    n = n_a + n_b
+    frac = np.divide(n_b, n, out=np.zeros(np.shape(n)), where=np.asarray(n) > 0)
+    delta = np.asarray(mean_b, dtype=np.float64) - mean_a
+    sq = delta**2
+    if delta.ndim > frac.ndim:
+        sq = sq.sum(axis=-1)
+        frac_mean = frac[..., None]
+    else:
+        frac_mean = frac
+    return n, mean_a + delta * frac_mean, m2_a + m2_b + sq * n_a * frac
+
+
+class ClusterStats:
+    """
+    Statistiques suffisantes par cluster, accumulées en une passe par blocs
+    (fusionnables) : effectif, moyenne et dispersion intra (combinaison de Chan),
+    distance moyenne aux centres de référence.
+    Suffisent pour Calinski–Harabasz et Davies–Bouldin sans garder les lignes.
+    """
+
+    def __init__(self, n_clusters: int, n_features: int, centers: np.ndarray | None = None) -> None:
+        self.n_clusters = int(n_clusters)
+        self.counts = np.zeros(self.n_clusters, dtype=np.int64)
+        self.means = np.zeros((self.n_clusters, n_features), dtype=np.float64)
+        self.m2 = np.zeros(self.n_clusters, dtype=np.float64)  # somme des ||x - moyenne||²
+        # Davies–Bouldin : distances aux centres (ceux du modèle ; = moyennes à la convergence)
+        self.centers = None if centers is None else np.asarray(centers, dtype=np.float64)
+        self.dist_sums = np.zeros(self.n_clusters, dtype=np.float64)
+
+    def update(self, X: np.ndarray, labels: np.ndarray) -> ClusterStats:
+        X = np.asarray(X, dtype=np.float64)
+        labels = np.asarray(labels, dtype=np.int64)
+        if not len(X):
+            return self
+
+        counts = np.bincount(labels, minlength=self.n_clusters)
+        sums = np.zeros_like(self.means)
+        np.add.at(sums, labels, X)
+        present = counts > 0
+        means = np.zeros_like(self.means)
+        means[present] = sums[present] / counts[present, None]
+        m2 = np.bincount(
+            labels, weights=((X - means[labels]) ** 2).sum(axis=1), minlength=self.n_clusters
+        )
+        self._combine(counts, means, m2)
+
+        if self.centers is not None:
+            d = np.sqrt(((X - self.centers[labels]) ** 2).sum(axis=1))
+            self.dist_sums += np.bincount(labels, weights=d, minlength=self.n_clusters)
+        return self
+
+    def merge(self, other: ClusterStats) -> ClusterStats:
+        self._combine(other.counts, other.means, other.m2)
+        self.dist_sums += other.dist_sums
+        return self
+
+    def _combine(self, counts: np.ndarray, means: np.ndarray, m2: np.ndarray) -> None:
+        self.counts, self.means, self.m2 = combine_moments(
+            self.counts, self.means, self.m2, counts, means, m2
+        )
+
+    def calinski_harabasz(self) -> float:
+        present = self.counts > 0
+        k, n = int(present.sum()), int(self.counts.sum())
+        if k < 2 or n <= k:
+            return float("nan")
+        counts, means = self.counts[present], self.means[present]
+        overall = (counts[:, None] * means).sum(axis=0) / n
+        between = float((counts * ((means - overall) ** 2).sum(axis=1)).sum())
+        within = float(self.m2[present].sum())
+        if within == 0.0:
+            return 1.0
+        return between * (n - k) / (within * (k - 1))
+
+    def davies_bouldin(self) -> float:
+        present = self.counts > 0
+        if int(present.sum()) < 2:
+            return float("nan")
+        if self.centers is None:
+            raise ValueError("Davies-Bouldin requires reference centers")
+        counts = self.counts[present]
+        centroids = self.centers[present]
+        scatter = self.dist_sums[present] / counts
+        sep = np.sqrt(((centroids[:, None, :] - centroids[None, :, :]) ** 2).sum(axis=2))
+        if np.allclose(scatter, 0) or np.allclose(sep, 0):
+            return 0.0
+        sep[sep == 0] = np.inf
+        ratio = (scatter[:, None] + scatter[None, :]) / sep
+        return float(ratio.max(axis=1).mean())
+
+
+def _silhouette_rows(
+    X: np.ndarray,
+    labels: np.ndarray,
+    rows: np.ndarray,
+    working_memory_mb: int = SILHOUETTE_WORKING_MEMORY_MB,
+) -> np.ndarray:
+    """
+    Silhouette exacte s(i) des lignes `rows`, calculée contre TOUTES les lignes
+    de X par blocs : mémoire bornée par `working_memory_mb` au lieu de O(n²).
+    """
+    # ~3 matrices (bloc x n) float64 vivantes à la fois
+    chunk_rows = max(1, (working_memory_mb << 20) // (3 * 8 * max(1, len(X))))
+    n_clusters = int(labels.max()) + 1
+    counts = np.bincount(labels, minlength=n_clusters).astype(np.float64)
+    onehot = np.zeros((len(X), n_clusters), dtype=np.float64)
+    onehot[np.arange(len(X)), labels] = 1.0
+    sq = np.einsum("ij,ij->i", X, X)
+
+    out = np.empty(len(rows), dtype=np.float64)
+    for start in range(0, len(rows), chunk_rows):
+        idx = rows[start:start + chunk_rows]
+        d2 = sq[idx, None] + sq[None, :] - 2.0 * (X[idx] @ X.T)
+        np.maximum(d2, 0.0, out=d2)
+        d2[np.arange(len(idx)), idx] = 0.0  # distance à soi-même exactement nulle
+        sums = np.sqrt(d2) @ onehot  # (bloc, k) : somme des distances vers chaque cluster
+
+        own = labels[idx]
+        n_own = counts[own]
+        a = sums[np.arange(len(idx)), own] / np.maximum(n_own - 1, 1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            means = sums / counts
+        means[np.arange(len(idx)), own] = np.inf
+        b = means.min(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            s = (b - a) / np.maximum(a, b)
+        # convention sklearn : cluster singleton -> 0
+        out[start:start + len(idx)] = np.where(n_own > 1, np.nan_to_num(s), 0.0)
+    return out
+
+
+def silhouette_exact(
+    X: np.ndarray, labels: np.ndarray, working_memory_mb: int = SILHOUETTE_WORKING_MEMORY_MB
+) -> float:
+    """
+    Silhouette moyenne exacte (identique à sklearn.metrics.silhouette_score),
+    mémoire bornée par `working_memory_mb`.
+    """
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    _, labels = np.unique(labels, return_inverse=True)
+    return float(_silhouette_rows(X, labels, np.arange(len(X)), working_memory_mb).mean())
 
-def clustering_metrics(X: np.ndarray, labels: np.ndarray) -> dict[str, float]:
-    if len(set(labels)) < 2:
+
+def _with_ci(mean: float, var: float, size: int, z: float) -> dict[str, Any]:
+    half = z * float(np.sqrt(max(var, 0.0)))
+    mean = float(mean)
+    return {
+        "silhouette": mean,
+        "silhouette_ci_low": mean - half,
+        "silhouette_ci_high": mean + half,
+        "silhouette_sample_size": size,
+    }
+
+
+def _stratified_sample(
+    labels: np.ndarray, sample_size: int, rng: np.random.Generator, min_per_cluster: int = 30
+) -> list[np.ndarray]:
+    """
+    Allocation proportionnelle à la taille des clusters, avec un plancher par
+    cluster (petits clusters représentés) ; indices par cluster.
+    """
+    n_clusters = int(labels.max()) + 1
+    counts = np.bincount(labels, minlength=n_clusters)
+    alloc = np.round(sample_size * counts / counts.sum()).astype(np.int64)
+    alloc = np.minimum(np.maximum(alloc, min_per_cluster), counts)
+    return [
+        rng.choice(np.flatnonzero(labels == h), size=int(m), replace=False)
+        for h, m in enumerate(alloc)
+    ]
+
+
+def silhouette_sampled(
+    X: np.ndarray,
+    labels: np.ndarray,
+    sample_size: int = SILHOUETTE_SAMPLE_SIZE,
+    random_state: int | None = 0,
+    working_memory_mb: int = SILHOUETTE_WORKING_MEMORY_MB,
+    confidence_z: float = _Z_95,
+) -> dict[str, Any]:
+    """
+    Silhouette estimée par échantillonnage stratifié par cluster : s(i) exact pour
+    les lignes tirées (contre tout X, O(sample_size x n)), moyenne pondérée par
+    strate et intervalle de confiance (variance stratifiée, correction de
+    population finie). Coût linéaire en n.
+    """
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    _, labels = np.unique(labels, return_inverse=True)
+    rng = np.random.default_rng(random_state)
+    strata = _stratified_sample(labels, sample_size, rng)
+
+    rows = np.concatenate(strata)
+    values = _silhouette_rows(X, labels, rows, working_memory_mb)
+
+    sizes = np.bincount(labels)
+    mean, var, start = 0.0, 0.0, 0
+    for idx, size in zip(strata, sizes, strict=True):
+        m = len(idx)
+        s = values[start:start + m]
+        start += m
+        w = size / len(X)
+        mean += w * float(s.mean())
+        if m > 1:
+            var += w * w * (1.0 - m / size) * float(s.var(ddof=1)) / m
+
+    return _with_ci(mean, var, len(rows), confidence_z)
+
+
+def streaming_metrics(
+    stats: ClusterStats,
+    sample: np.ndarray,
+    sample_labels: np.ndarray,
+    confidence_z: float = _Z_95,
+) -> dict[str, Any]:
+    """
+    Métriques d'un entraînement out-of-core : DB / CH depuis les statistiques
+    accumulées sur tout le dataset, silhouette sur un échantillon uniforme
+    (réservoir) avec intervalle de confiance (erreur type de la moyenne des s(i)).
+    """
+    metrics: dict[str, Any] = {"silhouette": float("nan")}
+    sample = np.ascontiguousarray(sample, dtype=np.float64)
+    _, labels = np.unique(np.asarray(sample_labels), return_inverse=True)
+    if len(sample) > 1 and labels.max() > 0:
+        values = _silhouette_rows(sample, labels, np.arange(len(sample)))
+        metrics = _with_ci(
+            float(values.mean()), float(values.var(ddof=1)) / len(values), len(values), confidence_z
+        )
+    metrics["davies_bouldin"] = stats.davies_bouldin()
+    metrics["calinski_harabasz"] = stats.calinski_harabasz()
+    return metrics
+
+
+def clustering_metrics(
+    X: np.ndarray,
+    labels: np.ndarray,
+    centers: np.ndarray | None = None,
+    silhouette_sample: int | None = None,
+    exact_max_rows: int = EXACT_SILHOUETTE_MAX_ROWS,
+    random_state: int | None = 0,
+) -> dict[str, Any]:
+    """
+    Silhouette / Davies–Bouldin / Calinski–Harabasz.
+    - DB et CH : une passe sur les statistiques par cluster (centres = moyennes
+      des clusters si `centers` n'est pas fourni -> identiques à sklearn)
+    - silhouette exacte par blocs jusqu'à `exact_max_rows` lignes, sinon estimée
+      sur `silhouette_sample` lignes (stratifié) avec intervalle de confiance à 95 %
+    """
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    present, labels = np.unique(np.asarray(labels), return_inverse=True)
+    n_clusters = len(present)
+
+    if n_clusters < 2:
         return {
             "silhouette": float("nan"),
             "davies_bouldin": float("nan"),
             "calinski_harabasz": float("nan"),
         }
 
-    return {
-        "silhouette": float(silhouette_score(X, labels)),
-        "davies_bouldin": float(davies_bouldin_score(X, labels)),
-        "calinski_harabasz": float(calinski_harabasz_score(X, labels)),
-    }
+    stats = ClusterStats(n_clusters, X.shape[1]).update(X, labels)
+    # centres fournis (modèle) indexés par label d'origine -> restreints aux clusters présents
+    stats.centers = stats.means.copy() if centers is None else np.asarray(centers, np.float64)[present]
+    stats.dist_sums[:] = np.bincount(
+        labels,
+        weights=np.sqrt(((X - stats.centers[labels]) ** 2).sum(axis=1)),
+        minlength=n_clusters,
+    )
+
+    if silhouette_sample is None and len(X) <= exact_max_rows:
+        metrics: dict[str, Any] = {"silhouette": silhouette_exact(X, labels)}
+    else:
+        metrics = silhouette_sampled(
+            X, labels, silhouette_sample or SILHOUETTE_SAMPLE_SIZE, random_state=random_state
+        )
+
+    metrics["davies_bouldin"] = stats.davies_bouldin()
+    metrics["calinski_harabasz"] = stats.calinski_harabasz()
+    return metrics
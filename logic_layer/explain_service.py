@@ -1,12 +1,19 @@
 from __future__ import annotations
 
+from collections.abc import Iterable
 from dataclasses import dataclass
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
-import pandas as pd
+import numpy as np
 
 from .domain import ClusteringBundle
-from .preprocessing import prepare_features
+from .evaluation_service import combine_moments
+from .metrics_service import stage
+from .prediction_service import predict_labels
+from .preprocessing import validate_input_df
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 @dataclass(frozen=True)
@@ -18,6 +25,9 @@ class ClusterProfile:
     mean_income: float
     mean_spending: float
     label: str
+    std_age: float | None = None
+    std_income: float | None = None
+    std_spending: float | None = None
 
 
 def _bucket(value: float, q_low: float, q_high: float) -> str:
@@ -37,77 +47,275 @@ def _make_label(age_b: str, inc_b: str, spend_b: str) -> str:
     return " / ".join(parts)
 
 
+# Clé du résumé -> colonne source
+PROFILE_COLUMNS: dict[str, str] = {
+    "age": "Age",
+    "income": "Annual Income (k$)",
+    "spending": "Spending Score (1-100)",
+}
+_QUANTILES = (0.33, 0.66)
+
+
+class QuantileSketch:
+    """
+    Sketch de quantiles KLL (Karnin-Lang-Liberty), mergeable.
+    - exact tant que n <= k (aucune compaction)
+    - au-delà, erreur de rang ~ O(1/k), mémoire ~ 3k valeurs
+    """
+
+    _C = 2.0 / 3.0
+
+    def __init__(self, k: int = 4096, seed: int = 0) -> None:
+        self.k = int(k)
+        self.n = 0
+        self.levels: list[np.ndarray] = [np.empty(0, dtype=np.float64)]
+        self._rng = np.random.default_rng(seed)
+
+    @property
+    def is_exact(self) -> bool:
+        return len(self.levels) == 1
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - 1 - level
+        return max(2, int(np.ceil(self.k * self._C**depth)))
+
+    def _compress(self) -> None:
+        h = 0
+        while h < len(self.levels):
+            items = self.levels[h]
+            if len(items) > self._capacity(h):
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0, dtype=np.float64))
+                items = np.sort(items)
+                # nombre impair : le plus grand élément reste à ce niveau
+                keep = items[-1:] if len(items) % 2 else items[:0]
+                pairs = items[: len(items) - len(keep)]
+                promoted = pairs[int(self._rng.integers(2))::2]
+                self.levels[h] = keep.copy()
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+            h += 1
+
+    def update(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) == 0:
+            return
+        self.n += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def merge(self, other: QuantileSketch) -> None:
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0, dtype=np.float64))
+        for h, items in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], items])
+        self.n += other.n
+        self._compress()
+
+    def quantiles(self, qs: tuple[float, ...]) -> list[float]:
+        if self.n == 0:
+            return [float("nan")] * len(qs)
+        if self.is_exact:
+            # interpolation linéaire, comme pandas.Series.quantile
+            return [float(v) for v in np.quantile(self.levels[0], qs)]
+
+        items = np.concatenate(self.levels)
+        weights = np.concatenate(
+            [np.full(len(lvl), 2.0**h) for h, lvl in enumerate(self.levels)]
+        )
+        order = np.argsort(items, kind="stable")
+        items, cum = items[order], np.cumsum(weights[order])
+        ranks = np.asarray(qs) * cum[-1]
+        idx = np.minimum(np.searchsorted(cum, ranks, side="left"), len(items) - 1)
+        return [float(v) for v in items[idx]]
+
+
+class ProfileAccumulator:
+    """
+    Profilage en streaming, mergeable entre workers :
+    - count + moyenne / variance de Welford par cluster et par feature
+    - sketch KLL par feature pour les quantiles globaux (Low/Mid/High)
+    update(chunk, labels) -> merge(other) -> finalize()
+    """
+
+    def __init__(self, quantile_k: int = 4096, seed: int = 0) -> None:
+        self.n_rows = 0
+        self.counts = np.zeros(0, dtype=np.int64)
+        # par colonne de profil : nb de valeurs non manquantes, moyenne, M2 (Welford)
+        self.non_null = {k: np.zeros(0, dtype=np.int64) for k in PROFILE_COLUMNS}
+        self.means = {k: np.zeros(0, dtype=np.float64) for k in PROFILE_COLUMNS}
+        self.m2 = {k: np.zeros(0, dtype=np.float64) for k in PROFILE_COLUMNS}
+        self.sketches = {
+            k: QuantileSketch(quantile_k, seed=seed + i) for i, k in enumerate(PROFILE_COLUMNS)
+        }
+
+    def _grow(self, n_clusters: int) -> None:
+        pad = n_clusters - len(self.counts)
+        if pad <= 0:
+            return
+        self.counts = np.concatenate([self.counts, np.zeros(pad, dtype=np.int64)])
+        for k in PROFILE_COLUMNS:
+            self.non_null[k] = np.concatenate([self.non_null[k], np.zeros(pad, dtype=np.int64)])
+            self.means[k] = np.concatenate([self.means[k], np.zeros(pad)])
+            self.m2[k] = np.concatenate([self.m2[k], np.zeros(pad)])
+
+    def _combine(self, key: str, n_b: np.ndarray, mean_b: np.ndarray, m2_b: np.ndarray) -> None:
+        self.non_null[key], self.means[key], self.m2[key] = combine_moments(
+            self.non_null[key], self.means[key], self.m2[key], n_b, mean_b, m2_b
+        )
+
+    @stage("profile")
+    def update(self, chunk: Any, labels: np.ndarray) -> None:
+        """
+        chunk : DataFrame (ou dict de colonnes) aligné avec labels.
+        """
+        labels = np.asarray(labels, dtype=np.intp)
+        if len(labels) == 0:
+            return
+
+        k = max(len(self.counts), int(labels.max()) + 1)
+        self._grow(k)
+        self.n_rows += len(labels)
+        self.counts += np.bincount(labels, minlength=k)
+
+        for key, col in PROFILE_COLUMNS.items():
+            values = np.asarray(chunk[col], dtype=np.float64)
+            ok = ~np.isnan(values)
+            lab, val = labels[ok], values[ok]
+
+            n_b = np.bincount(lab, minlength=k)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                mean_b = np.nan_to_num(np.bincount(lab, weights=val, minlength=k) / n_b)
+            m2_b = np.bincount(lab, weights=(val - mean_b[lab]) ** 2, minlength=k)
+            self._combine(key, n_b, mean_b, m2_b)
+            self.sketches[key].update(val)
+
+    def merge(self, other: ProfileAccumulator) -> ProfileAccumulator:
+        """
+        Fusionne un accumulateur calculé ailleurs (autre bloc, autre worker).
+        """
+        self._grow(len(other.counts))
+        k = len(self.counts)
+        pad = k - len(other.counts)
+        self.n_rows += other.n_rows
+        self.counts += np.pad(other.counts, (0, pad))
+        for key in PROFILE_COLUMNS:
+            self._combine(
+                key,
+                np.pad(other.non_null[key], (0, pad)),
+                np.pad(other.means[key], (0, pad)),
+                np.pad(other.m2[key], (0, pad)),
+            )
+            self.sketches[key].merge(other.sketches[key])
+        return self
+
+    def cluster_counts(self) -> dict[str, int]:
+        return {str(cid): int(c) for cid, c in enumerate(self.counts) if c}
+
+    @stage("profile")
+    def finalize(self) -> dict[str, Any]:
+        """
+        Même structure que profile_clusters().
+        """
+        n = self.n_rows
+        if n == 0:
+            return {"n_rows": 0, "profiles": [], "warnings": ["Empty dataset"]}
+
+        quantiles = {k: self.sketches[k].quantiles(_QUANTILES) for k in PROFILE_COLUMNS}
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = {k: np.where(self.non_null[k] > 0, self.means[k], np.nan) for k in PROFILE_COLUMNS}
+            # écart-type échantillon (ddof=1), comme pandas
+            stds = {k: np.sqrt(self.m2[k] / (self.non_null[k] - 1)) for k in PROFILE_COLUMNS}
+
+        profiles: list[ClusterProfile] = []
+        for cid in np.flatnonzero(self.counts):
+            mean_age = float(means["age"][cid])
+            mean_income = float(means["income"][cid])
+            mean_spending = float(means["spending"][cid])
+
+            age_b = _bucket(mean_age, *quantiles["age"])
+            inc_b = _bucket(mean_income, *quantiles["income"])
+            spend_b = _bucket(mean_spending, *quantiles["spending"])
+
+            size = int(self.counts[cid])
+            profiles.append(
+                ClusterProfile(
+                    cluster_id=int(cid),
+                    size=size,
+                    pct=float(size / n),
+                    mean_age=mean_age,
+                    mean_income=mean_income,
+                    mean_spending=mean_spending,
+                    label=_make_label(age_b, inc_b, spend_b),
+                    std_age=_finite_or_none(stds["age"][cid]),
+                    std_income=_finite_or_none(stds["income"][cid]),
+                    std_spending=_finite_or_none(stds["spending"][cid]),
+                )
+            )
+
+        # Trier par taille décroissante (utile pour UI)
+        profiles.sort(key=lambda p: p.size, reverse=True)
+
+        warnings = []
+        if not all(s.is_exact for s in self.sketches.values()):
+            warnings.append("Global quantiles estimated with a KLL sketch")
+
+        return {
+            "n_rows": n,
+            "profiles": [p.__dict__ for p in profiles],
+            "global_quantiles": {
+                k: {"q33": q[0], "q66": q[1]} for k, q in quantiles.items()
+            },
+            "warnings": warnings,
+        }
+
+
+def _finite_or_none(value: float) -> float | None:
+    return float(value) if np.isfinite(value) else None
+
+
 def profile_clusters(
     bundle: ClusteringBundle,
     df_raw: pd.DataFrame,
-    cluster_col: str = "cluster_id",
+    labels: np.ndarray | None = None,
 ) -> dict[str, Any]:
     """
     Retourne un résumé métier des segments :
     - counts / pourcentages
     - stats moyennes par cluster
     - labels heuristiques (Low/Mid/High) basés sur quantiles globaux
+    `labels` : clusters déjà prédits (évite une seconde prédiction).
+    Une seule passe vectorisée (bincount), sans groupby.
     """
-    X_df = prepare_features(df_raw, bundle.expected_columns)
-
-    clusters = bundle.pipeline.predict(X_df)
-    df = X_df.copy()
-    df[cluster_col] = clusters
-
-    n = len(df)
-    if n == 0:
-        return {"n_rows": 0, "profiles": [], "warnings": ["Empty dataset"]}
-
-    # Quantiles globaux pour catégoriser Low/Mid/High
-    q_age_low, q_age_high = df["Age"].quantile([0.33, 0.66]).tolist()
-    q_inc_low, q_inc_high = df["Annual Income (k$)"].quantile([0.33, 0.66]).tolist()
-    q_sp_low, q_sp_high = df["Spending Score (1-100)"].quantile([0.33, 0.66]).tolist()
-
-    grp = df.groupby(cluster_col, as_index=False).agg(
-        size=("Age", "count"),
-        mean_age=("Age", "mean"),
-        mean_income=("Annual Income (k$)", "mean"),
-        mean_spending=("Spending Score (1-100)", "mean"),
-    )
-
-    profiles: list[ClusterProfile] = []
-    for _, row in grp.iterrows():
-        cid = int(row[cluster_col])
-        size = int(row["size"])
-        pct = float(size / n)
-
-        mean_age = float(row["mean_age"])
-        mean_income = float(row["mean_income"])
-        mean_spending = float(row["mean_spending"])
-
-        age_b = _bucket(mean_age, q_age_low, q_age_high)
-        inc_b = _bucket(mean_income, q_inc_low, q_inc_high)
-        spend_b = _bucket(mean_spending, q_sp_low, q_sp_high)
-
-        label = _make_label(age_b, inc_b, spend_b)
-
-        profiles.append(
-            ClusterProfile(
-                cluster_id=cid,
-                size=size,
-                pct=pct,
-                mean_age=mean_age,
-                mean_income=mean_income,
-                mean_spending=mean_spending,
-                label=label,
-            )
-        )
+    if labels is None:
+        labels = predict_labels(bundle, df_raw)
+    else:
+        validate_input_df(df_raw, bundle.expected_columns)
+        if len(labels) != len(df_raw):
+            raise ValueError(f"Expected {len(df_raw)} labels, got {len(labels)}")
+
+    # sketch dimensionné sur le dataset complet -> quantiles exacts
+    acc = ProfileAccumulator(quantile_k=max(len(labels), 1))
+    acc.update(df_raw, labels)
+    return acc.finalize()
 
-    # Trier par taille décroissante (utile pour UI)
-    profiles.sort(key=lambda p: p.size, reverse=True)
-
-    return {
-        "n_rows": n,
-        "profiles": [p.__dict__ for p in profiles],
-        "global_quantiles": {
-            "age": {"q33": float(q_age_low), "q66": float(q_age_high)},
-            "income": {"q33": float(q_inc_low), "q66": float(q_inc_high)},
-            "spending": {"q33": float(q_sp_low), "q66": float(q_sp_high)},
-        },
-        "warnings": [],
-    }
+
+def predict_and_profile(
+    bundle: ClusteringBundle,
+    df_raw: pd.DataFrame,
+) -> tuple[np.ndarray, dict[str, Any]]:
+    """
+    Prédiction + profils en une seule inférence.
+    """
+    labels = predict_labels(bundle, df_raw)
+    return labels, profile_clusters(bundle, df_raw, labels=labels)
+
+
+def profile_chunks(bundle: ClusteringBundle, chunks: Iterable[pd.DataFrame]) -> dict[str, Any]:
+    """
+    profile_clusters() en streaming (dataset trop gros pour la mémoire) :
+    quantiles globaux estimés par sketch au-delà de `quantile_k` valeurs.
+    """
+    acc = ProfileAccumulator()
+    for chunk in chunks:
+        acc.update(chunk, predict_labels(bundle, chunk))
+    return acc.finalize()
@@ -0,0 +1,395 @@
+from __future__ import annotations
+
+import json
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+
+# Nombre de lignes traitées par passe vectorisée (borne la mémoire de travail)
+DEFAULT_CHUNK_SIZE = 65_536
+
+
+@dataclass(frozen=True)
+class InferenceEngine:
+    """
+    Version "compilée" du pipeline sklearn (preprocess + KMeans).
+    Tous les paramètres appris sont stockés en tableaux NumPy plats :
+    - médianes d'imputation, moyennes / écarts-types du scaler
+    - mapping catégorie -> colonne one-hot (-1 = catégorie supprimée par drop)
+    - matrice des centroïdes
+    """
+
+    columns: tuple[str, ...]
+    numeric_columns: tuple[str, ...]
+    numeric_index: np.ndarray
+    numeric_fill: np.ndarray
+    numeric_mean: np.ndarray
+    numeric_scale: np.ndarray
+    categorical_columns: tuple[str, ...]
+    categorical_fill: tuple[Any, ...]
+    categorical_maps: tuple[dict[Any, int], ...]
+    centroids: np.ndarray
+    centroid_sq_norms: np.ndarray
+
+    @property
+    def n_clusters(self) -> int:
+        return int(self.centroids.shape[0])
+
+    @property
+    def n_features_out(self) -> int:
+        return int(self.centroids.shape[1])
+
+    # Tableaux exportés tels quels (le reste est décrit dans la spec JSON)
+    _ARRAY_FIELDS = (
+        "numeric_index",
+        "numeric_fill",
+        "numeric_mean",
+        "numeric_scale",
+        "centroids",
+        "centroid_sq_norms",
+    )
+
+    def to_arrays(self) -> dict[str, np.ndarray]:
+        """
+        Export sans pickle : tableaux NumPy + spec JSON (colonnes, catégories).
+        """
+        spec = {
+            "columns": list(self.columns),
+            "numeric_columns": list(self.numeric_columns),
+            "categorical_columns": list(self.categorical_columns),
+            "categorical_fill": [_json_scalar(v) for v in self.categorical_fill],
+            "categorical_maps": [
+                [[_json_scalar(cat), int(pos)] for cat, pos in m.items()]
+                for m in self.categorical_maps
+            ],
+        }
+        arrays = {name: getattr(self, name) for name in self._ARRAY_FIELDS}
+        arrays["spec"] = np.array(json.dumps(spec))
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays: Mapping[str, np.ndarray]) -> InferenceEngine:
+        """
+        Inverse de to_arrays() : aucun import sklearn nécessaire.
+        """
+        missing = [k for k in (*cls._ARRAY_FIELDS, "spec") if k not in arrays]
+        if missing:
+            raise ValueError(f"Invalid engine export, missing arrays: {missing}")
+
+        spec = json.loads(str(arrays["spec"]))
+        return cls(
+            columns=tuple(spec["columns"]),
+            numeric_columns=tuple(spec["numeric_columns"]),
+            categorical_columns=tuple(spec["categorical_columns"]),
+            categorical_fill=tuple(spec["categorical_fill"]),
+            categorical_maps=tuple(
+                {cat: pos for cat, pos in pairs} for pairs in spec["categorical_maps"]
+            ),
+            **{name: arrays[name] for name in cls._ARRAY_FIELDS},
+        )
+
+    def _as_mapping(self, features: Mapping[str, Any] | Sequence[Any]) -> Mapping[str, Any]:
+        if isinstance(features, Mapping):
+            missing = [c for c in self.columns if c not in features]
+            if missing:
+                raise ValueError(f"Missing required columns: {missing}")
+            return features
+
+        if len(features) != len(self.columns):
+            raise ValueError(
+                f"Expected {len(self.columns)} values ({list(self.columns)}), got {len(features)}"
+            )
+        return dict(zip(self.columns, features, strict=True))
+
+    def transform_one(self, features: Mapping[str, Any] | Sequence[Any]) -> np.ndarray:
+        """
+        Encode une ligne (dict ou tuple dans l'ordre de `columns`) dans l'espace du modèle.
+        """
+        row = self._as_mapping(features)
+        x = np.zeros(self.n_features_out, dtype=np.float64)
+
+        values = np.empty(len(self.numeric_columns), dtype=np.float64)
+        for i, col in enumerate(self.numeric_columns):
+            v = row[col]
+            values[i] = np.nan if v is None else float(v)
+        values = np.where(np.isnan(values), self.numeric_fill, values)
+        x[self.numeric_index] = (values - self.numeric_mean) / self.numeric_scale
+
+        for col, fill, mapping in zip(
+            self.categorical_columns, self.categorical_fill, self.categorical_maps, strict=True
+        ):
+            v = row[col]
+            if _is_missing(v):
+                v = fill
+            pos = mapping.get(v, -1)
+            # catégorie inconnue ou supprimée (drop="if_binary") -> vecteur nul
+            if pos >= 0:
+                x[pos] = 1.0
+
+        return x
+
+    def predict_one(self, features: Mapping[str, Any] | Sequence[Any]) -> int:
+        x = self.transform_one(features)
+        # même formulation que KMeans.predict : ||c||² - 2 x.c
+        return int(np.argmin(self.centroid_sq_norms - 2.0 * (self.centroids @ x)))
+
+    def column_arrays(self, columns: Any) -> tuple[list[np.ndarray], list[np.ndarray]]:
+        """
+        Valide et extrait les colonnes (numériques, catégorielles) sans copie inutile.
+        """
+        missing = [c for c in self.columns if c not in columns]
+        if missing:
+            raise ValueError(f"Missing required columns: {missing}")
+
+        numeric = [_as_numeric_array(columns[c], c) for c in self.numeric_columns]
+        categorical = [_as_object_array(columns[c]) for c in self.categorical_columns]
+
+        lengths = {len(a) for a in numeric + categorical}
+        if len(lengths) > 1:
+            raise ValueError(f"Columns must have the same length, got {sorted(lengths)}")
+        return numeric, categorical
+
+    def encode_categorical(self, j: int, values: np.ndarray) -> np.ndarray:
+        """
+        Colonne catégorielle j -> positions one-hot (int16, -1 = aucune colonne active).
+        """
+        pos = _encode_categorical(values, self.categorical_fill[j], self.categorical_maps[j])
+        return pos.astype(np.int16)
+
+    def predict_columns(self, columns: Any, chunk_size: int = DEFAULT_CHUNK_SIZE) -> np.ndarray:
+        """
+        Prédiction batch sur des colonnes (dict de tableaux, DataFrame, ...).
+        Imputation + scaling + one-hot + centroïde le plus proche en une passe
+        NumPy par bloc de `chunk_size` lignes. Retourne un np.ndarray[int32].
+        """
+        numeric, categorical = self.column_arrays(columns)
+        arrays = numeric + categorical
+        n_rows = len(arrays[0]) if arrays else 0
+        labels = np.empty(n_rows, dtype=np.int32)
+        self._predict_blocks(numeric, categorical, labels, chunk_size, encoded=False)
+        return labels
+
+    def predict_encoded(
+        self,
+        numeric: np.ndarray,
+        cat_pos: np.ndarray,
+        out: np.ndarray,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> None:
+        """
+        Variante sur colonnes déjà encodées (numeric : (m, n), cat_pos : (c, n)),
+        écrit les clusters dans `out`. Utilisée par les workers (mémoire partagée).
+        """
+        self._predict_blocks(list(numeric), list(cat_pos), out, chunk_size, encoded=True)
+
+    def _predict_blocks(
+        self,
+        numeric: list[np.ndarray],
+        categorical: list[np.ndarray],
+        labels: np.ndarray,
+        chunk_size: int,
+        encoded: bool,
+    ) -> None:
+        n_rows = len(labels)
+        if n_rows == 0:
+            return
+
+        step = max(1, min(int(chunk_size), n_rows))
+        n_num = len(self.numeric_columns)
+        Z = np.empty((step, n_num), dtype=np.float64)
+        X = np.zeros((step, self.n_features_out), dtype=np.float64)
+        scores = np.empty((step, self.n_clusters), dtype=np.float64)
+
+        for start in range(0, n_rows, step):
+            stop = min(start + step, n_rows)
+            m = stop - start
+            x, sc = X[:m], scores[:m]
+            self._encode_block(numeric, categorical, start, stop, Z[:m], x, encoded)
+
+            np.matmul(x, self.centroids.T, out=sc)
+            sc *= -2.0
+            sc += self.centroid_sq_norms
+            labels[start:stop] = sc.argmin(axis=1)
+
+    def _encode_block(
+        self,
+        numeric: list[np.ndarray],
+        categorical: list[np.ndarray],
+        start: int,
+        stop: int,
+        z: np.ndarray,
+        x: np.ndarray,
+        encoded: bool,
+    ) -> None:
+        # imputation + scaling + one-hot des lignes [start, stop) dans x (z : buffer numérique)
+        for j, col in enumerate(numeric):
+            z[:, j] = col[start:stop]
+        nan_rows, nan_cols = np.nonzero(np.isnan(z))
+        z[nan_rows, nan_cols] = self.numeric_fill[nan_cols]
+        z -= self.numeric_mean
+        z /= self.numeric_scale
+        x[:, self.numeric_index] = z
+
+        for j, col in enumerate(categorical):
+            pos = col[start:stop] if encoded else self.encode_categorical(j, col[start:stop])
+            for p in self.categorical_maps[j].values():
+                if p >= 0:
+                    x[:, p] = pos == p
+
+    def transform_columns(self, columns: Any) -> np.ndarray:
+        """
+        Encode des colonnes dans l'espace du modèle -> np.ndarray (n_rows, n_features_out).
+        """
+        numeric, categorical = self.column_arrays(columns)
+        arrays = numeric + categorical
+        n_rows = len(arrays[0]) if arrays else 0
+        X = np.zeros((n_rows, self.n_features_out), dtype=np.float64)
+        Z = np.empty((n_rows, len(self.numeric_columns)), dtype=np.float64)
+        if n_rows:
+            self._encode_block(numeric, categorical, 0, n_rows, Z, X, encoded=False)
+        return X
+
+
+def _json_scalar(value: Any) -> Any:
+    # np.str_ / np.int64... -> types Python natifs (sérialisables en JSON)
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _is_missing(value: Any) -> bool:
+    return value is None or (isinstance(value, float) and value != value)
+
+
+def _as_numeric_array(col: Any, name: str) -> np.ndarray:
+    # Colonnes numériques natives : pas de copie (le cast float64 se fait par bloc)
+    arr = col.to_numpy() if hasattr(col, "to_numpy") else np.asarray(col)
+    if arr.dtype.kind in "fiub":
+        return arr
+    try:
+        if hasattr(col, "to_numpy"):
+            return col.to_numpy(dtype=np.float64, na_value=np.nan)
+        return np.asarray(arr, dtype=np.float64)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Column '{name}' must be numeric: {e}") from e
+
+
+def _as_object_array(col: Any) -> np.ndarray:
+    if hasattr(col, "to_numpy"):
+        return col.to_numpy(dtype=object, na_value=None)
+    return np.asarray(col, dtype=object)
+
+
+def _encode_categorical(values: np.ndarray, fill: Any, mapping: dict[Any, int]) -> np.ndarray:
+    """
+    Catégories -> position one-hot (-1 = aucune colonne active).
+    Les valeurs manquantes reçoivent la catégorie d'imputation.
+    """
+    pos = np.full(len(values), -1, dtype=np.intp)
+    matched = np.zeros(len(values), dtype=bool)
+    for cat, p in mapping.items():
+        hit = values == cat
+        pos[hit] = p
+        matched |= hit
+
+    # seules les lignes non reconnues (inconnues ou manquantes) passent en Python
+    rest = np.flatnonzero(~matched)
+    if len(rest):
+        fill_pos = mapping.get(fill, -1)
+        is_missing = np.fromiter((_is_missing(v) for v in values[rest]), dtype=bool, count=len(rest))
+        pos[rest[is_missing]] = fill_pos
+    return pos
+
+
+def _find_step(pipe: Any, cls: type) -> Any:
+    steps = pipe.steps if hasattr(pipe, "steps") else [("", pipe)]
+    for _, step in steps:
+        if isinstance(step, cls):
+            return step
+    return None
+
+
+def compile_pipeline(pipeline: Any, expected_columns: list[str]) -> InferenceEngine:
+    """
+    Extrait les paramètres appris d'un pipeline fitted (preprocess + model).
+    Lève ValueError si la structure du pipeline n'est pas supportée.
+    """
+    from sklearn.cluster import KMeans, MiniBatchKMeans
+    from sklearn.impute import SimpleImputer
+    from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+    steps = getattr(pipeline, "named_steps", {})
+    pre = steps.get("preprocess")
+    model = steps.get("model")
+    if pre is None or not hasattr(pre, "transformers_"):
+        raise ValueError("Unsupported pipeline: fitted 'preprocess' ColumnTransformer expected")
+    if not isinstance(model, KMeans | MiniBatchKMeans):
+        raise ValueError("Unsupported pipeline: KMeans 'model' step expected")
+
+    numeric_columns: list[str] = []
+    numeric_index: list[int] = []
+    numeric_fill: list[float] = []
+    numeric_mean: list[float] = []
+    numeric_scale: list[float] = []
+    categorical_columns: list[str] = []
+    categorical_fill: list[Any] = []
+    categorical_maps: list[dict[Any, int]] = []
+
+    offset = 0
+    for _, trans, cols in pre.transformers_:
+        if trans == "drop" or len(cols) == 0:
+            continue
+        if trans == "passthrough":
+            raise ValueError("Unsupported pipeline: passthrough columns")
+
+        imputer = _find_step(trans, SimpleImputer)
+        encoder = _find_step(trans, OneHotEncoder)
+
+        if encoder is not None:
+            for j, col in enumerate(cols):
+                cats = list(encoder.categories_[j])
+                drop_idx = None if encoder.drop_idx_ is None else encoder.drop_idx_[j]
+                mapping: dict[Any, int] = {}
+                for ci, cat in enumerate(cats):
+                    if drop_idx is not None and ci == drop_idx:
+                        mapping[cat] = -1
+                        continue
+                    mapping[cat] = offset
+                    offset += 1
+                categorical_columns.append(col)
+                categorical_fill.append(imputer.statistics_[j] if imputer is not None else None)
+                categorical_maps.append(mapping)
+            continue
+
+        scaler = _find_step(trans, StandardScaler)
+        n = len(cols)
+        fill = imputer.statistics_ if imputer is not None else np.full(n, np.nan)
+        mean = scaler.mean_ if scaler is not None and scaler.mean_ is not None else np.zeros(n)
+        scale = scaler.scale_ if scaler is not None and scaler.scale_ is not None else np.ones(n)
+        for j, col in enumerate(cols):
+            numeric_columns.append(col)
+            numeric_index.append(offset)
+            numeric_fill.append(float(fill[j]))
+            numeric_mean.append(float(mean[j]))
+            numeric_scale.append(float(scale[j]))
+            offset += 1
+
+    centroids = np.ascontiguousarray(model.cluster_centers_, dtype=np.float64)
+    if centroids.shape[1] != offset:
+        raise ValueError(
+            f"Unsupported pipeline: {offset} encoded features but centroids have {centroids.shape[1]}"
+        )
+
+    return InferenceEngine(
+        columns=tuple(expected_columns),
+        numeric_columns=tuple(numeric_columns),
+        numeric_index=np.asarray(numeric_index, dtype=np.intp),
+        numeric_fill=np.asarray(numeric_fill, dtype=np.float64),
+        numeric_mean=np.asarray(numeric_mean, dtype=np.float64),
+        numeric_scale=np.asarray(numeric_scale, dtype=np.float64),
+        categorical_columns=tuple(categorical_columns),
+        categorical_fill=tuple(categorical_fill),
+        categorical_maps=tuple(categorical_maps),
+        centroids=centroids,
+        centroid_sq_norms=np.einsum("ij,ij->i", centroids, centroids),
+    )
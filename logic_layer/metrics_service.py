@@ -0,0 +1,265 @@
+from __future__ import annotations
+
+import bisect
+import functools
+import math
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator
+from contextvars import ContextVar
+from typing import Any, ParamSpec, TypeVar
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+# Bornes des histogrammes (s) : 1-2.5-5 par décade, de 10 µs à 60 s
+BUCKETS: tuple[float, ...] = tuple(
+    float(f"{m}e{e}") for e in range(-5, 2) for m in (1, 2.5, 5)
+) + (60.0,)
+QUANTILES: tuple[float, ...] = (0.5, 0.95, 0.99)
+
+
+class RequestMetrics:
+    """
+    Mesures d'une requête échantillonnée (portée par un ContextVar, recopiée
+    dans les threads des lanes) ; agrégées une seule fois en fin de requête.
+    """
+
+    __slots__ = ("stages", "rows")
+
+    def __init__(self) -> None:
+        self.stages: list[tuple[str, float]] = []
+        self.rows = 0
+
+
+_current: ContextVar[RequestMetrics | None] = ContextVar("request_metrics", default=None)
+
+
+def begin_request() -> tuple[RequestMetrics, Any]:
+    rec = RequestMetrics()
+    return rec, _current.set(rec)
+
+
+def end_request(token: Any) -> None:
+    _current.reset(token)
+
+
+class stage:  # minuscule : s'emploie comme une fonction (`with stage(...)`, `@stage(...)`)
+    """
+    Chronomètre une étape (bloc `with` ou décorateur). Requête non
+    échantillonnée : un ContextVar.get, rien d'autre (pas de générateur).
+    """
+
+    __slots__ = ("name", "_rec", "_t0")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def __enter__(self) -> None:
+        self._rec = _current.get()
+        if self._rec is not None:
+            self._t0 = time.perf_counter()
+
+    def __exit__(self, *exc: object) -> None:
+        if self._rec is not None:
+            self._rec.stages.append((self.name, time.perf_counter() - self._t0))
+            self._rec = None
+
+    def __call__(self, fn: Callable[P, R]) -> Callable[P, R]:
+        name = self.name
+
+        @functools.wraps(fn)
+        def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            rec = _current.get()
+            if rec is None:
+                return fn(*args, **kwargs)
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                rec.stages.append((name, time.perf_counter() - t0))
+
+        return wrapper
+
+
+def timed(name: str, items: Iterable[Any]) -> Iterator[Any]:
+    """
+    Itère `items` en chronométrant chaque next() (ex : parse d'un bloc CSV).
+    """
+    it = iter(items)
+    if _current.get() is None:
+        yield from it
+        return
+    done = object()
+    while True:
+        with stage(name):
+            item = next(it, done)
+        if item is done:
+            return
+        yield item
+
+
+def count_rows(n: int) -> None:
+    rec = _current.get()
+    if rec is not None:
+        rec.rows += int(n)
+
+
+class Histogram:
+    """
+    Histogramme à bornes fixes (format Prometheus) ; quantiles interpolés dans le bucket.
+    """
+
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKETS) + 1)  # dernier : +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return math.nan
+        rank = q * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            if c and seen + c >= rank:
+                lo = BUCKETS[i - 1] if i else 0.0
+                hi = BUCKETS[i] if i < len(BUCKETS) else BUCKETS[-1]
+                return lo + (hi - lo) * (rank - seen) / c
+            seen += c
+        return BUCKETS[-1]
+
+
+def _labels(**labels: Any) -> str:
+    def esc(v: Any) -> str:
+        return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in labels.items()) + "}"
+
+
+def _num(v: float) -> str:
+    if math.isnan(v):
+        return "NaN"
+    return repr(float(v)) if not float(v).is_integer() else str(int(v))
+
+
+class MetricsRegistry:
+    """
+    Agrégats par endpoint : histogrammes par étape (temps cumulé de l'étape dans
+    la requête), requêtes, lignes, octets entrants / sortants.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.stages: dict[tuple[str, str], Histogram] = {}
+        self.requests: dict[tuple[str, str, int], int] = {}
+        self.rows: dict[str, int] = {}
+        self.bytes_in: dict[str, int] = {}
+        self.bytes_out: dict[str, int] = {}
+
+    def count_request(self, endpoint: str, method: str, status: int) -> None:
+        key = (endpoint, method, status)
+        with self._lock:
+            self.requests[key] = self.requests.get(key, 0) + 1
+
+    def record(
+        self,
+        endpoint: str,
+        rec: RequestMetrics,
+        total_s: float,
+        bytes_in: int = 0,
+        bytes_out: int = 0,
+    ) -> None:
+        per_stage: dict[str, float] = {"total": total_s}
+        for name, seconds in rec.stages:
+            per_stage[name] = per_stage.get(name, 0.0) + seconds
+
+        with self._lock:
+            for name, seconds in per_stage.items():
+                hist = self.stages.get((endpoint, name))
+                if hist is None:
+                    hist = self.stages[(endpoint, name)] = Histogram()
+                hist.observe(seconds)
+            self.rows[endpoint] = self.rows.get(endpoint, 0) + rec.rows
+            self.bytes_in[endpoint] = self.bytes_in.get(endpoint, 0) + bytes_in
+            self.bytes_out[endpoint] = self.bytes_out.get(endpoint, 0) + bytes_out
+
+    def reset(self) -> None:
+        with self._lock:
+            for d in (self.stages, self.requests, self.rows, self.bytes_in, self.bytes_out):
+                d.clear()
+
+    def render(self, prefix: str = "dmai") -> str:
+        """
+        Format texte Prometheus (exposition 0.0.4).
+        """
+        with self._lock:
+            stages = {k: (list(h.counts), h.sum, h.count) for k, h in self.stages.items()}
+            quantiles = {k: [h.quantile(q) for q in QUANTILES] for k, h in self.stages.items()}
+            requests = dict(self.requests)
+            rows, bytes_in, bytes_out = dict(self.rows), dict(self.bytes_in), dict(self.bytes_out)
+
+        out: list[str] = []
+
+        def header(name: str, kind: str, help_text: str) -> str:
+            out.append(f"# HELP {prefix}_{name} {help_text}")
+            out.append(f"# TYPE {prefix}_{name} {kind}")
+            return f"{prefix}_{name}"
+
+        name = header("requests_total", "counter", "HTTP requests by endpoint and status.")
+        for (endpoint, method, status), n in sorted(requests.items()):
+            out.append(f"{name}{_labels(endpoint=endpoint, method=method, status=status)} {n}")
+
+        name = header(
+            "stage_seconds", "histogram", "Per-request time spent in each stage (sampled)."
+        )
+        for (endpoint, stage_name), (counts, total, count) in sorted(stages.items()):
+            cumulative = 0
+            for bound, c in zip(BUCKETS + (math.inf,), counts, strict=True):
+                cumulative += c
+                le = "+Inf" if math.isinf(bound) else repr(bound)
+                labels = _labels(endpoint=endpoint, stage=stage_name, le=le)
+                out.append(f"{name}_bucket{labels} {cumulative}")
+            labels = _labels(endpoint=endpoint, stage=stage_name)
+            out.append(f"{name}_sum{labels} {_num(total)}")
+            out.append(f"{name}_count{labels} {count}")
+
+        name = header(
+            "stage_quantile_seconds", "gauge", "p50 / p95 / p99 per stage, estimated from buckets."
+        )
+        for (endpoint, stage_name), values in sorted(quantiles.items()):
+            for q, v in zip(QUANTILES, values, strict=True):
+                labels = _labels(endpoint=endpoint, stage=stage_name, quantile=q)
+                out.append(f"{name}{labels} {_num(float(f'{v:.6g}'))}")
+
+        name = header("rows_total", "counter", "Rows scored (sampled requests).")
+        for endpoint, n in sorted(rows.items()):
+            out.append(f"{name}{_labels(endpoint=endpoint)} {n}")
+
+        name = header(
+            "rows_per_second", "gauge", "Rows scored per second of request time (sampled)."
+        )
+        for endpoint, n in sorted(rows.items()):
+            busy = stages.get((endpoint, "total"), (None, 0.0, 0))[1]
+            if n and busy:
+                out.append(f"{name}{_labels(endpoint=endpoint)} {_num(n / busy)}")
+
+        name = header("request_bytes_total", "counter", "Request body bytes (sampled).")
+        for endpoint, n in sorted(bytes_in.items()):
+            out.append(f"{name}{_labels(endpoint=endpoint)} {n}")
+
+        name = header("response_bytes_total", "counter", "Response body bytes (sampled).")
+        for endpoint, n in sorted(bytes_out.items()):
+            out.append(f"{name}{_labels(endpoint=endpoint)} {n}")
+
+        return "\n".join(out) + "\n"
+
+
+# Registre du process (un par worker uvicorn)
+registry = MetricsRegistry()
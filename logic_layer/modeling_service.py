@@ -1,14 +1,19 @@
+import time
+from collections.abc import Callable, Iterable
 from typing import Any
 
+import numpy as np
 import pandas as pd
-from sklearn.cluster import KMeans
+from sklearn.cluster import KMeans, MiniBatchKMeans
 from sklearn.pipeline import Pipeline
 
 from .domain import ClusteringBundle
-from .evaluation_service import clustering_metrics
+from .evaluation_service import ClusterStats, clustering_metrics, streaming_metrics
+from .inference_engine import compile_pipeline
 from .preprocessing import (
     EXPECTED_COLUMNS,
     build_preprocessor,
+    fit_preprocessor_streaming,
     prepare_features,
     split_feature_types,
 )
@@ -41,4 +46,207 @@ def fit_kmeans_k4(df: pd.DataFrame, random_state: int = 42) -> ClusteringBundle:
         model_name="kmeans",
         params=params,
         metrics=metrics,
+        engine=compile_pipeline(pipe, EXPECTED_COLUMNS),
     )
+
+
+# Critère de sélection -> sens (+1 : plus grand = meilleur, -1 : plus petit = meilleur)
+SELECTION_CRITERIA: dict[str, int] = {
+    "silhouette": 1,
+    "calinski_harabasz": 1,
+    "davies_bouldin": -1,
+}
+
+
+def _fit_candidate(X: np.ndarray, k: int, seed: int, n_init: int) -> dict[str, Any]:
+    t0 = time.perf_counter()
+    model = KMeans(n_clusters=k, random_state=seed, n_init=n_init).fit(X)
+    fit_s = time.perf_counter() - t0
+    return {
+        "n_clusters": k,
+        "random_state": seed,
+        "inertia": float(model.inertia_),
+        "fit_s": fit_s,
+        "metrics": clustering_metrics(X, model.labels_),
+        "model": model,
+    }
+
+
+def _score(run: dict[str, Any], criterion: str) -> float:
+    value = run["metrics"][criterion]
+    # NaN (un seul cluster effectif) : jamais retenu
+    return -np.inf if np.isnan(value) else SELECTION_CRITERIA[criterion] * value
+
+
+def sweep_kmeans(
+    df: pd.DataFrame,
+    ks: Iterable[int] = range(2, 11),
+    seeds: Iterable[int] = (42,),
+    criterion: str = "silhouette",
+    n_jobs: int = -1,
+    n_init: int = 10,
+) -> tuple[ClusteringBundle, list[dict[str, Any]]]:
+    """
+    Recherche de k (x seeds) en parallèle. Le préprocesseur est fitté et appliqué
+    une seule fois : la matrice X est partagée par tous les candidats (memory-map
+    joblib entre les process). Retourne le meilleur bundle selon `criterion` +
+    le détail de chaque run (k, seed, inertie, métriques).
+    """
+    from joblib import Parallel, delayed
+
+    if criterion not in SELECTION_CRITERIA:
+        raise ValueError(f"Unknown criterion '{criterion}', expected one of {list(SELECTION_CRITERIA)}")
+
+    X_df = prepare_features(df, EXPECTED_COLUMNS)
+    numeric_cols, categorical_cols = split_feature_types(EXPECTED_COLUMNS)
+    preprocessor = build_preprocessor(numeric_cols, categorical_cols).fit(X_df)
+    X = np.ascontiguousarray(preprocessor.transform(X_df), dtype=np.float64)
+
+    # itérables parcourus une fois par k : un générateur serait épuisé après le premier
+    ks, seeds = list(ks), list(seeds)
+    candidates = [(k, seed) for k in ks for seed in seeds]
+    invalid = [k for k, _ in candidates if not 2 <= k < len(X)]
+    if invalid:
+        raise ValueError(f"Invalid k values {sorted(set(invalid))} for {len(X)} rows")
+    if not candidates:
+        raise ValueError("Empty sweep: no (k, seed) candidate")
+
+    runs = Parallel(n_jobs=n_jobs)(
+        delayed(_fit_candidate)(X, k, seed, n_init) for k, seed in candidates
+    )
+    best = max(runs, key=lambda r: _score(r, criterion))
+
+    pipe = Pipeline(steps=[
+        ("preprocess", preprocessor),
+        ("model", best["model"]),
+    ])
+    params: dict[str, Any] = {
+        "n_clusters": best["n_clusters"],
+        "random_state": best["random_state"],
+        "n_init": n_init,
+        "selection": criterion,
+    }
+    bundle = ClusteringBundle(
+        pipeline=pipe,
+        expected_columns=EXPECTED_COLUMNS,
+        model_name="kmeans",
+        params=params,
+        metrics=best["metrics"],
+        engine=compile_pipeline(pipe, EXPECTED_COLUMNS),
+    )
+    results = [{k: v for k, v in r.items() if k != "model"} for r in runs]
+    return bundle, results
+
+
+def _iter_batches(X: np.ndarray, batch_size: int) -> Iterable[np.ndarray]:
+    for start in range(0, len(X), batch_size):
+        yield X[start:start + batch_size]
+
+
+def fit_minibatch_kmeans(
+    chunks: Callable[[], Iterable[pd.DataFrame]],
+    n_clusters: int = 4,
+    random_state: int = 42,
+    batch_size: int = 4096,
+    epochs: int = 1,
+    metrics_sample: int = 10_000,
+) -> ClusteringBundle:
+    """
+    Entraînement out-of-core : `chunks()` relit le dataset par blocs à chaque passe.
+    - passe 1 : statistiques du préprocesseur (médianes, scaler, catégories)
+    - passes suivantes (`epochs`) : MiniBatchKMeans.partial_fit par mini-batchs
+    - passe finale d'évaluation : Davies–Bouldin / Calinski–Harabasz sur tout le
+      dataset (statistiques par cluster), silhouette sur un échantillon réservoir
+      de `metrics_sample` lignes (avec intervalle de confiance)
+    Mémoire bornée par la taille d'un bloc.
+    """
+    epochs = max(1, epochs)
+    numeric_cols, categorical_cols = split_feature_types(EXPECTED_COLUMNS)
+    preprocessor = fit_preprocessor_streaming(chunks(), numeric_cols, categorical_cols)
+
+    model = MiniBatchKMeans(
+        n_clusters=n_clusters,
+        random_state=random_state,
+        batch_size=batch_size,
+        n_init=3,
+    )
+    pending: np.ndarray | None = None
+
+    for _ in range(epochs):
+        for chunk in chunks():
+            X = preprocessor.transform(prepare_features(chunk, EXPECTED_COLUMNS))
+            # reliquat du bloc précédent : le 1er partial_fit doit voir >= n_clusters lignes
+            if pending is not None:
+                X = np.vstack([pending, X])
+                pending = None
+            if not hasattr(model, "cluster_centers_") and len(X) < n_clusters:
+                pending = X
+                continue
+
+            for batch in _iter_batches(X, batch_size):
+                model.partial_fit(batch)
+
+    if pending is not None and not hasattr(model, "cluster_centers_"):
+        raise ValueError(f"Not enough rows to fit {n_clusters} clusters")
+    if pending is not None:
+        model.partial_fit(pending)
+
+    # Évaluation du modèle final (centres figés) : une passe, mémoire bornée
+    rng = np.random.default_rng(random_state)
+    sample: np.ndarray | None = None
+    n_rows = 0
+    stats = ClusterStats(n_clusters, len(model.cluster_centers_[0]), centers=model.cluster_centers_)
+    for chunk in chunks():
+        X = preprocessor.transform(prepare_features(chunk, EXPECTED_COLUMNS))
+        stats.update(X, model.predict(X))
+        sample, n_rows = _reservoir(sample, X, n_rows, metrics_sample, rng)
+
+    pipe = Pipeline(steps=[
+        ("preprocess", preprocessor),
+        ("model", model),
+    ])
+    metrics = streaming_metrics(stats, sample, model.predict(sample))
+
+    params: dict[str, Any] = {
+        "n_clusters": n_clusters,
+        "random_state": random_state,
+        "batch_size": batch_size,
+        "epochs": epochs,
+        "n_rows": n_rows,
+        "metrics_sample": len(sample),
+    }
+
+    return ClusteringBundle(
+        pipeline=pipe,
+        expected_columns=EXPECTED_COLUMNS,
+        model_name="minibatch_kmeans",
+        params=params,
+        metrics=metrics,
+        engine=compile_pipeline(pipe, EXPECTED_COLUMNS),
+    )
+
+
+def _reservoir(
+    sample: np.ndarray | None,
+    X: np.ndarray,
+    n_seen: int,
+    size: int,
+    rng: np.random.Generator,
+) -> tuple[np.ndarray, int]:
+    """
+    Échantillonnage réservoir (algorithme R, vectorisé par bloc) : `size` lignes
+    uniformes parmi toutes celles vues, en mémoire constante.
+    """
+    if sample is None:
+        sample = np.empty((0, X.shape[1]), dtype=X.dtype)
+
+    fill = max(0, min(size - len(sample), len(X)))
+    sample = np.vstack([sample, X[:fill]])
+
+    rest = np.arange(fill, len(X))
+    if len(rest):
+        # ligne d'index global t remplace un élément avec proba size / (t + 1)
+        slots = rng.integers(0, n_seen + rest + 1)
+        keep = slots < size
+        sample[slots[keep]] = X[rest[keep]]
+    return sample, n_seen + len(X)
@@ -0,0 +1,301 @@
+from __future__ import annotations
+
+import copy
+import dataclasses
+import logging
+import queue
+import threading
+import time
+import uuid
+from collections.abc import Callable
+from typing import Any
+
+import numpy as np
+
+from .domain import ClusteringBundle
+
+logger = logging.getLogger(__name__)
+
+# Publication d'un bundle mis à jour dans le registre (version active) -> version publiée
+Publisher = Callable[[ClusteringBundle], str]
+
+
+class OnlineKMeans:
+    """
+    Mise à jour en ligne des centroïdes (k-means séquentiel à oubli exponentiel) :
+    - chaque lot de lignes est encodé, assigné au centroïde courant le plus proche,
+      puis ajouté aux sommes / effectifs par cluster, après décroissance de
+      0.5 ** (n / half_life_rows) : les données anciennes pèsent de moins en moins
+    - a priori : effectifs du dataset de référence (poids de départ des centroïdes entraînés)
+    - un thread de fond consomme une file bornée (le scoring n'attend jamais) et publie
+      un checkpoint toutes les `checkpoint_s` secondes si au moins `min_rows` lignes
+      ont été absorbées
+    Les identifiants de clusters restent stables (pas de ré-étiquetage).
+    """
+
+    def __init__(
+        self,
+        bundle: ClusteringBundle,
+        publish: Publisher,
+        on_checkpoint: Callable[[str], Any] | None = None,
+        prior_counts: dict[int, float] | None = None,
+        version: str | None = None,
+        half_life_rows: float = 100_000,
+        checkpoint_s: float = 300,
+        min_rows: int = 1_000,
+        max_queued_rows: int = 200_000,
+    ) -> None:
+        self._publish = publish
+        self._on_checkpoint = on_checkpoint
+        self.half_life_rows = max(1.0, float(half_life_rows))
+        self.checkpoint_s = checkpoint_s
+        self.min_rows = max(1, int(min_rows))
+        self.max_queued_rows = max(1, int(max_queued_rows))
+
+        self._lock = threading.Lock()
+        self._queue: queue.Queue[Any] = queue.Queue()
+        self._queued_rows = 0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        # identité écrite dans params["online"] de chaque checkpoint : la propriété d'une version
+        # est connue dès sa publication, avant la bascule de CURRENT (pas de fenêtre de course)
+        self.learner_id = uuid.uuid4().hex
+        self._generation = 0
+
+        self.rows_seen = 0
+        self.rows_dropped = 0
+        self.checkpoints = 0
+        self.last_checkpoint: str | None = None
+        self.last_error: str | None = None
+        self.rebase(bundle, version, prior_counts)
+
+    def rebase(
+        self,
+        bundle: ClusteringBundle,
+        version: str | None = None,
+        prior_counts: dict[int, float] | None = None,
+    ) -> None:
+        """
+        Repart des centroïdes de `bundle` (nouvelle version publiée hors ligne).
+        """
+        if bundle.engine is None or bundle.pipeline is None:
+            raise ValueError("Online learning needs the compiled engine and the sklearn pipeline.")
+        centroids = np.array(bundle.engine.centroids, dtype=np.float64)
+        k = len(centroids)
+        prior = np.array(
+            [max(float((prior_counts or {}).get(j, 1.0)), 1.0) for j in range(k)],
+            dtype=np.float64,
+        )
+        with self._lock:
+            self._bundle = bundle
+            self._generation += 1
+            self.base_version = version
+            self._base_centroids = centroids.copy()
+            self._counts = prior
+            self._sums = centroids * prior[:, None]
+            self._centroids = centroids
+            self._pending_rows = 0
+
+    def owns(self, bundle: ClusteringBundle) -> bool:
+        # version issue d'un checkpoint de ce learner : pas de rebase au swap
+        online = (bundle.params or {}).get("online") or {}
+        return online.get("learner_id") == self.learner_id
+
+    @property
+    def centroids(self) -> np.ndarray:
+        return self._centroids
+
+    def observe(self, columns: Any, n_rows: int) -> bool:
+        """
+        Lignes scorées (colonnes : DataFrame, dict de tableaux) mises en file, sans bloquer.
+        File pleine -> lot ignoré (compté dans rows_dropped).
+        """
+        with self._lock:
+            if self._queued_rows + n_rows > self.max_queued_rows:
+                self.rows_dropped += n_rows
+                return False
+            self._queued_rows += n_rows
+        self._queue.put((columns, n_rows))
+        return True
+
+    def update(self, columns: Any) -> int:
+        """
+        Absorbe un lot de lignes (appelé par le thread de fond, ou directement).
+        """
+        with self._lock:
+            engine = self._bundle.engine
+            centroids = self._centroids
+            generation = self._generation
+        X = engine.transform_columns(columns)
+        n = len(X)
+        if n == 0:
+            return 0
+
+        sq = np.einsum("ij,ij->i", centroids, centroids)
+        labels = (sq - 2.0 * (X @ centroids.T)).argmin(axis=1)
+        k = len(centroids)
+        onehot = np.zeros((n, k), dtype=np.float64)
+        onehot[np.arange(n), labels] = 1.0
+
+        with self._lock:
+            if generation != self._generation:
+                return 0  # rebase pendant le calcul : lot encodé avec l'ancien modèle
+            decay = 0.5 ** (n / self.half_life_rows)
+            self._counts = self._counts * decay + onehot.sum(axis=0)
+            self._sums = self._sums * decay + onehot.T @ X
+            # cluster sans nouvelle ligne : sommes et effectifs décroissent ensemble, centroïde inchangé
+            self._centroids = self._sums / self._counts[:, None]
+            self._pending_rows += n
+            self.rows_seen += n
+        return n
+
+    def updated_bundle(self) -> ClusteringBundle:
+        """
+        Bundle courant avec les centroïdes appris (pipeline sklearn + moteur NumPy).
+        """
+        with self._lock:
+            bundle, centroids = self._bundle, self._centroids.copy()
+            base_version, rows_seen = self.base_version, self.rows_seen
+
+        pipeline = copy.deepcopy(bundle.pipeline)
+        pipeline.named_steps["model"].cluster_centers_ = centroids
+        engine = dataclasses.replace(
+            bundle.engine,
+            centroids=centroids,
+            centroid_sq_norms=np.einsum("ij,ij->i", centroids, centroids),
+        )
+        params = {
+            **bundle.params,
+            "online": {
+                "learner_id": self.learner_id,
+                "base_version": base_version,
+                "rows_seen": rows_seen,
+                "half_life_rows": self.half_life_rows,
+            },
+        }
+        # métriques d'entraînement non valables pour les centroïdes mis à jour
+        return dataclasses.replace(bundle, pipeline=pipeline, engine=engine, params=params, metrics={})
+
+    def checkpoint(self, force: bool = False) -> str | None:
+        """
+        Publie les centroïdes courants (nouvelle version active), puis appelle on_checkpoint
+        (swap des workers). None si trop peu de lignes absorbées.
+        """
+        with self._lock:
+            if self._pending_rows == 0 or (not force and self._pending_rows < self.min_rows):
+                return None
+            pending = self._pending_rows
+        bundle = self.updated_bundle()
+        version = self._publish(bundle)
+        with self._lock:
+            self._pending_rows = max(0, self._pending_rows - pending)
+            self.base_version = version
+            self.checkpoints += 1
+            self.last_checkpoint = version
+        logger.info("Online centroids checkpointed as version %s (%d rows)", version, pending)
+        if self._on_checkpoint is not None:
+            self._on_checkpoint(version)
+        return version
+
+    def _drain(self, timeout: float) -> None:
+        try:
+            columns, n_rows = self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return
+        try:
+            self.update(columns)
+        except Exception as e:
+            # lot invalide (colonnes manquantes, valeurs non numériques) ou erreur inattendue :
+            # lot ignoré, le thread de fond continue
+            self.last_error = str(e)
+            if not isinstance(e, ValueError):
+                logger.exception("Online update failed")
+            with self._lock:
+                self.rows_dropped += n_rows
+        finally:
+            with self._lock:
+                self._queued_rows -= n_rows
+
+    def _run(self) -> None:
+        next_checkpoint = time.monotonic() + self.checkpoint_s
+        while not self._stop.is_set():
+            self._drain(timeout=min(1.0, self.checkpoint_s))
+            if time.monotonic() >= next_checkpoint:
+                next_checkpoint = time.monotonic() + self.checkpoint_s
+                try:
+                    self.checkpoint()
+                except Exception as e:
+                    # registre indisponible : on réessaiera au prochain intervalle
+                    self.last_error = str(e)
+                    logger.exception("Online checkpoint failed")
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="online-kmeans", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """
+        Attend que la file soit absorbée (tests, checkpoint manuel).
+        """
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self._lock:
+                if self._queued_rows == 0:
+                    return
+            if self._thread is None:
+                self._drain(timeout=0)
+            else:
+                time.sleep(0.01)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            shift = np.linalg.norm(self._centroids - self._base_centroids, axis=1)
+            return {
+                "base_version": self.base_version,
+                "rows_seen": self.rows_seen,
+                "rows_pending_checkpoint": self._pending_rows,
+                "rows_queued": self._queued_rows,
+                "rows_dropped": self.rows_dropped,
+                "checkpoints": self.checkpoints,
+                "last_checkpoint": self.last_checkpoint,
+                "last_error": self.last_error,
+                "effective_counts": [round(float(c), 3) for c in self._counts],
+                # déplacement depuis le dernier rebase, en unités standardisées
+                "centroid_shift": [round(float(s), 6) for s in shift],
+                "half_life_rows": self.half_life_rows,
+            }
+
+
+_LEARNER: OnlineKMeans | None = None
+
+
+def configure_online_learning(learner: OnlineKMeans | None) -> OnlineKMeans | None:
+    """
+    Installe (ou retire avec None) le learner alimenté par les lignes scorées.
+    """
+    global _LEARNER
+    shutdown_online_learning()
+    _LEARNER = learner
+    if learner is not None:
+        learner.start()
+    return learner
+
+
+def get_online_learner() -> OnlineKMeans | None:
+    return _LEARNER
+
+
+def shutdown_online_learning() -> None:
+    global _LEARNER
+    if _LEARNER is not None:
+        _LEARNER.stop()
+    _LEARNER = None
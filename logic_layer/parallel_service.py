@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import hashlib
+import multiprocessing as mp
+import pickle
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any
+
+import numpy as np
+
+from .inference_engine import InferenceEngine
+
+# Moteurs déjà reçus par un process worker, par empreinte (plusieurs versions servies)
+_WORKER_ENGINES: OrderedDict[str, InferenceEngine] = OrderedDict()
+_MAX_ENGINES = 4
+
+
+def _worker_engine(fingerprint: str, blob: bytes) -> InferenceEngine:
+    engine = _WORKER_ENGINES.get(fingerprint)
+    if engine is None:
+        engine = _WORKER_ENGINES[fingerprint] = pickle.loads(blob)
+        while len(_WORKER_ENGINES) > _MAX_ENGINES:
+            _WORKER_ENGINES.popitem(last=False)
+    _WORKER_ENGINES.move_to_end(fingerprint)
+    return engine
+
+
+def _layout(n_rows: int, n_num: int, n_cat: int) -> tuple[int, int, int]:
+    """
+    Offsets dans le segment partagé : numeric float64 (m, n) | cat int16 (c, n) | labels int32 (n).
+    """
+    cat_offset = 8 * n_num * n_rows
+    labels_offset = cat_offset + 2 * n_cat * n_rows
+    labels_offset += -labels_offset % 4  # alignement int32
+    return cat_offset, labels_offset, labels_offset + 4 * n_rows
+
+
+def _views(buf: Any, n_rows: int, n_num: int, n_cat: int) -> tuple[np.ndarray, ...]:
+    cat_offset, labels_offset, _ = _layout(n_rows, n_num, n_cat)
+    numeric = np.ndarray((n_num, n_rows), dtype=np.float64, buffer=buf)
+    cat_pos = np.ndarray((n_cat, n_rows), dtype=np.int16, buffer=buf, offset=cat_offset)
+    labels = np.ndarray((n_rows,), dtype=np.int32, buffer=buf, offset=labels_offset)
+    return numeric, cat_pos, labels
+
+
+def _score_slice(
+    fingerprint: str,
+    blob: bytes,
+    shm_name: str,
+    n_rows: int,
+    n_num: int,
+    n_cat: int,
+    start: int,
+    stop: int,
+) -> None:
+    engine = _worker_engine(fingerprint, blob)
+    shm = shared_memory.SharedMemory(name=shm_name)
+    numeric = cat_pos = labels = None
+    try:
+        numeric, cat_pos, labels = _views(shm.buf, n_rows, n_num, n_cat)
+        engine.predict_encoded(
+            numeric[:, start:stop], cat_pos[:, start:stop], out=labels[start:stop]
+        )
+    finally:
+        # les vues doivent être libérées avant close()
+        del numeric, cat_pos, labels
+        shm.close()
+
+
+class ParallelScorer:
+    """
+    Scoring batch réparti sur un ProcessPoolExecutor :
+    - un seul pool, partagé par toutes les versions servies (jamais recréé au changement
+      de moteur : pas de shutdown sous les pieds d'une requête concurrente)
+    - le moteur accompagne chaque tâche (pickle de quelques Ko, calculé une fois par moteur) ;
+      chaque worker le garde en cache par empreinte et ne le désérialise qu'une fois
+    - les données transitent par un segment de mémoire partagée (pas de DataFrame picklé)
+    """
+
+    def __init__(self, n_workers: int, min_rows: int) -> None:
+        self.n_workers = int(n_workers)
+        self.min_rows = int(min_rows)
+        self._pool: ProcessPoolExecutor | None = None
+        # id(moteur) -> (référence faible, empreinte, pickle)
+        self._payloads: dict[int, tuple[weakref.ref, str, bytes]] = {}
+        self._lock = threading.Lock()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # spawn : pas de fork d'un process serveur multi-threadé
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.n_workers, mp_context=mp.get_context("spawn")
+                )
+            return self._pool
+
+    def _payload(self, engine: InferenceEngine) -> tuple[str, bytes]:
+        with self._lock:
+            entry = self._payloads.get(id(engine))
+            if entry is not None and entry[0]() is engine:
+                return entry[1], entry[2]
+
+        blob = pickle.dumps(engine, protocol=pickle.HIGHEST_PROTOCOL)
+        fingerprint = hashlib.sha256(blob).hexdigest()
+        with self._lock:
+            # moteurs collectés : leur id peut être réutilisé
+            self._payloads = {k: v for k, v in self._payloads.items() if v[0]() is not None}
+            self._payloads[id(engine)] = (weakref.ref(engine), fingerprint, blob)
+        return fingerprint, blob
+
+    def predict(self, engine: InferenceEngine, columns: Any) -> np.ndarray:
+        numeric, categorical = engine.column_arrays(columns)
+        arrays = numeric + categorical
+        n_rows = len(arrays[0]) if arrays else 0
+        if n_rows < max(self.min_rows, 1):
+            return engine.predict_columns(columns)
+
+        pool = self._get_pool()
+        fingerprint, blob = self._payload(engine)
+        n_num, n_cat = len(numeric), len(categorical)
+        size = _layout(n_rows, n_num, n_cat)[2]
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        num_view = cat_view = labels_view = None
+        try:
+            num_view, cat_view, labels_view = _views(shm.buf, n_rows, n_num, n_cat)
+            for j, col in enumerate(numeric):
+                num_view[j] = col
+            for j, col in enumerate(categorical):
+                cat_view[j] = engine.encode_categorical(j, col)
+
+            # ~2 tranches par worker pour lisser les écarts de charge
+            bounds = np.linspace(0, n_rows, 2 * self.n_workers + 1, dtype=np.int64)
+            futures = [
+                pool.submit(
+                    _score_slice, fingerprint, blob, shm.name, n_rows, n_num, n_cat, int(a), int(b)
+                )
+                for a, b in zip(bounds[:-1], bounds[1:], strict=True)
+                if b > a
+            ]
+            for f in futures:
+                f.result()
+
+            labels = labels_view.copy()
+        finally:
+            del num_view, cat_view, labels_view
+            shm.close()
+            shm.unlink()
+        return labels
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True)
+            self._pool = None
+            self._payloads.clear()
+
+
+_SCORER: ParallelScorer | None = None
+
+
+def configure_parallel_scoring(n_workers: int, min_rows: int) -> ParallelScorer | None:
+    """
+    Active le scoring multi-process (n_workers <= 1 -> désactivé).
+    """
+    global _SCORER
+    shutdown_parallel_scoring()
+    _SCORER = ParallelScorer(n_workers, min_rows) if n_workers > 1 else None
+    return _SCORER
+
+
+def get_parallel_scorer() -> ParallelScorer | None:
+    return _SCORER
+
+
+def shutdown_parallel_scoring() -> None:
+    global _SCORER
+    if _SCORER is not None:
+        _SCORER.shutdown()
+    _SCORER = None
@@ -1,18 +1,71 @@
-from typing import Any
+from __future__ import annotations
 
-import pandas as pd
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
 
 from .domain import ClusteringBundle
-from .preprocessing import prepare_features
+from .metrics_service import stage
+from .parallel_service import get_parallel_scorer
+from .preprocessing import prepare_features, validate_input_df
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 
+@stage("predict")
 def predict_one(bundle: ClusteringBundle, features: dict[str, Any]) -> int:
+    # Fast path : moteur NumPy compilé, sans DataFrame
+    if bundle.engine is not None:
+        return bundle.engine.predict_one(features)
+
+    # Fallback sklearn : pandas importé à la demande
+    import pandas as pd
+
     df = pd.DataFrame([features])
     X_df = prepare_features(df, bundle.expected_columns)
     cluster = bundle.pipeline.predict(X_df)[0]
     return int(cluster)
 
+def predict_labels(bundle: ClusteringBundle, df: pd.DataFrame) -> np.ndarray:
+    """
+    Prédiction batch vectorisée -> np.ndarray[int32] (sans copie du DataFrame).
+    """
+    if bundle.engine is not None:
+        with stage("validate"):
+            validate_input_df(df, bundle.expected_columns)
+        return predict_columns(bundle, df)
+
+    with stage("prepare_features"):
+        X_df = prepare_features(df, bundle.expected_columns)
+    with stage("predict"):
+        return bundle.pipeline.predict(X_df).astype(np.int32, copy=False)
+
+def predict_columns(bundle: ClusteringBundle, columns: dict[str, Any]) -> np.ndarray:
+    """
+    Prédiction sur un dict colonne -> tableau (format columnar) -> np.ndarray[int32].
+    """
+    if bundle.engine is not None:
+        # Gros batchs : répartis sur le pool de process si configuré (seuil min_rows)
+        scorer = get_parallel_scorer()
+        with stage("predict"):
+            if scorer is not None:
+                return scorer.predict(bundle.engine, columns)
+            return bundle.engine.predict_columns(columns)
+
+    import pandas as pd
+
+    return predict_labels(bundle, pd.DataFrame(columns))
+
+def predict_rows(bundle: ClusteringBundle, rows: list[dict[str, Any]]) -> np.ndarray:
+    """
+    Prédiction vectorisée d'une liste de lignes (dicts) -> np.ndarray[int32].
+    """
+    missing = sorted({c for r in rows for c in bundle.expected_columns if c not in r})
+    if missing:
+        raise ValueError(f"Missing required columns: {missing}")
+    columns = {c: [r[c] for r in rows] for c in bundle.expected_columns}
+    return predict_columns(bundle, columns)
+
 def predict_batch(bundle: ClusteringBundle, df: pd.DataFrame) -> list[int]:
-    X_df = prepare_features(df, bundle.expected_columns)
-    clusters = bundle.pipeline.predict(X_df)
-    return [int(x) for x in clusters]
+    return predict_labels(bundle, df).tolist()
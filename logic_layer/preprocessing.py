@@ -1,9 +1,16 @@
 
-import pandas as pd
-from sklearn.compose import ColumnTransformer
-from sklearn.impute import SimpleImputer
-from sklearn.pipeline import Pipeline
-from sklearn.preprocessing import OneHotEncoder, StandardScaler
+from __future__ import annotations
+
+from collections.abc import Iterable
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+from .evaluation_service import combine_moments
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from sklearn.compose import ColumnTransformer
 
 EXPECTED_COLUMNS = ["Gender", "Age", "Annual Income (k$)", "Spending Score (1-100)"]
 
@@ -21,6 +28,12 @@ def build_preprocessor(
     numeric_cols: list[str],
     categorical_cols: list[str],
 ) -> ColumnTransformer:
+    # sklearn importé à la demande (inutile pour servir des prédictions)
+    from sklearn.compose import ColumnTransformer
+    from sklearn.impute import SimpleImputer
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
     numeric_pipe = Pipeline(steps=[
         ("imputer", SimpleImputer(strategy="median")),
         ("scaler", StandardScaler()),
@@ -42,3 +55,106 @@ def build_preprocessor(
 def prepare_features(df: pd.DataFrame, expected_columns: list[str] = EXPECTED_COLUMNS) -> pd.DataFrame:
     validate_input_df(df, expected_columns)
     return df[expected_columns].copy()
+
+
+class _NumericStats:
+    """
+    Statistiques d'une colonne numérique sur un flux de blocs :
+    sketch de quantiles (médiane d'imputation) + count / moyenne / M2 (Welford).
+    """
+
+    def __init__(self, seed: int) -> None:
+        from .explain_service import QuantileSketch
+
+        self.sketch = QuantileSketch(k=65_536, seed=seed)
+        self.n_missing = 0
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, values: np.ndarray) -> None:
+        ok = ~np.isnan(values)
+        self.n_missing += int((~ok).sum())
+        values = values[ok]
+        if len(values) == 0:
+            return
+        self.sketch.update(values)
+        self._combine(len(values), float(values.mean()), float(((values - values.mean()) ** 2).sum()))
+
+    def _combine(self, n_b: int, mean_b: float, m2_b: float) -> None:
+        n, mean, m2 = combine_moments(self.n, self.mean, self.m2, n_b, mean_b, m2_b)
+        self.n, self.mean, self.m2 = int(n), float(mean), float(m2)
+
+    def imputed(self) -> tuple[float, float, float, int]:
+        """
+        (médiane, moyenne, variance, n) des valeurs APRÈS imputation, comme le
+        StandardScaler placé derrière le SimpleImputer dans le pipeline.
+        """
+        if self.n == 0:
+            raise ValueError("Cannot fit preprocessor: a numeric column has no values")
+        median = self.sketch.quantiles((0.5,))[0]
+        if self.n_missing:
+            # les valeurs manquantes deviennent n_missing copies de la médiane
+            self._combine(self.n_missing, median, 0.0)
+            self.n_missing = 0
+        return median, self.mean, self.m2 / self.n, self.n
+
+
+def fit_preprocessor_streaming(
+    chunks: Iterable[pd.DataFrame],
+    numeric_cols: list[str],
+    categorical_cols: list[str],
+) -> ColumnTransformer:
+    """
+    Fit du préprocesseur (build_preprocessor) en une passe sur un flux de blocs :
+    médianes (sketch, exactes jusqu'à 65k valeurs), moyennes / variances du scaler
+    et catégories / modalité la plus fréquente, en mémoire bornée par la taille d'un bloc.
+    """
+    import pandas as pd
+
+    num_stats = {c: _NumericStats(seed=i) for i, c in enumerate(numeric_cols)}
+    cat_counts: dict[str, dict[Any, int]] = {c: {} for c in categorical_cols}
+
+    for chunk in chunks:
+        validate_input_df(chunk, numeric_cols + categorical_cols)
+        for c, stats in num_stats.items():
+            stats.update(pd.to_numeric(chunk[c], errors="raise").to_numpy(dtype=np.float64))
+        for c, counts in cat_counts.items():
+            for value, n in chunk[c].value_counts(dropna=True).items():
+                counts[value] = counts.get(value, 0) + int(n)
+
+    numeric = {c: stats.imputed() for c, stats in num_stats.items()}
+    for c, counts in cat_counts.items():
+        if not counts:
+            raise ValueError(f"Cannot fit preprocessor: column '{c}' has no values")
+
+    # Structure fittée par sklearn sur un petit frame "graine" (toutes les catégories,
+    # aucune valeur manquante), puis statistiques remplacées par celles du flux
+    n_seed = max([2] + [len(c) for c in cat_counts.values()])
+    seed = pd.DataFrame(
+        {
+            **{c: np.full(n_seed, numeric[c][1]) for c in numeric_cols},
+            **{c: np.resize(sorted(counts), n_seed) for c, counts in cat_counts.items()},
+        }
+    )
+    pre = build_preprocessor(numeric_cols, categorical_cols).fit(seed)
+
+    num_pipe = pre.named_transformers_["num"]
+    num_pipe.named_steps["imputer"].statistics_ = np.array([numeric[c][0] for c in numeric_cols])
+    scaler = num_pipe.named_steps["scaler"]
+    scaler.mean_ = np.array([numeric[c][1] for c in numeric_cols])
+    scaler.var_ = np.array([numeric[c][2] for c in numeric_cols])
+    # même garde que sklearn : variance nulle -> échelle 1
+    scaler.scale_ = np.where(scaler.var_ > 0, np.sqrt(scaler.var_), 1.0)
+    scaler.n_samples_seen_ = np.array([numeric[c][3] for c in numeric_cols], dtype=np.int64)
+
+    if categorical_cols:
+        # égalités : la plus petite valeur, comme SimpleImputer(strategy="most_frequent")
+        most_frequent = [
+            min(counts, key=lambda v, counts=counts: (-counts[v], v))
+            for counts in cat_counts.values()
+        ]
+        cat_imputer = pre.named_transformers_["cat"].named_steps["imputer"]
+        cat_imputer.statistics_ = np.array(most_frequent, dtype=object)
+
+    return pre
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import cProfile
+import io
+import pstats
+import threading
+import tracemalloc
+from collections.abc import Callable
+from contextvars import ContextVar
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+_current: ContextVar[RequestProfile | None] = ContextVar("request_profile", default=None)
+
+# tracemalloc est global au process : actif tant qu'au moins une requête est profilée
+_trace_lock = threading.Lock()
+_trace_users = 0
+
+
+def _start_tracing(frames: int) -> None:
+    global _trace_users
+    with _trace_lock:
+        if _trace_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+            tracemalloc.reset_peak()
+        _trace_users += 1
+
+
+def _stop_tracing() -> tracemalloc.Snapshot | None:
+    global _trace_users
+    with _trace_lock:
+        snapshot = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+        _trace_users -= 1
+        if _trace_users == 0:
+            tracemalloc.stop()
+        return snapshot
+
+
+class RequestProfile:
+    """
+    Profil d'une requête : CPU (cProfile) du travail exécuté dans les lanes
+    (parse / prédiction / profils), fusionné entre threads et blocs, plus un
+    instantané tracemalloc en fin de requête.
+    """
+
+    def __init__(self, trace_frames: int = 10) -> None:
+        self._lock = threading.Lock()
+        self._stats: pstats.Stats | None = None
+        self.trace_frames = trace_frames
+        self.snapshot: tracemalloc.Snapshot | None = None
+        self.peak_bytes = 0
+
+    def runcall(self, fn: Callable[..., T], *args: Any) -> T:
+        # un profiler par appel : cProfile n'est pas partageable entre threads
+        prof = cProfile.Profile()
+        try:
+            return prof.runcall(fn, *args)
+        finally:
+            with self._lock:
+                if self._stats is None:
+                    self._stats = pstats.Stats(prof)
+                else:
+                    self._stats.add(prof)
+
+    def start(self) -> Any:
+        _start_tracing(self.trace_frames)
+        return _current.set(self)
+
+    def stop(self, token: Any) -> None:
+        _current.reset(token)
+        self.peak_bytes = tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else 0
+        self.snapshot = _stop_tracing()
+
+    @property
+    def stats(self) -> pstats.Stats | None:
+        return self._stats
+
+    def cpu_summary(self, limit: int = 30) -> str:
+        if self._stats is None:
+            return ""
+        out = io.StringIO()
+        self._stats.stream = out
+        self._stats.sort_stats("cumulative").print_stats(limit)
+        return out.getvalue()
+
+    def alloc_summary(self, limit: int = 30) -> list[dict[str, Any]]:
+        if self.snapshot is None:
+            return []
+        top = self.snapshot.filter_traces(
+            [tracemalloc.Filter(False, tracemalloc.__file__)]
+        ).statistics("lineno")[:limit]
+        return [
+            {"where": str(s.traceback[0]), "size_bytes": s.size, "count": s.count}
+            for s in top
+        ]
+
+
+def run_profiled(fn: Callable[..., Any], *args: Any) -> Any:
+    """
+    Appel dans une lane : profilé si la requête courante l'est, direct sinon.
+    """
+    prof = _current.get()
+    if prof is None:
+        return fn(*args)
+    return prof.runcall(fn, *args)
@@ -1,14 +1,57 @@
+import logging
+from functools import partial
 from pathlib import Path
 
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 
-from data_layer.artifacts_repository import load_bundle
-from data_layer.dataset_repository import load_csv
-from logic_layer.explain_service import profile_clusters
+from data_layer.artifacts_repository import acquire_online_lock, release_online_lock
+from data_layer.jobs_repository import JobStore
+from data_layer.profiling_repository import ProfileStore
+from data_layer.settings import (
+    INFERENCE_ONLY,
+    JOB_TTL_S,
+    METRICS_ENABLED,
+    METRICS_SAMPLE_PERCENT,
+    MODEL_CACHE_SIZE,
+    MODEL_RELOAD_INTERVAL_S,
+    ONLINE_CHECKPOINT_S,
+    ONLINE_HALF_LIFE_ROWS,
+    ONLINE_KEEP_VERSIONS,
+    ONLINE_LEARNING,
+    ONLINE_MIN_ROWS,
+    ONLINE_QUEUE_ROWS,
+    PARALLEL_MIN_ROWS,
+    PREDICTION_CACHE_PATH,
+    PREDICTION_CACHE_SIZE,
+    PREDICTION_CACHE_TTL_S,
+    PROFILING_ENABLED,
+    PROFILING_MAX_PROFILES,
+    PROFILING_SAMPLE_PERCENT,
+    PROFILING_TOKEN,
+    ROW_BATCH_MAX_SIZE,
+    ROW_BATCH_MAX_WAIT_US,
+    ROW_BATCHING,
+    SCORING_WORKERS,
+)
+from logic_layer.batching_service import MicroBatcher
+from logic_layer.cache_service import PredictionCache, SqliteCacheBackend
+from logic_layer.metrics_service import registry as metrics_registry
+from logic_layer.online_service import (
+    OnlineKMeans,
+    configure_online_learning,
+    get_online_learner,
+    shutdown_online_learning,
+)
+from logic_layer.parallel_service import configure_parallel_scoring, shutdown_parallel_scoring
+from routers_layer.instrumentation import MetricsMiddleware, ProfilingMiddleware
 from routers_layer.rest_router import router as api_router
+from routers_layer.scheduling import row_lane, shutdown_lanes
+from routers_layer.serving import LoadedModel, ModelServer, load_model, publish_checkpoint
 from routers_layer.web_router import router as web_router
 
+logger = logging.getLogger(__name__)
+
 app = FastAPI(title="Dubai Mall Customer Segmentation")
 
 
@@ -39,20 +82,134 @@ def _resolve_ref_data_path() -> str:
     )
 
 
+def _publish_current(model: LoadedModel) -> None:
+    # Compatibilité : app.state.bundle / cluster_profile_map suivent la version courante
+    app.state.bundle = model.bundle
+    app.state.cluster_profile_map = model.cluster_profile_map
+    app.state.ref_n_rows = model.ref_n_rows
+    # nouveau bundle servi : les prédictions en cache ne sont plus valides
+    cache = getattr(app.state, "prediction_cache", None)
+    if cache is not None:
+        cache.clear()
+    # version publiée hors ligne (ex: scripts.train) : l'apprentissage en ligne repart d'elle
+    learner = get_online_learner()
+    if learner is not None and not learner.owns(model.bundle):
+        learner.rebase(model.bundle, model.version, _reference_counts(model))
+
+
+def _reference_counts(model: LoadedModel) -> dict[int, float]:
+    # a priori de l'apprentissage en ligne : effectifs des clusters du dataset de référence
+    return {cid: float(p.get("size", 1)) for cid, p in model.cluster_profile_map.items()}
+
+
+def _start_online_learning() -> None:
+    models: ModelServer = app.state.models
+    model = models.current
+    if model.bundle.engine is None or model.bundle.pipeline is None:
+        logger.warning("ONLINE_LEARNING ignored: needs the sklearn pipeline (INFERENCE_ONLY=0)")
+        return
+    # plusieurs workers uvicorn : un seul apprend et publie, les autres suivent CURRENT
+    if not acquire_online_lock():
+        logger.info("Online learning already runs in another worker")
+        return
+    configure_online_learning(
+        OnlineKMeans(
+            model.bundle,
+            # profils de référence écrits avec le checkpoint, anciens checkpoints purgés
+            publish=partial(
+                publish_checkpoint,
+                ref_path=app.state.ref_data_path,
+                keep_versions=ONLINE_KEEP_VERSIONS,
+            ),
+            # swap immédiat dans ce worker ; les autres suivent CURRENT (hot reload)
+            on_checkpoint=lambda _: models.refresh(),
+            prior_counts=_reference_counts(model),
+            version=model.version,
+            half_life_rows=ONLINE_HALF_LIFE_ROWS,
+            checkpoint_s=ONLINE_CHECKPOINT_S,
+            min_rows=ONLINE_MIN_ROWS,
+            max_queued_rows=ONLINE_QUEUE_ROWS,
+        )
+    )
+
+
 @app.on_event("startup")
 def _startup() -> None:
-    app.state.bundle = load_bundle()
-
-    # Profils calculés une seule fois (dataset de référence)
+    # Profils du dataset de référence : cache précalculé par scripts.train
     ref_path = _resolve_ref_data_path()
-    df_ref = load_csv(ref_path)
-    prof = profile_clusters(app.state.bundle, df_ref)
-
-    # Map cluster_id -> profil
-    app.state.cluster_profile_map = {p["cluster_id"]: p for p in prof["profiles"]}
-    app.state.ref_n_rows = int(prof.get("n_rows", len(df_ref)))
     app.state.ref_data_path = ref_path
 
+    # Cache des prédictions unitaires (optionnel, PREDICTION_CACHE_SIZE > 0)
+    backend = (
+        SqliteCacheBackend(PREDICTION_CACHE_PATH, PREDICTION_CACHE_TTL_S)
+        if PREDICTION_CACHE_PATH
+        else None
+    )
+    app.state.prediction_cache = (
+        PredictionCache(PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL_S, backend)
+        if PREDICTION_CACHE_SIZE > 0
+        else None
+    )
+
+    # Version courante (pointeur CURRENT) + versions épinglées, rechargées à chaud.
+    # INFERENCE_ONLY=1 : moteur NumPy exporté, sans joblib / sklearn / pandas
+    loader = partial(load_model, ref_path=ref_path, inference_only=INFERENCE_ONLY)
+    app.state.models = ModelServer(loader, MODEL_CACHE_SIZE, on_swap=_publish_current)
+    app.state.models.start(MODEL_RELOAD_INTERVAL_S)
+
+    # Pool de scoring multi-process (optionnel, SCORING_WORKERS > 1)
+    configure_parallel_scoring(SCORING_WORKERS, PARALLEL_MIN_ROWS)
+
+    # Apprentissage en ligne des centroïdes (optionnel, ONLINE_LEARNING=1)
+    if ONLINE_LEARNING:
+        _start_online_learning()
+
+    # Jobs de segmentation asynchrones (lane "job") : état et résultats sur disque
+    app.state.job_store = JobStore(ttl_s=JOB_TTL_S)
+    app.state.job_store.recover()
+
+    # Micro-batching des requêtes /api/cluster/row (optionnel, ROW_BATCHING=1)
+    app.state.row_batcher = (
+        MicroBatcher(ROW_BATCH_MAX_SIZE, ROW_BATCH_MAX_WAIT_US, runner=row_lane.call)
+        if ROW_BATCHING
+        else None
+    )
+
+
+@app.on_event("shutdown")
+def _shutdown() -> None:
+    models = getattr(app.state, "models", None)
+    if models is not None:
+        models.stop()
+    shutdown_online_learning()
+    release_online_lock()
+    shutdown_parallel_scoring()
+    shutdown_lanes()
+
+
+# Timers par étape + compteurs exposés sur /api/metrics (METRICS_SAMPLE_PERCENT % des requêtes)
+if METRICS_ENABLED:
+    app.add_middleware(
+        MetricsMiddleware,
+        registry=metrics_registry,
+        sample_rate=METRICS_SAMPLE_PERCENT / 100,
+    )
+
+# Profilage CPU + allocations à la demande (X-Profile: 1) ou échantillonné, opt-in :
+# désactivé, aucun middleware n'est installé (coût nul)
+app.state.profile_store = ProfileStore(max_profiles=PROFILING_MAX_PROFILES) if PROFILING_ENABLED else None
+app.state.profiling_token = PROFILING_TOKEN
+if app.state.profile_store is not None:
+    if not PROFILING_TOKEN:
+        logger.warning(
+            "PROFILING_ENABLED without PROFILING_TOKEN: X-Profile ignored, /api/profiling refused"
+        )
+    app.add_middleware(
+        ProfilingMiddleware,
+        store=app.state.profile_store,
+        sample_rate=PROFILING_SAMPLE_PERCENT / 100,
+        token=PROFILING_TOKEN,
+    )
 
 app.mount("/static", StaticFiles(directory="web/static"), name="static")
 app.include_router(web_router)                 # /
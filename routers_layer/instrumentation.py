@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import hmac
+import logging
+import random
+import time
+from collections.abc import Awaitable, Callable, MutableMapping
+from typing import Any
+
+from starlette.concurrency import run_in_threadpool
+
+from data_layer.profiling_repository import ProfileStore, new_profile_id
+from logic_layer.metrics_service import MetricsRegistry, begin_request, end_request
+from logic_layer.profiling_service import RequestProfile
+
+logger = logging.getLogger(__name__)
+
+Scope = MutableMapping[str, Any]
+Message = MutableMapping[str, Any]
+Receive = Callable[[], Awaitable[Message]]
+Send = Callable[[Message], Awaitable[None]]
+ASGIApp = Callable[[Scope, Receive, Send], Awaitable[None]]
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI (sans BaseHTTPMiddleware : le streaming n'est pas bufferisé) :
+    - toutes les requêtes : compteur par endpoint / méthode / statut
+    - requêtes échantillonnées (sample_rate) : étapes, lignes, octets in / out
+    Endpoint = chemin de la route (pas l'URL brute : cardinalité bornée).
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        registry: MetricsRegistry,
+        sample_rate: float = 1.0,
+        exclude: tuple[str, ...] = ("/static", "/api/metrics"),
+    ) -> None:
+        self.app = app
+        self.registry = registry
+        self.sample_rate = sample_rate
+        self.exclude = exclude
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"].startswith(self.exclude):
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            async def send_status(message: Message) -> None:
+                nonlocal status
+                if message["type"] == "http.response.start":
+                    status = message["status"]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_status)
+            finally:
+                self.registry.count_request(_endpoint(scope), scope["method"], status)
+            return
+
+        bytes_in = bytes_out = 0
+
+        async def counting_receive() -> Message:
+            nonlocal bytes_in
+            message = await receive()
+            bytes_in += len(message.get("body", b""))
+            return message
+
+        async def counting_send(message: Message) -> None:
+            nonlocal status, bytes_out
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                bytes_out += len(message.get("body", b""))
+            await send(message)
+
+        rec, token = begin_request()
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, counting_receive, counting_send)
+        finally:
+            total = time.perf_counter() - t0
+            end_request(token)
+            endpoint = _endpoint(scope)
+            self.registry.count_request(endpoint, scope["method"], status)
+            self.registry.record(endpoint, rec, total, bytes_in, bytes_out)
+
+
+def _endpoint(scope: Scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class ProfilingMiddleware:
+    """
+    Profilage opt-in d'une requête (installé seulement si PROFILING_ENABLED) :
+    en-tête `X-Profile: 1` + `X-Profile-Token` (ignoré si aucun token n'est configuré :
+    tracemalloc ralentit tout le process) ou tirage à `sample_rate`. CPU + allocations sauvegardés dans `store`,
+    identifiant renvoyé dans l'en-tête `X-Profile-Id`.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        store: ProfileStore,
+        sample_rate: float = 0.0,
+        token: str | None = None,
+        exclude: tuple[str, ...] = ("/static", "/api/profiling", "/api/metrics"),
+    ) -> None:
+        self.app = app
+        self.store = store
+        self.sample_rate = sample_rate
+        self.token = token.encode() if token else None
+        self.exclude = exclude
+
+    def _wanted(self, scope: Scope) -> bool:
+        headers = dict(scope["headers"])
+        if headers.get(b"x-profile", b"").lower() in (b"1", b"true"):
+            # comparaison à temps constant : pas de fuite du token par la latence
+            return self.token is not None and hmac.compare_digest(
+                headers.get(b"x-profile-token", b""), self.token
+            )
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["path"].startswith(self.exclude)
+            or not self._wanted(scope)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = new_profile_id()
+        status = 500
+
+        async def tagged_send(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-id", profile_id.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        profile = RequestProfile()
+        token = profile.start()
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, receive, tagged_send)
+        finally:
+            duration = time.perf_counter() - t0
+            profile.stop(token)
+            meta = {
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "method": scope["method"],
+                "path": scope["path"],
+                "endpoint": _endpoint(scope),
+                "status": status,
+                "duration_s": duration,
+                "alloc_peak_bytes": profile.peak_bytes,
+            }
+            await run_in_threadpool(self._save, profile_id, meta, profile)
+
+    def _save(self, profile_id: str, meta: dict[str, Any], profile: RequestProfile) -> None:
+        meta["cpu_top"] = profile.cpu_summary()
+        meta["alloc_top"] = profile.alloc_summary()
+        try:
+            self.store.save(profile_id, meta, profile)
+        except OSError:
+            logger.exception("Failed to save request profile %s", profile_id)
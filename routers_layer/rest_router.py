@@ -1,52 +1,169 @@
 from __future__ import annotations
 
-from io import BytesIO
+import functools
+import hmac
+import itertools
+import json
+import logging
+import os
+import time
+import zlib
+from collections.abc import Iterator
+from contextlib import contextmanager
 from typing import Any
 
-import pandas as pd
-from fastapi import APIRouter, File, HTTPException, Request, UploadFile
-from fastapi.responses import StreamingResponse
-
-from data_layer.artifacts_repository import read_metadata
-from logic_layer.explain_service import profile_clusters
-from logic_layer.prediction_service import predict_batch, predict_one
+import numpy as np
+from fastapi import APIRouter, BackgroundTasks, File, HTTPException, Request, UploadFile
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+from data_layer.dataset_repository import (
+    MEDIA_TYPES,
+    DatasetReadError,
+    arrow_columns,
+    detect_format,
+    iter_arrow_batches,
+    iter_csv_chunks,
+    write_arrow_batches,
+)
+from data_layer.jobs_repository import JobStore
+from data_layer.profiling_repository import ProfileStore
+from data_layer.settings import (
+    BULK_BODY_LIMIT_BYTES,
+    BULK_ROWS_LIMIT,
+    PREDICTION_CACHE_DECIMALS,
+    PREVIEW_ROWS,
+    UPLOAD_CHUNK_ROWS,
+)
+from logic_layer.cache_service import cache_key
+from logic_layer.explain_service import ProfileAccumulator
+from logic_layer.metrics_service import count_rows, registry, stage, timed
+from logic_layer.online_service import OnlineKMeans, get_online_learner
+from logic_layer.parallel_service import get_parallel_scorer
+from logic_layer.prediction_service import predict_columns, predict_labels, predict_one
+from logic_layer.preprocessing import split_feature_types
+from routers_layer.scheduling import file_lane, job_lane, row_lane
+from routers_layer.serving import LoadedModel
 from schemas.rest import (
     ClusterFileResponse,
     ClusterRowRequest,
     ClusterRowResponse,
+    ClusterRowsResponse,
+    JobResponse,
     MetadataResponse,
 )
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 
-def _get_bundle(request: Request):
-    bundle = getattr(request.app.state, "bundle", None)
-    if bundle is None:
+async def _get_model(request: Request, version: str | None = None) -> LoadedModel:
+    """
+    Version courante, ou version épinglée via ?model_version=... (A/B).
+    Snapshot immuable : un hot reload pendant la requête ne change pas le modèle utilisé.
+    """
+    models = getattr(request.app.state, "models", None)
+    if models is None:
         raise HTTPException(status_code=503, detail="Model bundle not loaded.")
-    return bundle
+
+    model = models.cached(version)
+    if model is not None:
+        return model
+    try:
+        return await run_in_threadpool(models.get, version)
+    except (FileNotFoundError, ValueError) as e:
+        raise HTTPException(status_code=404, detail=f"Unknown model version: {version}") from e
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics() -> PlainTextResponse:
+    """
+    Latences par endpoint / étape (p50 / p95 / p99), lignes/s, octets : format Prometheus.
+    """
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
+def _profile_store(request: Request) -> ProfileStore:
+    store = getattr(request.app.state, "profile_store", None)
+    if store is None:
+        raise HTTPException(status_code=404, detail="Profiling is disabled.")
+    # sans PROFILING_TOKEN : profils échantillonnés seulement, jamais lisibles via l'API
+    token = getattr(request.app.state, "profiling_token", None)
+    if not token:
+        raise HTTPException(status_code=403, detail="Profiling endpoints require PROFILING_TOKEN.")
+    given = request.headers.get("x-profile-token", "").encode()
+    if not hmac.compare_digest(given, token.encode()):
+        raise HTTPException(status_code=403, detail="Invalid or missing X-Profile-Token.")
+    return store
+
+
+@router.get("/profiling")
+def list_profiles(request: Request) -> dict[str, Any]:
+    """
+    Profils de requêtes enregistrés (X-Profile: 1 ou échantillonnage), du plus récent au plus ancien.
+    """
+    return {"profiles": _profile_store(request).list()}
+
+
+@router.get("/profiling/{profile_id}")
+def get_request_profile(request: Request, profile_id: str) -> dict[str, Any]:
+    try:
+        return _profile_store(request).get(profile_id)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=f"Unknown profile: {profile_id}") from e
+
+
+@router.get("/profiling/{profile_id}/{kind}")
+def download_request_profile(request: Request, profile_id: str, kind: str) -> FileResponse:
+    """
+    Fichier brut : `cpu` (pstats, snakeviz / pstats.Stats) ou `alloc` (tracemalloc.Snapshot.load).
+    """
+    store = _profile_store(request)
+    try:
+        path = store.path(profile_id, kind) if kind != "meta" else None
+    except FileNotFoundError:
+        path = None
+    if path is None or not path.is_file():
+        raise HTTPException(status_code=404, detail=f"Unknown profile file: {profile_id}/{kind}")
+    return FileResponse(path, media_type="application/octet-stream", filename=path.name)
 
 
 @router.get("/health")
-def health() -> dict[str, str]:
+async def health() -> dict[str, str]:
     return {"status": "ok"}
 
 
 @router.get("/metadata", response_model=MetadataResponse)
-def metadata() -> Any:
-    return read_metadata()
+async def metadata(request: Request, model_version: str | None = None) -> Any:
+    model = await _get_model(request, model_version)
+    return {**model.bundle.metadata, "model_version": model.version}
 
 
 @router.get("/profiles")
-def get_profiles(request: Request) -> dict[str, Any]:
-    prof_map = getattr(request.app.state, "cluster_profile_map", {})
-    profiles = list(prof_map.values())
-    return {"profiles": profiles}
+async def get_profiles(request: Request, model_version: str | None = None) -> dict[str, Any]:
+    model = await _get_model(request, model_version)
+    profiles = list(model.cluster_profile_map.values())
+    return {"profiles": profiles, "model_version": model.version}
+
+
+@router.get("/models")
+def models_status(request: Request) -> dict[str, Any]:
+    models = getattr(request.app.state, "models", None)
+    if models is None:
+        raise HTTPException(status_code=503, detail="Model bundle not loaded.")
+    return models.stats()
 
 
 @router.post("/cluster/row", response_model=ClusterRowResponse)
-def cluster_row(request: Request, payload: ClusterRowRequest) -> ClusterRowResponse:
-    bundle = _get_bundle(request)
+async def cluster_row(
+    request: Request,
+    payload: ClusterRowRequest,
+    background: BackgroundTasks,
+    model_version: str | None = None,
+) -> ClusterRowResponse:
+    model = await _get_model(request, model_version)
+    bundle = model.bundle
 
     features = {
         "Gender": payload.Gender,
@@ -55,10 +172,34 @@ def cluster_row(request: Request, payload: ClusterRowRequest) -> ClusterRowRespo
         "Spending Score (1-100)": payload.Spending_Score,
     }
 
+    cache = getattr(request.app.state, "prediction_cache", None)
+    key = (
+        cache_key(model.version, features, bundle.expected_columns, PREDICTION_CACHE_DECIMALS)
+        if cache is not None
+        else None
+    )
+
     try:
-        cid = int(predict_one(bundle, features))
-        prof_map = getattr(request.app.state, "cluster_profile_map", {})
-        prof = prof_map.get(cid)
+        # niveau mémoire inline ; backend partagé (sqlite) hors de la boucle asyncio
+        cid = cache.get_local(key) if cache is not None else None
+        if cid is None and cache is not None and cache.backend is not None:
+            cid = await run_in_threadpool(cache.get_shared, key)
+        if cid is None:
+            batcher = getattr(request.app.state, "row_batcher", None)
+            if batcher is not None:
+                # slot tenu pendant l'attente du batch (même backpressure que le mode direct)
+                with row_lane.acquire():
+                    cid = int(await batcher.submit(bundle, features))
+            else:
+                cid = int(await row_lane.run(predict_one, bundle, features))
+            if cache is not None:
+                cache.put_local(key, cid)
+                if cache.backend is not None:
+                    # écriture partagée après l'envoi de la réponse (threadpool)
+                    background.add_task(cache.put_shared, key, cid)
+        count_rows(1)
+        _learn({c: [v] for c, v in features.items()}, 1)
+        prof = model.cluster_profile_map.get(cid)
 
         label = prof.get("label") if prof else None
         pct = prof.get("pct") if prof else None
@@ -67,79 +208,672 @@ def cluster_row(request: Request, payload: ClusterRowRequest) -> ClusterRowRespo
             cluster_id=cid,
             cluster_label=label,
             cluster_pct=pct,
+            model_version=model.version,
             warnings=[],
         )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e)) from e
 
 
-@router.post("/cluster/file", response_model=ClusterFileResponse)
-async def cluster_file(request: Request, file: UploadFile = File(...)) -> ClusterFileResponse:
-    bundle = _get_bundle(request)
+@router.get("/cluster/row/cache")
+def row_cache_stats(request: Request) -> dict[str, Any]:
+    cache = getattr(request.app.state, "prediction_cache", None)
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+
+@router.get("/cluster/row/batching")
+def row_batching_stats(request: Request) -> dict[str, Any]:
+    batcher = getattr(request.app.state, "row_batcher", None)
+    if batcher is None:
+        return {"enabled": False}
+    return {"enabled": True, **batcher.stats()}
+
+
+# colonne attendue -> clés acceptées dans le JSON (nom exact + nom de champ Pydantic)
+_ROW_KEYS: dict[str, tuple[str, ...]] = {
+    (f.alias or name): (f.alias or name, name)
+    for name, f in ClusterRowRequest.model_fields.items()
+}
+_MISSING = object()
+_MAX_REPORTED_ERRORS = 10
+
+
+def _learn(columns: Any, n_rows: int) -> None:
+    # apprentissage en ligne (ONLINE_LEARNING=1) : lignes scorées mises en file, sans attente
+    learner = get_online_learner()
+    if learner is not None and n_rows:
+        learner.observe(columns, n_rows)
+
+
+def _get_any(record: dict[str, Any], keys: tuple[str, ...]) -> Any:
+    for key in keys:
+        if key in record:
+            return record[key]
+    return _MISSING
+
+
+def _rows_payload_to_columns(payload: Any, expected_columns: list[str]) -> dict[str, list[Any]]:
+    """
+    Accepte {"col": [...], ...} (columnar) ou [{"col": v, ...}, ...] (records).
+    """
+    if isinstance(payload, dict):
+        return {c: _get_any(payload, _ROW_KEYS.get(c, (c,))) for c in expected_columns}
+    if isinstance(payload, list):
+        if not all(isinstance(r, dict) for r in payload):
+            raise HTTPException(status_code=422, detail="Records must be JSON objects.")
+        return {
+            c: [_get_any(r, _ROW_KEYS.get(c, (c,))) for r in payload] for c in expected_columns
+        }
+    raise HTTPException(
+        status_code=422, detail="Expected a JSON object (columnar) or array (records)."
+    )
+
+
+def _validate_rows_columns(
+    columns: dict[str, list[Any]],
+    expected_columns: list[str],
+) -> dict[str, np.ndarray]:
+    """
+    Validation vectorisée (une conversion NumPy par colonne, pas de modèle Pydantic par ligne).
+    """
+    errors: list[dict[str, Any]] = []
+
+    def invalid(col: str, idx: np.ndarray, msg: str) -> None:
+        for i in idx[:_MAX_REPORTED_ERRORS]:
+            errors.append({"loc": ["body", col, int(i)], "msg": msg})
+
+    missing = [c for c in expected_columns if not isinstance(columns[c], list)]
+    if missing:
+        raise HTTPException(
+            status_code=422,
+            detail=[{"loc": ["body", c], "msg": "Field required (array)"} for c in missing],
+        )
+
+    lengths = {c: len(v) for c, v in columns.items()}
+    if len(set(lengths.values())) > 1:
+        raise HTTPException(status_code=422, detail=f"Columns must have the same length: {lengths}")
+
+    _, categorical_cols = split_feature_types(expected_columns)
+    arrays: dict[str, np.ndarray] = {}
+    for col in expected_columns:
+        values = columns[col]
+        if col in categorical_cols:
+            arr = np.asarray(values, dtype=object)
+            is_str = np.fromiter((type(v) is str for v in values), dtype=bool, count=len(values))
+            invalid(col, np.flatnonzero(~is_str), "Input should be a valid string")
+        else:
+            try:
+                arr = np.asarray(values, dtype=np.float64)
+            except (TypeError, ValueError):
+                arr = np.asarray([_to_float(v) for v in values], dtype=np.float64)
+            invalid(col, np.flatnonzero(~np.isfinite(arr)), "Input should be a valid number")
+        arrays[col] = arr
+
+    if errors:
+        raise HTTPException(status_code=422, detail=errors[:_MAX_REPORTED_ERRORS])
+    return arrays
+
+
+def _to_float(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+async def _read_body(request: Request, limit: int) -> bytes:
+    """
+    Body limité à `limit` octets (413) : Content-Length vérifié d'abord, puis pendant la lecture.
+    """
+    declared = request.headers.get("content-length")
+    if declared is not None and declared.isdigit() and int(declared) > limit:
+        raise HTTPException(status_code=413, detail=f"Request body too large (> {limit} bytes).")
+
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > limit:
+            raise HTTPException(
+                status_code=413, detail=f"Request body too large (> {limit} bytes)."
+            )
+    return bytes(body)
+
+
+def _payload_rows(payload: Any) -> int:
+    # nb de lignes annoncé, sans rien convertir (borne le travail O(n) qui suit)
+    if isinstance(payload, list):
+        return len(payload)
+    if isinstance(payload, dict):
+        return max((len(v) for v in payload.values() if isinstance(v, list)), default=1)
+    return 0
+
+
+def _parse_rows(body: bytes, expected_columns: list[str]) -> tuple[dict[str, np.ndarray], int]:
+    """
+    JSON columnar ou records -> colonnes validées. 413 au-delà de BULK_ROWS_LIMIT lignes,
+    vérifié avant toute conversion / validation.
+    """
+    try:
+        with stage("parse"):
+            payload = json.loads(body)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON: {e}") from e
+
+    n_rows = _payload_rows(payload)
+    if n_rows > BULK_ROWS_LIMIT:
+        raise HTTPException(
+            status_code=413, detail=f"Too many rows ({n_rows} > {BULK_ROWS_LIMIT})."
+        )
+
+    with stage("validate"):
+        columns = _rows_payload_to_columns(payload, expected_columns)
+        arrays = _validate_rows_columns(columns, expected_columns)
+    n_rows = len(next(iter(arrays.values()))) if arrays else 0
+    return arrays, n_rows
 
-    if not file.filename.lower().endswith(".csv"):
-        raise HTTPException(status_code=400, detail="Only CSV files are supported.")
 
-    content = await file.read()
+def _score_rows(model: LoadedModel, body: bytes) -> JSONResponse:
+    bundle, prof_map = model.bundle, model.cluster_profile_map
+    arrays, n_rows = _parse_rows(body, bundle.expected_columns)
+
     try:
-        df_raw = pd.read_csv(BytesIO(content))
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"CSV read error: {e}") from e
+        cids = predict_columns(bundle, arrays)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
 
-    # Optionnel: drop CustomerID si présent
-    if "CustomerID" in df_raw.columns:
-        df_raw = df_raw.drop(columns=["CustomerID"])
+    count_rows(n_rows)
+    _learn(arrays, n_rows)
+
+    # label par cluster via une table indexée (pas de lookup dict par ligne)
+    n_lookup = int(cids.max()) + 1 if n_rows else 0
+    lookup = np.array([prof_map.get(k, {}).get("label") for k in range(n_lookup)], dtype=object)
+
+    # réponse sérialisée directement (pas de re-validation Pydantic de 100k éléments)
+    with stage("serialize"):
+        return JSONResponse(
+            {
+                "n_rows": n_rows,
+                "cluster_ids": cids.tolist(),
+                "cluster_labels": lookup[cids].tolist(),
+                "model_version": model.version,
+                "warnings": [],
+            }
+        )
 
-    # Prédiction batch
-    clusters = predict_batch(bundle, df_raw)
-    df_out = df_raw.copy()
-    df_out["cluster_id"] = clusters
 
-    # Counts
-    cluster_counts = df_out["cluster_id"].value_counts().sort_index()
-    cluster_counts_dict = {str(int(k)): int(v) for k, v in cluster_counts.items()}
+@router.post(
+    "/cluster/rows",
+    response_model=ClusterRowsResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "example": {
+                        "Gender": ["Male", "Female"],
+                        "Age": [30, 22],
+                        "Annual Income (k$)": [60, 40],
+                        "Spending Score (1-100)": [50, 70],
+                    }
+                }
+            },
+        }
+    },
+)
+async def cluster_rows(request: Request, model_version: str | None = None) -> JSONResponse:
+    """
+    Scoring en masse : body JSON columnar (un tableau par feature) ou liste de records.
+    """
+    model = await _get_model(request, model_version)
+    body = await _read_body(request, BULK_BODY_LIMIT_BYTES)
+    return await file_lane.run(_score_rows, model, body)
 
-    # Preview (20 lignes)
-    preview = df_out.head(20).to_dict(orient="records")
 
-    # Profils (sur ce batch)
-    prof = profile_clusters(bundle, df_raw)
-    profiles = prof["profiles"]
+_FORMAT_NAMES = {"csv": "CSV", "parquet": "Parquet", "arrow": "Arrow IPC"}
+_FORMAT_SUFFIXES = {"csv": ".csv", "parquet": ".parquet", "arrow": ".arrow"}
+
+# Dernière ligne d'un export CSV interrompu par une erreur dans un bloc après le premier
+EXPORT_ERROR_MARKER = "#export-error:"
+
+# (bloc brut : DataFrame ou RecordBatch, features passées au modèle, clusters)
+ScoredChunk = tuple[Any, Any, np.ndarray]
+
+
+def _upload_format(file: UploadFile) -> str:
+    fmt = detect_format(file.filename, file.content_type)
+    if fmt is None:
+        raise HTTPException(
+            status_code=400, detail="Only CSV, Parquet or Arrow IPC files are supported."
+        )
+    return fmt
+
+
+@contextmanager
+def _upload_errors(fmt: str = "csv") -> Iterator[None]:
+    try:
+        yield
+    except DatasetReadError as e:
+        raise HTTPException(status_code=400, detail=f"{_FORMAT_NAMES[fmt]} read error: {e}") from e
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+
+def _upload_chunk_rows() -> int:
+    # scoring multi-process actif : blocs assez gros pour franchir le seuil parallèle
+    scorer = get_parallel_scorer()
+    return max(UPLOAD_CHUNK_ROWS, scorer.min_rows) if scorer else UPLOAD_CHUNK_ROWS
+
+
+def _scored_chunks(
+    bundle: Any,
+    source: Any,
+    fmt: str,
+    project: bool = False,
+) -> Iterator[ScoredChunk]:
+    """
+    project=True : formats colonnes (Parquet / Arrow) lus sur expected_columns uniquement.
+    """
+    if fmt == "csv":
+        for chunk in timed("parse", iter_csv_chunks(source, _upload_chunk_rows())):
+            count_rows(len(chunk))
+            clusters = predict_labels(bundle, chunk)
+            _learn(chunk, len(chunk))
+            yield chunk, chunk, clusters
+        return
+
+    columns = bundle.expected_columns if project else None
+    batches = iter_arrow_batches(source, fmt, columns, _upload_chunk_rows())
+    for batch in timed("parse", batches):
+        count_rows(batch.num_rows)
+        # colonnes numériques Arrow sans null -> vues NumPy, sans copie
+        features = arrow_columns(batch, bundle.expected_columns)
+        clusters = predict_columns(bundle, features)
+        _learn(features, batch.num_rows)
+        yield batch, features, clusters
+
+
+@stage("serialize")
+def _preview_records(chunk: Any, clusters: np.ndarray, n: int) -> list[dict[str, Any]]:
+    if not hasattr(chunk, "to_pylist"):
+        return chunk.head(n).assign(cluster_id=clusters[:n]).to_dict(orient="records")
+    # RecordBatch Arrow
+    records = chunk.slice(0, n).to_pylist()
+    for record, cid in zip(records, clusters[:n].tolist(), strict=True):
+        record["cluster_id"] = cid
+    return records
+
+
+def _score_upload(
+    bundle: Any,
+    source: Any,
+    fmt: str,
+    version: str | None = None,
+) -> ClusterFileResponse:
+    """
+    Parse + prédiction + profils par blocs de lignes : la mémoire reste bornée
+    quelle que soit la taille du fichier (seules PREVIEW_ROWS lignes sont gardées).
+    """
+    acc = ProfileAccumulator()
+    preview: list[dict[str, Any]] = []
+
+    with _upload_errors(fmt):
+        for _ in _summarize(_scored_chunks(bundle, source, fmt, project=True), acc, preview):
+            pass
+
+    return _file_response(acc, preview, version)
+
+
+def _summarize(
+    chunks: Iterator[ScoredChunk],
+    acc: ProfileAccumulator,
+    preview: list[dict[str, Any]],
+) -> Iterator[ScoredChunk]:
+    """
+    Alimente les profils et l'aperçu au passage de chaque bloc (blocs renvoyés tels quels).
+    """
+    for chunk, features, clusters in chunks:
+        acc.update(features, clusters)
+
+        missing = PREVIEW_ROWS - len(preview)
+        if missing > 0:
+            preview.extend(_preview_records(chunk, clusters, missing))
+        yield chunk, features, clusters
+
+
+def _file_response(
+    acc: ProfileAccumulator,
+    preview: list[dict[str, Any]],
+    version: str | None,
+) -> ClusterFileResponse:
+    prof = acc.finalize()
 
     return ClusterFileResponse(
-        n_rows=int(df_out.shape[0]),
-        cluster_counts=cluster_counts_dict,
-        profiles=profiles,
+        n_rows=prof["n_rows"],
+        cluster_counts=acc.cluster_counts(),
+        profiles=prof["profiles"],
         preview=preview,
-        warnings=[],
+        model_version=version,
+        warnings=prof["warnings"],
     )
 
 
+def _start_export(
+    bundle: Any,
+    source: Any,
+    fmt: str,
+) -> tuple[ScoredChunk | None, Iterator[ScoredChunk]]:
+    """
+    Parse + prédit le premier bloc avant d'envoyer les en-têtes HTTP,
+    pour que les erreurs de format restent des 400.
+    """
+    scored = _scored_chunks(bundle, source, fmt)
+    with _upload_errors(fmt):
+        first = next(scored, None)
+    return first, scored
+
+
+def _serialize_export(chunks: Iterator[ScoredChunk], fmt: str) -> Iterator[bytes]:
+    if fmt != "csv":
+        # même format binaire que l'entrée, colonne cluster_id ajoutée sans copie
+        batches = (batch.append_column("cluster_id", clusters) for batch, _, clusters in chunks)
+        yield from write_arrow_batches(batches, fmt)
+        return
+
+    header = True
+    for chunk, _, clusters in chunks:
+        with stage("serialize"):
+            data = chunk.assign(cluster_id=clusters).to_csv(index=False, header=header)
+        yield data.encode("utf-8")
+        header = False
+
+
+def _iter_export(
+    first: ScoredChunk | None,
+    scored: Iterator[ScoredChunk],
+    fmt: str,
+    compress: bool,
+) -> Iterator[bytes]:
+    """
+    Générateur : un bloc parsé -> prédit -> sérialisé -> envoyé. Rien n'est matérialisé.
+
+    Seul le premier bloc est validé avant l'envoi des en-têtes (200). Une erreur dans un
+    bloc suivant ne peut plus devenir un 400 : une ligne EXPORT_ERROR_MARKER est ajoutée
+    (CSV), puis le flux est interrompu sans fin de réponse HTTP ni trailer gzip, pour que
+    le client ne prenne pas un fichier tronqué pour un téléchargement complet.
+    """
+    gz = zlib.compressobj(wbits=31) if compress else None  # wbits=31 -> format gzip
+    chunks = itertools.chain([first] if first is not None else [], scored)
+
+    try:
+        for data in _serialize_export(chunks, fmt):
+            if gz is not None:
+                data = gz.compress(data)
+            if data:
+                yield data
+    except ValueError as e:
+        if fmt == "csv":
+            marker = f"{EXPORT_ERROR_MARKER} {e}\n".encode()
+            # Z_SYNC_FLUSH : marqueur lisible, mais pas de trailer gzip (archive incomplète)
+            yield gz.compress(marker) + gz.flush(zlib.Z_SYNC_FLUSH) if gz is not None else marker
+        raise
+
+    if gz is not None:
+        yield gz.flush()
+
+
+@router.post("/cluster/file", response_model=ClusterFileResponse)
+async def cluster_file(
+    request: Request,
+    file: UploadFile = File(...),
+    model_version: str | None = None,
+) -> ClusterFileResponse:
+    model = await _get_model(request, model_version)
+    fmt = _upload_format(file)
+
+    # Lecture en streaming depuis le fichier temporaire de l'upload (lane "file", hors event loop)
+    return await file_lane.run(_score_upload, model.bundle, file.file, fmt, model.version)
+
+
 @router.post("/cluster/file/export")
-async def cluster_file_export(request: Request, file: UploadFile = File(...)):
-    bundle = _get_bundle(request)
+async def cluster_file_export(
+    request: Request,
+    file: UploadFile = File(...),
+    gzip: bool = False,
+    model_version: str | None = None,
+):
+    model = await _get_model(request, model_version)
+    fmt = _upload_format(file)
+
+    # Slot tenu pendant tout le streaming (libéré à la fin du générateur)
+    slot = file_lane.acquire()
+    try:
+        first, scored = await file_lane.call(_start_export, model.bundle, file.file, fmt)
+    except BaseException:
+        slot.release()
+        raise
+
+    filename = file.filename.rsplit(".", 1)[0] + "_clustered" + _FORMAT_SUFFIXES[fmt]
+    media_type = MEDIA_TYPES[fmt]
+    if gzip:
+        filename += ".gz"
+        media_type = "application/gzip"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if model.version is not None:
+        headers["X-Model-Version"] = model.version
+
+    # Chaque bloc est parsé / prédit / sérialisé dans la lane "file"
+    return StreamingResponse(
+        file_lane.stream(slot, _iter_export(first, scored, fmt, gzip)),
+        media_type=media_type,
+        headers=headers,
+    )
 
-    if not file.filename.lower().endswith(".csv"):
-        raise HTTPException(status_code=400, detail="Only CSV files are supported.")
 
-    content = await file.read()
+# ---------------------------------------------------------------------------
+# Jobs asynchrones : gros fichiers traités en fond (lane "job"), progression pollable
+# ---------------------------------------------------------------------------
+
+
+def _job_store(request: Request) -> JobStore:
+    store = getattr(request.app.state, "job_store", None)
+    if store is None:
+        raise HTTPException(status_code=503, detail="Job store not available.")
+    return store
+
+
+def _track_progress(
+    store: JobStore,
+    job_id: str,
+    source: Any,
+    size: int,
+    chunks: Iterator[ScoredChunk],
+) -> Iterator[ScoredChunk]:
+    """
+    Progression publiée après chaque bloc : lignes traitées, part du fichier lue (octets).
+    """
+    t0 = time.perf_counter()
+    rows = 0
+    for item in chunks:
+        rows += len(item[2])
+        fraction = source.tell() / size if size else 1.0
+        store.progress(job_id, rows, time.perf_counter() - t0, fraction)
+        yield item
+
+
+def _run_job(store: JobStore, job_id: str, model: LoadedModel, fmt: str, compress: bool) -> None:
+    """
+    Même chaîne que /cluster/file + /cluster/file/export, en une seule passe sur le fichier :
+    blocs parsés -> prédits -> profils / aperçu -> export écrit sur disque.
+    """
+    acc = ProfileAccumulator()
+    preview: list[dict[str, Any]] = []
+    export = store.path(job_id, "export")
     try:
-        df_raw = pd.read_csv(BytesIO(content))
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"CSV read error: {e}") from e
+        # dans le try : un échec d'écriture de l'état ne laisse pas le job "queued"
+        store.start(job_id)
+        with (
+            _upload_errors(fmt),
+            open(store.path(job_id, "input"), "rb") as source,
+            open(export, "wb") as out,
+        ):
+            size = os.fstat(source.fileno()).st_size
+            chunks = _scored_chunks(model.bundle, source, fmt)
+            chunks = _track_progress(store, job_id, source, size, _summarize(chunks, acc, preview))
+            for data in _iter_export(None, chunks, fmt, compress):
+                out.write(data)
+        result = _file_response(acc, preview, model.version)
+        store.finish(job_id, result.model_dump(mode="json"))
+    except HTTPException as e:
+        store.fail(job_id, str(e.detail))
+    except Exception:
+        logger.exception("Segmentation job %s failed", job_id)
+        store.fail(job_id, "Internal error while processing the file.")
+
+
+@router.post("/jobs", response_model=JobResponse, status_code=202)
+async def submit_job(
+    request: Request,
+    file: UploadFile = File(...),
+    gzip: bool = False,
+    model_version: str | None = None,
+) -> Any:
+    """
+    Segmentation asynchrone d'un gros fichier (CSV / Parquet / Arrow) : réponse immédiate
+    avec l'identifiant du job, à suivre via GET /api/jobs/{job_id}.
+    """
+    store = _job_store(request)
+    model = await _get_model(request, model_version)
+    fmt = _upload_format(file)
+
+    # slot réservé avant la copie : file pleine -> 429 sans écrire le fichier sur disque
+    slot = job_lane.acquire()
+    try:
+        job = await run_in_threadpool(
+            functools.partial(
+                store.create,
+                file.file,
+                filename=file.filename,
+                format=fmt,
+                gzip=gzip,
+                model_version=model.version,
+            )
+        )
+    except BaseException:
+        slot.release()
+        raise
+    job_lane.submit(slot, _run_job, store, job["job_id"], model, fmt, gzip)
+    return job
+
+
+@router.get("/jobs")
+def jobs_status(request: Request) -> dict[str, Any]:
+    """
+    Effectifs par statut + occupation de la lane. Aucun identifiant listé : l'id renvoyé
+    à la soumission est le seul accès aux résultats (export client enrichi).
+    """
+    store = _job_store(request)
+    store.cleanup()
+    counts: dict[str, int] = {}
+    for job in store.list():
+        counts[job["status"]] = counts.get(job["status"], 0) + 1
+    return {"counts": counts, "lane": job_lane.stats()}
+
+
+def _get_job(store: JobStore, job_id: str) -> dict[str, Any]:
+    try:
+        return store.get(job_id)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}") from e
+
+
+def _finished_job(store: JobStore, job_id: str) -> dict[str, Any]:
+    job = _get_job(store, job_id)
+    if job["status"] == "failed":
+        raise HTTPException(status_code=409, detail=f"Job failed: {job['error']}")
+    if job["status"] != "succeeded":
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}, retry later.")
+    return job
+
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+def get_job(request: Request, job_id: str) -> Any:
+    return _get_job(_job_store(request), job_id)
+
+
+@router.get("/jobs/{job_id}/result", response_model=ClusterFileResponse)
+def get_job_result(request: Request, job_id: str) -> Any:
+    store = _job_store(request)
+    _finished_job(store, job_id)
+    return store.result(job_id)
+
+
+@router.get("/jobs/{job_id}/export")
+def download_job_export(request: Request, job_id: str) -> FileResponse:
+    store = _job_store(request)
+    job = _finished_job(store, job_id)
+
+    fmt = job["format"]
+    filename = job["filename"].rsplit(".", 1)[0] + "_clustered" + _FORMAT_SUFFIXES[fmt]
+    media_type = MEDIA_TYPES[fmt]
+    if job["gzip"]:
+        filename += ".gz"
+        media_type = "application/gzip"
+    headers = {"X-Model-Version": job["model_version"]} if job["model_version"] else None
+    return FileResponse(
+        store.path(job_id, "export"), media_type=media_type, filename=filename, headers=headers
+    )
 
-    if "CustomerID" in df_raw.columns:
-        df_raw = df_raw.drop(columns=["CustomerID"])
 
-    clusters = predict_batch(bundle, df_raw)
-    df_out = df_raw.copy()
-    df_out["cluster_id"] = clusters
+# ---------------------------------------------------------------------------
+# Apprentissage en ligne des centroïdes (ONLINE_LEARNING=1)
+# ---------------------------------------------------------------------------
 
-    bio = BytesIO()
-    df_out.to_csv(bio, index=False)
-    bio.seek(0)
 
-    filename = file.filename.rsplit(".", 1)[0] + "_clustered.csv"
-    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+def _learner() -> OnlineKMeans:
+    learner = get_online_learner()
+    if learner is None:
+        raise HTTPException(status_code=404, detail="Online learning is disabled.")
+    return learner
+
+
+@router.get("/online")
+def online_stats() -> dict[str, Any]:
+    learner = get_online_learner()
+    if learner is None:
+        return {"enabled": False}
+    return {"enabled": True, **learner.stats()}
+
+
+def _ingest_rows(learner: OnlineKMeans, expected_columns: list[str], body: bytes) -> dict[str, Any]:
+    arrays, n_rows = _parse_rows(body, expected_columns)
+    accepted = learner.observe(arrays, n_rows) if n_rows else True
+    return {"n_rows": n_rows, "accepted": accepted}
+
+
+@router.post("/online/ingest")
+async def online_ingest(request: Request) -> dict[str, Any]:
+    """
+    Lignes observées sans scoring (même format que /api/cluster/rows).
+    accepted=False : file d'apprentissage pleine, lot ignoré.
+    """
+    learner = _learner()
+    model = await _get_model(request)
+    body = await _read_body(request, BULK_BODY_LIMIT_BYTES)
+    return await file_lane.run(_ingest_rows, learner, model.bundle.expected_columns, body)
+
+
+@router.post("/online/checkpoint")
+async def online_checkpoint(request: Request) -> dict[str, Any]:
+    """
+    Checkpoint immédiat (lignes en file absorbées d'abord) : nouvelle version servie.
+    """
+    learner = _learner()
+
+    def run() -> str | None:
+        learner.flush()
+        return learner.checkpoint(force=True)
 
-    return StreamingResponse(bio, media_type="text/csv", headers=headers)
+    version = await run_in_threadpool(run)
+    return {"model_version": version, **learner.stats()}
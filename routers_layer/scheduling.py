@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+import threading
+from collections.abc import AsyncIterator, Callable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, TypeVar
+
+from fastapi import HTTPException
+
+from data_layer.settings import (
+    FILE_LANE_QUEUE,
+    FILE_LANE_WORKERS,
+    JOB_QUEUE,
+    JOB_WORKERS,
+    ROW_LANE_QUEUE,
+    ROW_LANE_WORKERS,
+)
+from logic_layer.profiling_service import run_profiled
+
+T = TypeVar("T")
+
+
+class LaneSlot:
+    """
+    Place réservée dans une lane (libération idempotente).
+    """
+
+    def __init__(self, lane: Lane) -> None:
+        self._lane = lane
+        self._released = False
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self._lane._release()
+
+    def __enter__(self) -> LaneSlot:
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.release()
+
+
+class Lane:
+    """
+    Voie d'exécution dédiée pour le travail CPU bloquant :
+    - pool de threads propre (max_workers) -> les fichiers lourds ne bloquent ni
+      l'event loop ni les lookups légers
+    - backpressure : au-delà de max_workers + max_queue requêtes en cours -> 429
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int) -> None:
+        self.name = name
+        self.max_workers = max(1, int(max_workers))
+        self.max_queue = max(0, int(max_queue))
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.rejected = 0
+
+    @property
+    def limit(self) -> int:
+        return self.max_workers + self.max_queue
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # créé à la demande : la lane redevient utilisable après un shutdown (reload, tests)
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    self.max_workers, thread_name_prefix=f"lane-{self.name}"
+                )
+            return self._executor
+
+    def acquire(self) -> LaneSlot:
+        with self._lock:
+            if self._pending >= self.limit:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=429,
+                    detail=f"Server busy ({self.name} lane saturated), retry later.",
+                    headers={"Retry-After": "1"},
+                )
+            self._pending += 1
+        return LaneSlot(self)
+
+    def _release(self) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    async def call(self, fn: Callable[..., T], *args: Any) -> T:
+        """
+        Exécute fn dans le pool de la lane (slot déjà réservé par l'appelant),
+        avec le contexte de la requête (contextvars : métriques par étape,
+        profil CPU si la requête est profilée).
+        """
+        loop = asyncio.get_running_loop()
+        ctx = contextvars.copy_context()
+        return await loop.run_in_executor(
+            self._get_executor(), functools.partial(ctx.run, run_profiled, fn, *args)
+        )
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        with self.acquire():
+            return await self.call(fn, *args)
+
+    def submit(self, slot: LaneSlot, fn: Callable[..., T], *args: Any) -> Future[T]:
+        """
+        Tâche de fond (hors requête) : le slot est libéré à la fin de la tâche, et non
+        à la fin de la requête qui l'a soumise. Pas de contexte de requête propagé.
+        """
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            slot.release()
+            raise
+        future.add_done_callback(lambda _: slot.release())
+        return future
+
+    async def stream(self, slot: LaneSlot, it: Iterator[T]) -> AsyncIterator[T]:
+        """
+        Itère un générateur synchrone dans la lane ; le slot est tenu jusqu'à la fin du flux.
+        """
+        done = object()
+        try:
+            while True:
+                item = await self.call(next, it, done)
+                if item is done:
+                    return
+                yield item
+        finally:
+            slot.release()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "pending": self._pending,
+            "limit": self.limit,
+            "workers": self.max_workers,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Uploads lourds, lookups unitaires et jobs de fond ne partagent jamais la même voie
+file_lane = Lane("file", FILE_LANE_WORKERS, FILE_LANE_QUEUE)
+row_lane = Lane("row", ROW_LANE_WORKERS, ROW_LANE_QUEUE)
+job_lane = Lane("job", JOB_WORKERS, JOB_QUEUE)
+
+
+def shutdown_lanes() -> None:
+    file_lane.shutdown()
+    row_lane.shutdown()
+    job_lane.shutdown()
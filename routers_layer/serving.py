@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import logging
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any
+
+from data_layer.artifacts_repository import (
+    current_version,
+    list_versions,
+    load_bundle,
+    load_reference_profiles,
+    prune_online_versions,
+    publish_bundle,
+    resolve_artifacts_dir,
+    save_reference_profiles,
+    set_current_version,
+)
+from data_layer.dataset_repository import load_csv
+from logic_layer.domain import ClusteringBundle
+from logic_layer.explain_service import profile_clusters
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class LoadedModel:
+    """
+    Version servie : bundle + profils du dataset de référence (immuable, swap atomique).
+    """
+
+    version: str | None
+    bundle: ClusteringBundle
+    cluster_profile_map: dict[int, dict[str, Any]]
+    ref_n_rows: int
+
+
+def _reference_profile(bundle: ClusteringBundle, ref_path: str) -> dict[str, Any]:
+    # CSV lu en memory-map, colonnes utiles seulement
+    return profile_clusters(bundle, load_csv(ref_path, columns=bundle.expected_columns))
+
+
+def load_model(
+    version: str | None = None,
+    ref_path: str | None = None,
+    inference_only: bool = False,
+    artifacts_dir: str | None = None,
+) -> LoadedModel:
+    """
+    Charge une version (courante par défaut) avec ses profils de référence :
+    cache précalculé par scripts.train, sinon recalcul + écriture du cache.
+    """
+    base, version = resolve_artifacts_dir(artifacts_dir, version)
+    bundle = load_bundle(str(base), inference_only=inference_only)
+
+    prof = load_reference_profiles(ref_path, str(base)) if ref_path else None
+    if prof is None and ref_path:
+        # Cache absent ou périmé : recalcul
+        prof = _reference_profile(bundle, ref_path)
+        # Best effort : le worker suivant repartira du cache (artifacts/ peut être en lecture seule)
+        try:
+            save_reference_profiles(prof, ref_path, str(base))
+        except OSError:
+            pass
+
+    prof = prof or {"n_rows": 0, "profiles": []}
+    return LoadedModel(
+        version=version,
+        bundle=bundle,
+        cluster_profile_map={p["cluster_id"]: p for p in prof["profiles"]},
+        ref_n_rows=int(prof["n_rows"]),
+    )
+
+
+def publish_checkpoint(
+    bundle: ClusteringBundle,
+    ref_path: str | None = None,
+    artifacts_dir: str | None = None,
+    keep_versions: int = 0,
+) -> str:
+    """
+    Publie un checkpoint de l'apprentissage en ligne :
+    - nouvelle version + profils de référence écrits AVANT la bascule de CURRENT
+      (les workers qui rechargent lisent le cache au lieu de re-profiler)
+    - rétention : seuls les `keep_versions` checkpoints les plus récents sont gardés (0 : tous)
+    """
+    version = publish_bundle(bundle, artifacts_dir, activate=False)
+    if ref_path:
+        prof = _reference_profile(bundle, ref_path)
+        save_reference_profiles(prof, ref_path, artifacts_dir, version=version)
+    set_current_version(version, artifacts_dir)
+
+    if keep_versions > 0:
+        # Best effort : une version non supprimée le sera au checkpoint suivant
+        try:
+            removed = prune_online_versions(keep_versions, artifacts_dir)
+        except OSError:
+            logger.exception("Pruning online checkpoints failed")
+        else:
+            if removed:
+                logger.info("Pruned online checkpoints: %s", ", ".join(removed))
+    return version
+
+
+class ModelServer:
+    """
+    Versions servies par un worker :
+    - `current` : version pointée par CURRENT, rechargée à chaud par refresh()
+      (nouvelle version + profils chargés AVANT le swap : aucune requête n'attend)
+    - versions épinglées (?model_version=...) chargées à la demande, LRU borné
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[str | None], LoadedModel],
+        max_pinned: int = 4,
+        on_swap: Callable[[LoadedModel], None] | None = None,
+        artifacts_dir: str | None = None,
+    ) -> None:
+        self._loader = loader
+        self._max_pinned = max(0, int(max_pinned))
+        self._on_swap = on_swap
+        self._artifacts_dir = artifacts_dir
+        self._pinned: OrderedDict[str, LoadedModel] = OrderedDict()
+        # chargements en cours : une version demandée en parallèle n'est chargée qu'une fois
+        self._loading: dict[str, Future[LoadedModel]] = {}
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher: threading.Thread | None = None
+        self.reloads = 0
+        self._current = self._swap(loader(None))
+
+    @property
+    def current(self) -> LoadedModel:
+        return self._current
+
+    def _swap(self, model: LoadedModel) -> LoadedModel:
+        self._current = model  # affectation atomique : les requêtes en cours gardent leur version
+        if self._on_swap is not None:
+            self._on_swap(model)
+        return model
+
+    def cached(self, version: str | None) -> LoadedModel | None:
+        """
+        Version déjà en mémoire (sans I/O), None sinon.
+        """
+        current = self._current
+        if version is None or version == current.version:
+            return current
+        with self._lock:
+            model = self._pinned.get(version)
+            if model is not None:
+                self._pinned.move_to_end(version)
+            return model
+
+    def get(self, version: str | None = None) -> LoadedModel:
+        """
+        Version demandée (chargée si besoin). FileNotFoundError / ValueError si inconnue.
+        """
+        model = self.cached(version)
+        if model is not None:
+            return model
+
+        with self._lock:
+            model = self._pinned.get(version)
+            if model is not None:
+                return model
+            future = self._loading.get(version)
+            loading = future is None
+            if loading:
+                future = self._loading[version] = Future()
+        if not loading:
+            return future.result()
+
+        try:
+            model = self._loader(version)
+        except BaseException as e:
+            with self._lock:
+                del self._loading[version]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            del self._loading[version]
+            self._pinned[version] = model
+            self._pinned.move_to_end(version)
+            while len(self._pinned) > self._max_pinned:
+                self._pinned.popitem(last=False)
+        future.set_result(model)
+        return model
+
+    def refresh(self) -> bool:
+        """
+        Recharge si CURRENT pointe vers une autre version. True si un swap a eu lieu.
+        """
+        with self._reload_lock:
+            target = current_version(self._artifacts_dir)
+            if target is None or target == self._current.version:
+                return False
+
+            with self._lock:
+                model = self._pinned.pop(target, None)
+            if model is None:
+                model = self._loader(target)
+
+            self._swap(model)
+            self.reloads += 1
+            logger.info("Model version %s is now served", target)
+            return True
+
+    def _watch(self, interval_s: float) -> None:
+        while not self._stop.wait(interval_s):
+            try:
+                self.refresh()
+            except Exception:
+                # version cassée : on continue de servir l'ancienne
+                logger.exception("Model reload failed, keeping version %s", self._current.version)
+
+    def start(self, interval_s: float) -> None:
+        if interval_s <= 0 or self._watcher is not None:
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(
+            target=self._watch, args=(interval_s,), name="model-reload", daemon=True
+        )
+        self._watcher.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            pinned = list(self._pinned)
+        return {
+            "current": self._current.version,
+            "loaded": pinned,
+            "available": list_versions(self._artifacts_dir),
+            "reloads": self.reloads,
+        }
@@ -1,14 +1,22 @@
+from functools import cache
 from pathlib import Path
 
 from fastapi import APIRouter, Request
 from fastapi.responses import HTMLResponse
-from fastapi.templating import Jinja2Templates
 
 router = APIRouter()
 
 BASE_DIR = Path(__file__).resolve().parents[1]  # racine du projet
-templates = Jinja2Templates(directory=str(BASE_DIR / "web" / "templates"))
+
+
+@cache
+def _templates():
+    # Jinja2 chargé au premier rendu du dashboard (pas au démarrage de l'API)
+    from fastapi.templating import Jinja2Templates
+
+    return Jinja2Templates(directory=str(BASE_DIR / "web" / "templates"))
+
 
 @router.get("/", response_class=HTMLResponse)
 def dashboard(request: Request):
-    return templates.TemplateResponse("dashboard.html", {"request": request})
+    return _templates().TemplateResponse("dashboard.html", {"request": request})
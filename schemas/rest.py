@@ -11,6 +11,9 @@ class ClusterProfile(BaseModel):
     mean_income: float
     mean_spending: float
     label: str
+    std_age: float | None = None
+    std_income: float | None = None
+    std_spending: float | None = None
 
 
 class ClusterRowRequest(BaseModel):
@@ -27,6 +30,15 @@ class ClusterRowResponse(BaseModel):
     cluster_id: int
     cluster_label: str | None = None
     cluster_pct: float | None = None
+    model_version: str | None = None
+    warnings: list[str] = []
+
+
+class ClusterRowsResponse(BaseModel):
+    n_rows: int
+    cluster_ids: list[int]
+    cluster_labels: list[str | None]
+    model_version: str | None = None
     warnings: list[str] = []
 
 
@@ -35,6 +47,7 @@ class ClusterFileResponse(BaseModel):
     cluster_counts: dict[str, int]
     profiles: list[ClusterProfile] = []
     preview: list[dict[str, Any]]
+    model_version: str | None = None
     warnings: list[str] = []
 
 
@@ -43,3 +56,23 @@ class MetadataResponse(BaseModel):
     expected_columns: list[str]
     params: dict[str, Any]
     metrics: dict[str, float]
+    model_version: str | None = None
+
+
+class JobResponse(BaseModel):
+    job_id: str
+    status: str
+    filename: str
+    format: str
+    gzip: bool = False
+    model_version: str | None = None
+    created_at: float
+    started_at: float | None = None
+    finished_at: float | None = None
+    input_bytes: int
+    rows_done: int
+    rows_total: int | None = None
+    rows_per_s: float | None = None
+    progress: float
+    eta_s: float | None = None
+    error: str | None = None
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from data_layer.settings import PROJECT_ROOT
+
+# Exécuté dans un interpréteur neuf : import de main puis startup (prêt à servir)
+_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import main
+t1 = time.perf_counter()
+main._startup()
+main.app.state.bundle.engine.predict_one(
+    {"Gender": "Male", "Age": 30, "Annual Income (k$)": 60, "Spending Score (1-100)": 50}
+)
+t2 = time.perf_counter()
+main._shutdown()
+heavy = ("pandas", "sklearn", "scipy", "joblib", "jinja2")
+print(json.dumps({
+    "import_s": t1 - t0,
+    "ready_s": t2 - t0,
+    "loaded": [m for m in heavy if m in sys.modules],
+}))
+"""
+
+MODES = {"full": "0", "inference-only": "1"}
+
+
+def _probe(inference_only: str) -> dict:
+    env = dict(os.environ, INFERENCE_ONLY=inference_only)
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE],
+        cwd=PROJECT_ROOT,
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    """
+    Temps d'import + temps jusqu'à "prêt à servir" (startup + 1re prédiction),
+    médiane sur N lancements à froid, pour les deux modes de démarrage.
+    """
+    parser = argparse.ArgumentParser(description="Startup-time benchmark (full vs inference-only)")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    results = {}
+    for mode, flag in MODES.items():
+        runs = [_probe(flag) for _ in range(args.runs)]
+        results[mode] = {
+            "import_s": statistics.median(r["import_s"] for r in runs),
+            "ready_s": statistics.median(r["ready_s"] for r in runs),
+            "loaded": runs[-1]["loaded"],
+        }
+
+    for mode, r in results.items():
+        print(
+            f"{mode:>15}: import {r['import_s'] * 1000:7.1f} ms | "
+            f"ready {r['ready_s'] * 1000:7.1f} ms | loaded: {', '.join(r['loaded']) or '-'}"
+        )
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,385 @@
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from collections.abc import Callable
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from data_layer.settings import BULK_ROWS_LIMIT, EXPECTED_COLUMNS, PROJECT_ROOT
+
+REF_CSV = PROJECT_ROOT / "data" / "Mall_Customers.csv"
+BASELINE_PATH = PROJECT_ROOT / "benchmarks" / "baseline.json"
+
+SIZES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1m": 1_000_000, "10m": 10_000_000}
+DEFAULT_SIZES = ("1k", "10k")
+
+# Bornes des colonnes du dataset de référence (valeurs synthétiques écrêtées)
+_BOUNDS = {"Age": (18, 70), "Annual Income (k$)": (15, 137), "Spending Score (1-100)": (1, 99)}
+_JITTER = {"Age": 3.0, "Annual Income (k$)": 4.0, "Spending Score (1-100)": 5.0}
+
+
+def synthetic_customers(n_rows: int, seed: int = 0) -> Any:
+    """
+    Dataset au format Mall Customers : lignes du CSV de référence tirées avec
+    remise puis bruitées (mêmes segments, mêmes bornes), reproductible par seed.
+    """
+    import pandas as pd
+
+    ref = pd.read_csv(REF_CSV)
+    rng = np.random.default_rng(seed)
+    idx = rng.integers(0, len(ref), size=n_rows)
+
+    data: dict[str, Any] = {
+        "CustomerID": np.arange(1, n_rows + 1),
+        "Gender": ref["Gender"].to_numpy(dtype=object)[idx],
+    }
+    for col, (lo, hi) in _BOUNDS.items():
+        noisy = ref[col].to_numpy(dtype=np.float64)[idx] + rng.normal(0, _JITTER[col], n_rows)
+        data[col] = np.clip(np.rint(noisy), lo, hi).astype(np.int64)
+    return pd.DataFrame(data)
+
+
+def _measure(fn: Callable[[], Any], repeat: int, warmup: int = 1) -> list[float]:
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return times
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss : Ko sous Linux, octets sous macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+# --- Cas mesurés : df -> (fonction à chronométrer, lignes traitées par appel) ---------------
+# `stack` : ressources du cas (clients API) fermées une fois le cas mesuré
+
+def _case_predict_one(df: Any, stack: ExitStack) -> tuple[Callable[[], Any], int]:
+    from data_layer.artifacts_repository import load_bundle
+    from logic_layer.prediction_service import predict_one
+
+    bundle = load_bundle()
+    rows = df[EXPECTED_COLUMNS].head(1_000).to_dict(orient="records")
+
+    def run() -> None:
+        for row in rows:
+            predict_one(bundle, row)
+
+    return run, len(rows)
+
+
+def _case_predict_batch(df: Any, stack: ExitStack) -> tuple[Callable[[], Any], int]:
+    from data_layer.artifacts_repository import load_bundle
+    from logic_layer.prediction_service import predict_batch
+
+    bundle = load_bundle()
+    return (lambda: predict_batch(bundle, df)), len(df)
+
+
+def _case_profile_clusters(df: Any, stack: ExitStack) -> tuple[Callable[[], Any], int]:
+    from data_layer.artifacts_repository import load_bundle
+    from logic_layer.explain_service import profile_clusters
+
+    bundle = load_bundle()
+    return (lambda: profile_clusters(bundle, df)), len(df)
+
+
+def _case_fit_kmeans_k4(df: Any, stack: ExitStack) -> tuple[Callable[[], Any], int]:
+    from logic_layer.modeling_service import fit_kmeans_k4
+
+    return (lambda: fit_kmeans_k4(df)), len(df)
+
+
+def _api_client(stack: ExitStack) -> Any:
+    from fastapi.testclient import TestClient
+
+    import main
+
+    # startup exécuté ici, shutdown à la fin du cas (sinon --in-process cumule les clients)
+    client = stack.enter_context(TestClient(main.app))
+    # lignes rejouées à chaque répétition : le cache mesurerait des hits, pas le scoring
+    client.app.state.prediction_cache = None
+    return client
+
+
+def _checked(res: Any) -> Any:
+    if res.status_code != 200:
+        raise RuntimeError(f"HTTP {res.status_code}: {res.text[:200]}")
+    return res
+
+
+def _case_api_row(df: Any, stack: ExitStack) -> tuple[Callable[[], Any], int]:
+    client = _api_client(stack)
+    rows = df[EXPECTED_COLUMNS].head(200).to_dict(orient="records")
+
+    def run() -> None:
+        for row in rows:
+            _checked(client.post("/api/cluster/row", json=row))
+
+    return run, len(rows)
+
+
+def _case_api_rows(df: Any, stack: ExitStack) -> tuple[Callable[[], Any], int]:
+    client = _api_client(stack)
+    body = {c: df[c].tolist() for c in EXPECTED_COLUMNS}
+    return (lambda: _checked(client.post("/api/cluster/rows", json=body))), len(df)
+
+
+def _csv_bytes(df: Any) -> bytes:
+    buf = io.StringIO()
+    df.to_csv(buf, index=False)
+    return buf.getvalue().encode("utf-8")
+
+
+def _case_api_file(df: Any, stack: ExitStack) -> tuple[Callable[[], Any], int]:
+    client = _api_client(stack)
+    data = _csv_bytes(df)
+
+    def run() -> None:
+        _checked(client.post("/api/cluster/file", files={"file": ("bench.csv", data, "text/csv")}))
+
+    return run, len(df)
+
+
+def _case_api_export(df: Any, stack: ExitStack) -> tuple[Callable[[], Any], int]:
+    client = _api_client(stack)
+    data = _csv_bytes(df)
+
+    def run() -> None:
+        files = {"file": ("bench.csv", data, "text/csv")}
+        _checked(client.post("/api/cluster/file/export", files=files))
+
+    return run, len(df)
+
+
+CASES: dict[str, Callable[[Any, ExitStack], tuple[Callable[[], Any], int]]] = {
+    "predict_one": _case_predict_one,
+    "predict_batch": _case_predict_batch,
+    "profile_clusters": _case_profile_clusters,
+    "fit_kmeans_k4": _case_fit_kmeans_k4,
+    "api_cluster_row": _case_api_row,
+    "api_cluster_rows": _case_api_rows,
+    "api_cluster_file": _case_api_file,
+    "api_cluster_file_export": _case_api_export,
+}
+
+# Cas à latence unitaire : taille du dataset sans effet (mesurés sur la plus petite taille)
+_PER_ROW_CASES = {"predict_one", "api_cluster_row"}
+
+
+def run_case(case: str, n_rows: int, repeat: int, seed: int = 0) -> dict[str, Any]:
+    """
+    Mesure un cas dans le process courant : latence par appel (p50 / p95 /
+    moyenne), débit en lignes/s et pic de RSS du process.
+    """
+    df = synthetic_customers(n_rows, seed)
+    with ExitStack() as stack:
+        fn, rows_per_call = CASES[case](df, stack)
+        times = _measure(fn, repeat)
+    p50 = statistics.median(times)
+    return {
+        "case": case,
+        "rows": n_rows,
+        "repeat": repeat,
+        "rows_per_call": rows_per_call,
+        "p50_s": p50,
+        "p95_s": float(np.quantile(times, 0.95)),
+        "mean_s": statistics.fmean(times),
+        "rows_per_s": rows_per_call / p50 if p50 > 0 else None,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def _run_isolated(case: str, n_rows: int, repeat: int, seed: int) -> dict[str, Any]:
+    # process neuf par cas : le pic de RSS n'est pas pollué par les cas précédents
+    out = subprocess.run(
+        [
+            sys.executable, "-m", "scripts.benchmark", "--worker", case,
+            "--rows", str(n_rows), "--repeat", str(repeat), "--seed", str(seed),
+        ],
+        cwd=PROJECT_ROOT,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def _environment() -> dict[str, Any]:
+    import pandas as pd
+    import sklearn
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=PROJECT_ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "sklearn": sklearn.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+# Matériel : baseline d'une autre machine non comparable (comparaison ignorée)
+HARDWARE_ENVIRONMENT = ("cpu_count", "machine")
+# Versions : ce que la baseline doit justement surveiller (signalées, comparaison maintenue)
+LIBRARY_ENVIRONMENT = ("python", "numpy", "pandas", "sklearn")
+
+
+def environment_mismatch(
+    current: dict[str, Any], baseline: dict[str, Any] | None, keys: tuple[str, ...]
+) -> dict[str, tuple[Any, Any]]:
+    """
+    Clés de `keys` qui diffèrent -> (baseline, courant).
+    Clé absente de la baseline (ancien format) : inconnue, pas comptée comme différente.
+    """
+    baseline = baseline or {}
+    return {
+        key: (baseline[key], current.get(key))
+        for key in keys
+        if key in baseline and baseline[key] != current.get(key)
+    }
+
+
+def compare(
+    results: list[dict[str, Any]],
+    baseline: list[dict[str, Any]],
+    max_slowdown: float = 0.25,
+    max_rss_growth: float = 0.25,
+) -> list[dict[str, Any]]:
+    """
+    Régressions vs baseline (même cas, même taille) : p50 plus lent de plus de
+    `max_slowdown` ou pic de RSS plus haut de plus de `max_rss_growth` (ratios).
+    """
+    ref = {(r["case"], r["rows"]): r for r in baseline}
+    regressions = []
+    for r in results:
+        base = ref.get((r["case"], r["rows"]))
+        if base is None:
+            continue
+        for metric, limit in (("p50_s", max_slowdown), ("peak_rss_mb", max_rss_growth)):
+            if not base.get(metric) or r.get(metric) is None:
+                continue
+            ratio = r[metric] / base[metric]
+            if ratio > 1.0 + limit:
+                regressions.append({
+                    "case": r["case"],
+                    "rows": r["rows"],
+                    "metric": metric,
+                    "baseline": base[metric],
+                    "current": r[metric],
+                    "ratio": ratio,
+                })
+    return regressions
+
+
+def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Inference / profiling / API benchmark suite")
+    parser.add_argument("--cases", nargs="+", choices=sorted(CASES), default=sorted(CASES))
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=list(DEFAULT_SIZES))
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per case (after 1 warmup)")
+    parser.add_argument("--seed", type=int, default=0, help="synthetic data seed")
+    parser.add_argument("--output", type=Path, help="write results JSON here")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="overwrite --baseline")
+    parser.add_argument("--max-slowdown", type=float, default=0.25, help="allowed p50 increase")
+    parser.add_argument("--max-rss-growth", type=float, default=0.25, help="allowed RSS increase")
+    parser.add_argument("--in-process", action="store_true", help="no subprocess per case")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--rows", type=int, help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(argv)
+    if args.worker:
+        print(json.dumps(run_case(args.worker, args.rows, args.repeat, args.seed)))
+        return 0
+
+    runner = run_case if args.in_process else _run_isolated
+    smallest = min(SIZES[s] for s in args.sizes)
+    results = []
+    for case in args.cases:
+        for n_rows in sorted({SIZES[s] for s in args.sizes}):
+            if case in _PER_ROW_CASES and n_rows != smallest:
+                continue
+            if case == "api_cluster_rows" and n_rows > BULK_ROWS_LIMIT:
+                continue  # 413 au-delà de BULK_ROWS_LIMIT
+            r = runner(case, n_rows, args.repeat, args.seed)
+            results.append(r)
+            rate = f"{r['rows_per_s']:>12,.0f} rows/s" if r["rows_per_s"] else ""
+            print(
+                f"{case:>24} {n_rows:>10,} rows | p50 {r['p50_s'] * 1000:9.2f} ms | "
+                f"{rate} | RSS {r['peak_rss_mb']:7.1f} MB"
+            )
+
+    environment = _environment()
+    report = {"environment": environment, "results": results}
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline} (use --save-baseline)")
+        return 0
+
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    baseline_env = baseline.get("environment")
+    hardware = environment_mismatch(environment, baseline_env, HARDWARE_ENVIRONMENT)
+    if hardware:
+        # timings d'une autre machine : comparaison non significative
+        for key, (base, current) in hardware.items():
+            print(f"WARNING baseline {key}={base!r} but current {key}={current!r}")
+        print(f"Comparison skipped: {args.baseline} was recorded on other hardware")
+        return 0
+
+    # versions différentes : régression possible, c'est ce que le gate doit attraper
+    versions = environment_mismatch(environment, baseline_env, LIBRARY_ENVIRONMENT)
+    for key, (base, current) in versions.items():
+        print(f"NOTE baseline {key}={base!r}, current {key}={current!r}")
+
+    regressions = compare(results, baseline["results"], args.max_slowdown, args.max_rss_growth)
+    for reg in regressions:
+        print(
+            f"REGRESSION {reg['case']} ({reg['rows']:,} rows) {reg['metric']}: "
+            f"{reg['baseline']:.4g} -> {reg['current']:.4g} (x{reg['ratio']:.2f})"
+        )
+    if not regressions:
+        print(f"No regression vs {args.baseline}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
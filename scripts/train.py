@@ -1,11 +1,28 @@
 from __future__ import annotations
 
+import argparse
 import os
+from contextlib import nullcontext
 from pathlib import Path
 
-from data_layer.artifacts_repository import save_bundle
-from data_layer.dataset_repository import load_csv
-from logic_layer.modeling_service import fit_kmeans_k4
+from data_layer.artifacts_repository import (
+    file_fingerprint,
+    publish_bundle,
+    save_reference_profiles,
+    save_sweep_results,
+    set_current_version,
+    version_dir,
+)
+from data_layer.dataset_repository import iter_dataset_chunks, load_csv
+from data_layer.settings import EXPECTED_COLUMNS
+from data_layer.tracking_repository import TrackingStore
+from logic_layer.explain_service import profile_chunks, profile_clusters
+from logic_layer.modeling_service import (
+    SELECTION_CRITERIA,
+    fit_kmeans_k4,
+    fit_minibatch_kmeans,
+    sweep_kmeans,
+)
 
 
 def _resolve_ref_data_path() -> str:
@@ -31,12 +48,141 @@ def _resolve_ref_data_path() -> str:
     )
 
 
-def main() -> None:
+def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Train the clustering pipeline")
+    parser.add_argument(
+        "--engine",
+        choices=["kmeans", "minibatch"],
+        default="kmeans",
+        help="kmeans: in-memory KMeans ; minibatch: out-of-core MiniBatchKMeans (partial_fit)",
+    )
+    parser.add_argument(
+        "--chunk-size", type=int, default=100_000, help="rows read per chunk (minibatch engine)"
+    )
+    parser.add_argument("--batch-size", type=int, default=4096, help="MiniBatchKMeans batch size")
+    parser.add_argument("--epochs", type=int, default=1, help="passes over the data (minibatch)")
+    parser.add_argument("--random-state", type=int, default=42)
+
+    sweep = parser.add_argument_group("sweep (kmeans engine)")
+    sweep.add_argument("--sweep", action="store_true", help="choose k by a parallel sweep")
+    sweep.add_argument("--k-min", type=int, default=2)
+    sweep.add_argument("--k-max", type=int, default=10)
+    sweep.add_argument("--seeds", type=int, nargs="+", default=[42], help="seeds per k")
+    sweep.add_argument("--criterion", choices=sorted(SELECTION_CRITERIA), default="silhouette")
+    sweep.add_argument("--n-jobs", type=int, default=-1, help="parallel workers (-1: all cores)")
+
+    parser.add_argument(
+        "--no-tracking", action="store_true", help="do not record the run in artifacts/tracking.sqlite3"
+    )
+
+    args = parser.parse_args(argv)
+    if args.sweep and args.engine != "kmeans":
+        parser.error("--sweep is only supported with --engine kmeans")
+    return args
+
+
+def _track_sweep(tracker: TrackingStore, parent_id: str, results: list[dict], **dataset) -> None:
+    # un run enfant par candidat (k, seed) : comparables via tracker.compare_runs(...)
+    for run in results:
+        child = tracker.start_run(
+            "sweep-candidate",
+            params={"n_clusters": run["n_clusters"], "random_state": run["random_state"]},
+            parent_id=parent_id,
+            model_name="kmeans",
+            **dataset,
+        )
+        tracker.log_metrics(child, {**run["metrics"], "inertia": run["inertia"]})
+        tracker.log_timing(child, "fit", run["fit_s"])
+        tracker.end_run(child)
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = _parse_args(argv)
     csv_path = _resolve_ref_data_path()
-    df = load_csv(csv_path)
-    bundle = fit_kmeans_k4(df, random_state=42)
-    save_bundle(bundle)
-    print("Artifacts generated in ./artifacts")
+
+    tracker = None if args.no_tracking else TrackingStore()
+    run_name = "sweep" if args.sweep else args.engine
+    # sha256 du dataset calculé une seule fois, et seulement s'il sert au suivi
+    fingerprint = file_fingerprint(csv_path) if tracker else None
+    dataset = {"dataset_path": csv_path, "dataset_hash": fingerprint and fingerprint["sha256"]}
+    run_id = tracker.start_run(run_name, params=vars(args), **dataset) if tracker else None
+
+    def stage(name: str):
+        return tracker.timer(run_id, name) if tracker else nullcontext()
+
+    try:
+        if args.engine == "minibatch":
+            # Relecture du fichier par blocs à chaque passe : mémoire bornée par --chunk-size
+            def chunks():
+                return iter_dataset_chunks(csv_path, args.chunk_size, columns=EXPECTED_COLUMNS)
+
+            with stage("fit"):
+                bundle = fit_minibatch_kmeans(
+                    chunks,
+                    random_state=args.random_state,
+                    batch_size=args.batch_size,
+                    epochs=args.epochs,
+                )
+            n_rows = bundle.params["n_rows"]
+            with stage("profile"):
+                profile = profile_chunks(bundle, chunks())
+        elif args.sweep:
+            with stage("load"):
+                df = load_csv(csv_path)
+            with stage("fit"):
+                bundle, sweep_results = sweep_kmeans(
+                    df,
+                    ks=range(args.k_min, args.k_max + 1),
+                    seeds=args.seeds,
+                    criterion=args.criterion,
+                    n_jobs=args.n_jobs,
+                )
+            n_rows = len(df)
+            with stage("profile"):
+                profile = profile_clusters(bundle, df)
+            for run in sweep_results:
+                print(f"k={run['n_clusters']:<3} seed={run['random_state']:<6} {run['metrics']}")
+            if tracker:
+                _track_sweep(tracker, run_id, sweep_results, n_rows=n_rows, **dataset)
+        else:
+            with stage("load"):
+                df = load_csv(csv_path)
+            with stage("fit"):
+                bundle = fit_kmeans_k4(df, random_state=args.random_state)
+            n_rows = len(df)
+            with stage("profile"):
+                profile = profile_clusters(bundle, df)
+
+        with stage("publish"):
+            # Nouvelle version dans artifacts/versions/<id>/, pas encore servie
+            version = publish_bundle(bundle, activate=False)
+
+            # Profils de référence précalculés : chargés tels quels au démarrage de l'API
+            save_reference_profiles(
+                profile, csv_path, version=version, data_fingerprint=fingerprint
+            )
+            if args.sweep:
+                save_sweep_results(sweep_results, version=version)
+
+        # Bascule atomique du pointeur CURRENT : les workers rechargent à chaud
+        set_current_version(version)
+    except BaseException:
+        if tracker:
+            tracker.end_run(run_id, status="failed")
+            tracker.close()
+        raise
+
+    if tracker:
+        tracker.log_metrics(run_id, bundle.metrics)
+        tracker.end_run(
+            run_id,
+            model_name=bundle.model_name,
+            n_rows=n_rows,
+            artifact_path=version_dir(version),
+            version=version,
+        )
+        tracker.close()
+    print(f"Artifacts generated in ./artifacts (version {version}, engine {args.engine})")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from data_layer.artifacts_repository import load_bundle
+from data_layer.dataset_repository import load_csv
+from data_layer.settings import PROJECT_ROOT
+from logic_layer.batching_service import MicroBatcher
+
+
+@pytest.fixture(scope="module")
+def bundle():
+    return load_bundle()
+
+
+def test_micro_batcher_groups_concurrent_rows(bundle):
+    rows = load_csv(PROJECT_ROOT / "data" / "Mall_Customers.csv").head(50).to_dict(orient="records")
+    batcher = MicroBatcher(max_batch_size=16, max_wait_us=2_000)
+
+    async def scenario():
+        return await asyncio.gather(*(batcher.submit(bundle, r) for r in rows))
+
+    results = asyncio.run(scenario())
+
+    assert results == [bundle.engine.predict_one(r) for r in rows]
+    stats = batcher.stats()
+    assert stats["rows"] == 50
+    assert stats["batches"] == 4  # 16 + 16 + 16 + 2 (timeout)
+    assert stats["batch_size_histogram"] == {"le_2": 1, "le_16": 3}
+
+
+def test_micro_batcher_isolates_invalid_rows(bundle):
+    good = {"Gender": "Male", "Age": 30, "Annual Income (k$)": 60, "Spending Score (1-100)": 50}
+    bad = {**good, "Age": "thirty"}
+    batcher = MicroBatcher(max_batch_size=2, max_wait_us=1_000)
+
+    async def scenario():
+        return await asyncio.gather(
+            batcher.submit(bundle, good), batcher.submit(bundle, bad), return_exceptions=True
+        )
+
+    ok, err = asyncio.run(scenario())
+
+    assert ok == bundle.engine.predict_one(good)
+    assert isinstance(err, ValueError)
+
+
+def test_micro_batcher_fails_every_row_when_runner_breaks(bundle):
+    good = {"Gender": "Male", "Age": 30, "Annual Income (k$)": 60, "Spending Score (1-100)": 50}
+
+    async def broken_runner(fn, *args):
+        raise RuntimeError("cannot schedule new futures after shutdown")
+
+    batcher = MicroBatcher(max_batch_size=2, max_wait_us=1_000, runner=broken_runner)
+
+    async def scenario():
+        pending = [batcher.submit(bundle, good), batcher.submit(bundle, good)]
+        return await asyncio.wait_for(asyncio.gather(*pending, return_exceptions=True), 5)
+
+    results = asyncio.run(scenario())
+
+    assert [type(r) for r in results] == [RuntimeError, RuntimeError]
+    assert not batcher._tasks
+
+
+def test_cluster_row_with_batching_enabled(monkeypatch):
+    monkeypatch.setattr(main, "ROW_BATCHING", True)
+    payload = {
+        "Gender": "Female",
+        "Age": 22,
+        "Annual Income (k$)": 40,
+        "Spending Score (1-100)": 70,
+    }
+
+    with TestClient(main.app) as client:
+        res = client.post("/api/cluster/row", json=payload)
+        assert res.status_code == 200, res.text
+
+        stats = client.get("/api/cluster/row/batching").json()
+        assert stats["enabled"] is True
+        assert stats["rows"] == 1
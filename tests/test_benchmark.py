@@ -0,0 +1,102 @@
+import json
+
+import numpy as np
+
+from data_layer.settings import EXPECTED_COLUMNS
+from scripts.benchmark import (
+    _environment,
+    compare,
+    environment_mismatch,
+    main,
+    run_case,
+    synthetic_customers,
+)
+
+
+def test_synthetic_data_is_mall_shaped_and_reproducible():
+    df = synthetic_customers(5_000, seed=3)
+
+    assert list(df.columns) == ["CustomerID", *EXPECTED_COLUMNS]
+    assert set(df["Gender"]) == {"Male", "Female"}
+    assert df["Age"].between(18, 70).all()
+    assert df["Spending Score (1-100)"].between(1, 99).all()
+    assert df.equals(synthetic_customers(5_000, seed=3))
+    assert not df.equals(synthetic_customers(5_000, seed=4))
+
+
+def test_run_case_reports_latency_throughput_and_rss():
+    r = run_case("predict_batch", 1_000, repeat=2)
+
+    assert (r["case"], r["rows"], r["repeat"]) == ("predict_batch", 1_000, 2)
+    assert 0 < r["p50_s"] <= r["p95_s"]
+    assert np.isclose(r["rows_per_s"], 1_000 / r["p50_s"])
+    assert r["peak_rss_mb"] > 0
+
+
+def test_compare_flags_only_regressions_beyond_threshold():
+    baseline = [
+        {"case": "predict_batch", "rows": 1_000, "p50_s": 1.0, "peak_rss_mb": 100.0},
+        {"case": "profile_clusters", "rows": 1_000, "p50_s": 1.0, "peak_rss_mb": 100.0},
+    ]
+    results = [
+        {"case": "predict_batch", "rows": 1_000, "p50_s": 1.2, "peak_rss_mb": 140.0},
+        {"case": "profile_clusters", "rows": 1_000, "p50_s": 2.0, "peak_rss_mb": 90.0},
+        {"case": "fit_kmeans_k4", "rows": 1_000, "p50_s": 9.0, "peak_rss_mb": 900.0},  # pas de référence
+    ]
+
+    regressions = compare(results, baseline, max_slowdown=0.25, max_rss_growth=0.25)
+
+    assert [(r["case"], r["metric"]) for r in regressions] == [
+        ("predict_batch", "peak_rss_mb"),
+        ("profile_clusters", "p50_s"),
+    ]
+    assert regressions[1]["ratio"] == 2.0
+
+
+def test_baseline_gate_skips_other_hardware_but_not_other_versions(tmp_path, capsys):
+    from scripts.benchmark import HARDWARE_ENVIRONMENT, LIBRARY_ENVIRONMENT
+
+    env = _environment()
+    other_kernel = dict(env, timestamp="x", platform="y")
+    assert environment_mismatch(env, other_kernel, HARDWARE_ENVIRONMENT) == {}
+    assert environment_mismatch(env, None, LIBRARY_ENVIRONMENT) == {}  # ancien format
+    assert environment_mismatch(env, dict(env, numpy="1.0"), LIBRARY_ENVIRONMENT) == {
+        "numpy": ("1.0", env["numpy"])
+    }
+
+    # baseline 1000x plus rapide
+    baseline = tmp_path / "baseline.json"
+    fast = {"case": "predict_batch", "rows": 1_000, "p50_s": 1e-9, "peak_rss_mb": 1e-3}
+    argv = [
+        "--in-process", "--cases", "predict_batch", "--sizes", "1k", "--repeat", "1",
+        "--baseline", str(baseline),
+    ]
+
+    # autre machine : comparaison ignorée
+    other_cpu = dict(env, cpu_count=(env["cpu_count"] or 1) + 63)
+    baseline.write_text(json.dumps({"environment": other_cpu, "results": [fast]}))
+    assert main(argv) == 0
+    out = capsys.readouterr().out
+    assert "WARNING baseline cpu_count=" in out and "Comparison skipped" in out
+
+    # autres versions de bibliothèques : signalées, régression toujours détectée
+    other_libs = dict(env, pandas="2.0.0", sklearn="1.0", platform="other kernel")
+    baseline.write_text(json.dumps({"environment": other_libs, "results": [fast]}))
+    assert main(argv) == 1
+    out = capsys.readouterr().out
+    assert "NOTE baseline pandas='2.0.0'" in out and "REGRESSION predict_batch" in out
+
+
+def test_in_process_api_case_closes_its_client(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    exits = []
+    real_exit = TestClient.__exit__
+    monkeypatch.setattr(
+        TestClient, "__exit__", lambda self, *exc: exits.append(self) or real_exit(self, *exc)
+    )
+
+    run_case("api_cluster_rows", 1_000, repeat=1)
+    run_case("api_cluster_rows", 1_000, repeat=1)
+
+    assert len(exits) == 2
@@ -0,0 +1,117 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from data_layer.settings import EXPECTED_COLUMNS
+from logic_layer import cache_service
+from logic_layer.cache_service import PredictionCache, SqliteCacheBackend, cache_key
+from routers_layer import rest_router
+
+ROW = {"Gender": "Male", "Age": 30, "Annual Income (k$)": 60, "Spending Score (1-100)": 50}
+
+
+def test_key_normalizes_numbers_and_includes_version():
+    a = cache_key("v1", ROW, EXPECTED_COLUMNS)
+    b = cache_key("v1", {**ROW, "Age": 30.0000000001}, EXPECTED_COLUMNS)
+    assert a == b == ("v1", "Male", 30.0, 60.0, 50.0)
+
+    assert cache_key("v2", ROW, EXPECTED_COLUMNS) != a
+    assert cache_key("v1", {**ROW, "Gender": "Female"}, EXPECTED_COLUMNS) != a
+    assert cache_key("v1", {**ROW, "Age": float("nan")}, EXPECTED_COLUMNS)[2] is None
+
+
+def test_lru_eviction_and_counters():
+    cache = PredictionCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "a" devient le plus récent
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (2, 1, 1)
+
+
+def test_ttl_expiration(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(cache_service.time, "monotonic", lambda: now[0])
+    cache = PredictionCache(ttl_s=10)
+    cache.put("a", 1)
+
+    now[0] += 11
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_shared_backend_between_workers(tmp_path):
+    path = tmp_path / "cache.sqlite3"
+    worker_1 = PredictionCache(backend=SqliteCacheBackend(path))
+    worker_2 = PredictionCache(backend=SqliteCacheBackend(path))
+
+    key = cache_key("v1", ROW, EXPECTED_COLUMNS)
+    worker_1.put(key, 3)
+
+    assert worker_2.get(key) == 3
+    assert worker_2.stats()["shared_hits"] == 1
+    assert worker_2.get(key) == 3
+    assert worker_2.stats()["hits"] == 1  # promu dans le LRU local
+
+
+def test_cluster_row_served_from_cache(monkeypatch):
+    from main import app
+
+    calls = []
+    predict = rest_router.predict_one
+    monkeypatch.setattr(rest_router, "predict_one", lambda *a: calls.append(a) or predict(*a))
+
+    with TestClient(app) as client:
+        if client.app.state.prediction_cache is None:
+            pytest.skip("prediction cache disabled (PREDICTION_CACHE_SIZE=0)")
+        first = client.post("/api/cluster/row", json=ROW).json()
+        second = client.post("/api/cluster/row", json={**ROW, "Age": 30.0}).json()
+        stats = client.get("/api/cluster/row/cache").json()
+
+        # hot swap : le cache local est vidé
+        client.app.state.models._swap(client.app.state.models.current)
+        assert client.get("/api/cluster/row/cache").json()["size"] == 0
+
+    assert first == second
+    assert len(calls) == 1
+    assert stats["enabled"] and stats["hits"] == 1 and stats["misses"] == 1
+
+
+def test_cluster_row_keeps_shared_backend_io_off_the_event_loop():
+    import asyncio
+
+    from main import app
+
+    class RecordingBackend:
+        def __init__(self):
+            self.data, self.on_loop = {}, []
+
+        def _record(self):
+            try:
+                asyncio.get_running_loop()
+                self.on_loop.append(True)
+            except RuntimeError:
+                self.on_loop.append(False)
+
+        def get(self, key):
+            self._record()
+            return self.data.get(key)
+
+        def set(self, key, value):
+            self._record()
+            self.data[key] = value
+
+    backend = RecordingBackend()
+    with TestClient(app) as client:
+        client.app.state.prediction_cache = PredictionCache(backend=backend)
+        first = client.post("/api/cluster/row", json={**ROW, "Age": 33}).json()
+        client.app.state.prediction_cache = PredictionCache(backend=backend)  # LRU local vide
+        second = client.post("/api/cluster/row", json={**ROW, "Age": 33}).json()
+        stats = client.app.state.prediction_cache.stats()
+
+    assert first["cluster_id"] == second["cluster_id"]
+    assert len(backend.data) == 1 and stats["shared_hits"] == 1
+    assert backend.on_loop == [False, False, False]  # get (miss), set, get (hit)
@@ -0,0 +1,115 @@
+import io
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from data_layer.dataset_repository import detect_format, load_csv
+from data_layer.settings import PROJECT_ROOT
+from main import app
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+REF_CSV = PROJECT_ROOT / "data" / "Mall_Customers.csv"
+
+
+def _parquet_bytes(df: pd.DataFrame) -> bytes:
+    buf = io.BytesIO()
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), buf, row_group_size=50)
+    return buf.getvalue()
+
+
+def _arrow_bytes(df: pd.DataFrame, stream: bool = False) -> bytes:
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    writer = pa.ipc.new_stream if stream else pa.ipc.new_file
+    with writer(sink, table.schema) as w:
+        w.write_table(table, max_chunksize=50)
+    return sink.getvalue().to_pybytes()
+
+
+def test_detect_format():
+    assert detect_format("x.CSV", None) == "csv"
+    assert detect_format("x.parquet", None) == "parquet"
+    assert detect_format("x.feather", None) == "arrow"
+    assert detect_format("x.bin", "application/vnd.apache.parquet") == "parquet"
+    assert detect_format("x.txt", "text/plain") is None
+
+
+def test_load_parquet_matches_csv(tmp_path):
+    df_csv = load_csv(REF_CSV)
+    path = tmp_path / "mall.parquet"
+    path.write_bytes(_parquet_bytes(pd.read_csv(REF_CSV)))
+
+    df_pq = load_csv(path)
+
+    pd.testing.assert_frame_equal(df_pq, df_csv)
+
+
+@pytest.mark.parametrize(
+    ("filename", "payload"),
+    [
+        ("mall.parquet", _parquet_bytes),
+        ("mall.arrow", _arrow_bytes),
+        ("mall.arrows", lambda df: _arrow_bytes(df, stream=True)),
+    ],
+)
+def test_cluster_file_columnar_matches_csv(filename, payload, monkeypatch):
+    from routers_layer import rest_router
+
+    monkeypatch.setattr(rest_router, "UPLOAD_CHUNK_ROWS", 64)
+    df = pd.read_csv(REF_CSV)
+
+    with TestClient(app) as client:
+        ref = client.post(
+            "/api/cluster/file",
+            files={"file": ("mall.csv", REF_CSV.read_bytes(), "text/csv")},
+        ).json()
+        res = client.post(
+            "/api/cluster/file",
+            files={"file": (filename, payload(df), "application/octet-stream")},
+        )
+
+    assert res.status_code == 200, res.text
+    data = res.json()
+    assert data["n_rows"] == ref["n_rows"]
+    assert data["cluster_counts"] == ref["cluster_counts"]
+    # blocs différents -> moyennes fusionnées à l'ULP près
+    for got, exp in zip(data["profiles"], ref["profiles"], strict=True):
+        assert got == pytest.approx(exp)
+    assert [r["cluster_id"] for r in data["preview"]] == [
+        r["cluster_id"] for r in ref["preview"]
+    ]
+
+
+def test_cluster_file_export_parquet_round_trip():
+    df = pd.read_csv(REF_CSV)
+
+    with TestClient(app) as client:
+        ref = client.post(
+            "/api/cluster/file/export",
+            files={"file": ("mall.csv", REF_CSV.read_bytes(), "text/csv")},
+        )
+        res = client.post(
+            "/api/cluster/file/export",
+            files={"file": ("mall.parquet", _parquet_bytes(df), "application/octet-stream")},
+        )
+
+    assert res.status_code == 200, res.text
+    assert 'filename="mall_clustered.parquet"' in res.headers["content-disposition"]
+    out = pq.read_table(io.BytesIO(res.content)).to_pandas()
+    expected = pd.read_csv(io.BytesIO(ref.content))
+    assert out["cluster_id"].tolist() == expected["cluster_id"].tolist()
+    assert list(out.columns) == list(expected.columns)
+
+
+def test_cluster_file_corrupted_parquet_returns_400():
+    with TestClient(app) as client:
+        res = client.post(
+            "/api/cluster/file",
+            files={"file": ("bad.parquet", b"not a parquet file", "application/octet-stream")},
+        )
+
+    assert res.status_code == 400
+    assert res.json()["detail"].startswith("Parquet read error")
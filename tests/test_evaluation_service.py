@@ -0,0 +1,104 @@
+import numpy as np
+import pytest
+from sklearn.datasets import make_blobs
+from sklearn.metrics import calinski_harabasz_score, davies_bouldin_score, silhouette_score
+
+from logic_layer.evaluation_service import (
+    ClusterStats,
+    clustering_metrics,
+    combine_moments,
+    silhouette_exact,
+    silhouette_sampled,
+)
+
+
+@pytest.fixture(scope="module")
+def blobs():
+    X, y = make_blobs(n_samples=1500, centers=[[0, 0], [3, 3], [0, 4], [6, 0]], random_state=0)
+    # clusters déséquilibrés : la stratification doit garder les petits
+    keep = (y != 3) | (np.arange(len(y)) % 10 == 0)
+    return X[keep], y[keep]
+
+
+def test_exact_metrics_match_sklearn(blobs):
+    X, y = blobs
+    metrics = clustering_metrics(X, y)
+
+    assert metrics["silhouette"] == pytest.approx(silhouette_score(X, y), rel=1e-12)
+    assert metrics["davies_bouldin"] == pytest.approx(davies_bouldin_score(X, y), rel=1e-12)
+    assert metrics["calinski_harabasz"] == pytest.approx(calinski_harabasz_score(X, y), rel=1e-12)
+
+
+def test_exact_silhouette_is_chunked(blobs):
+    X, y = blobs
+    # budget minuscule : une ligne de la matrice de distances à la fois
+    assert silhouette_exact(X, y, working_memory_mb=0) == pytest.approx(silhouette_score(X, y))
+
+
+def test_streaming_stats_merge_matches_single_pass(blobs):
+    X, y = blobs
+    whole = ClusterStats(4, 2).update(X, y)
+    parts = ClusterStats(4, 2)
+    for i in range(0, len(X), 97):
+        parts.merge(ClusterStats(4, 2).update(X[i:i + 97], y[i:i + 97]))
+
+    np.testing.assert_allclose(parts.means, whole.means)
+    assert parts.calinski_harabasz() == pytest.approx(calinski_harabasz_score(X, y), rel=1e-10)
+
+
+def test_sampled_silhouette_confidence_interval(blobs):
+    X, y = blobs
+    exact = silhouette_score(X, y)
+
+    hits = 0
+    for seed in range(20):
+        m = silhouette_sampled(X, y, sample_size=200, random_state=seed)
+        assert m["silhouette_ci_low"] < m["silhouette"] < m["silhouette_ci_high"]
+        hits += m["silhouette_ci_low"] <= exact <= m["silhouette_ci_high"]
+    assert hits >= 15
+
+    # échantillon = population : estimation exacte, intervalle nul
+    full = silhouette_sampled(X, y, sample_size=len(X))
+    assert full["silhouette"] == pytest.approx(exact)
+    assert full["silhouette_ci_high"] - full["silhouette_ci_low"] == pytest.approx(0)
+
+
+def test_large_inputs_switch_to_sampling(blobs):
+    X, y = blobs
+    metrics = clustering_metrics(X, y, exact_max_rows=100)
+
+    assert metrics["silhouette_sample_size"] <= len(X)
+    assert metrics["davies_bouldin"] == pytest.approx(davies_bouldin_score(X, y))
+
+
+def test_single_cluster_is_nan():
+    metrics = clustering_metrics(np.ones((5, 2)), np.zeros(5, dtype=int))
+    assert all(np.isnan(v) for v in metrics.values())
+
+
+def test_combine_moments_matches_direct_computation_for_all_shapes():
+    rng = np.random.default_rng(0)
+    a, b = rng.normal(size=(7, 3)), rng.normal(5, 2, size=(11, 3))
+
+    def moments(x, axis=0):
+        m = x.mean(axis=axis)
+        return len(x), m, ((x - m) ** 2).sum(axis=axis)
+
+    # scalaire
+    n, mean, m2 = combine_moments(*moments(a[:, 0]), *moments(b[:, 0]))
+    assert (n, mean, m2) == pytest.approx(moments(np.concatenate([a[:, 0], b[:, 0]])))
+
+    # vecteur (k, d) : M2 sommé sur les features
+    both = np.concatenate([a, b])
+    n, mean, m2 = combine_moments(
+        np.array([7]), a.mean(0)[None], np.array([((a - a.mean(0)) ** 2).sum()]),
+        np.array([11]), b.mean(0)[None], np.array([((b - b.mean(0)) ** 2).sum()]),
+    )
+    assert n[0] == 18
+    assert np.allclose(mean[0], both.mean(0))
+    assert np.isclose(m2[0], ((both - both.mean(0)) ** 2).sum())
+
+    # clusters vides des deux côtés : pas de NaN
+    empty = np.zeros(2)
+    n, mean, m2 = combine_moments(empty, empty, empty, empty, empty, empty)
+    assert not np.isnan(mean).any() and not np.isnan(m2).any()
@@ -0,0 +1,145 @@
+import numpy as np
+import pytest
+
+from data_layer.artifacts_repository import load_bundle
+from data_layer.dataset_repository import load_csv
+from data_layer.settings import PROJECT_ROOT
+from logic_layer.explain_service import ProfileAccumulator, profile_clusters
+from logic_layer.prediction_service import predict_labels
+
+
+@pytest.fixture(scope="module")
+def bundle():
+    return load_bundle()
+
+
+@pytest.fixture(scope="module")
+def df_ref():
+    return load_csv(PROJECT_ROOT / "data" / "Mall_Customers.csv")
+
+
+def _by_id(profiles):
+    return {p["cluster_id"]: p for p in profiles}
+
+
+def test_accumulator_in_chunks_matches_profile_clusters(bundle, df_ref):
+    expected = profile_clusters(bundle, df_ref)
+
+    acc = ProfileAccumulator()
+    for start in range(0, len(df_ref), 30):
+        chunk = df_ref.iloc[start:start + 30]
+        acc.update(chunk, predict_labels(bundle, chunk))
+    result = acc.finalize()
+
+    assert result["n_rows"] == expected["n_rows"]
+    for key, q in expected["global_quantiles"].items():
+        assert result["global_quantiles"][key] == pytest.approx(q)
+    got, exp = _by_id(result["profiles"]), _by_id(expected["profiles"])
+    assert got.keys() == exp.keys()
+    for cid, p in exp.items():
+        assert got[cid] == pytest.approx(p)
+
+
+def _synthetic_chunk(rng, n):
+    return {
+        "Age": rng.uniform(18, 70, n),
+        "Annual Income (k$)": rng.uniform(15, 140, n),
+        "Spending Score (1-100)": rng.uniform(1, 100, n),
+    }
+
+
+def test_accumulator_sketch_estimates_quantiles():
+    rng = np.random.default_rng(1)
+    n = 50_000
+    chunk = _synthetic_chunk(rng, n)
+    labels = rng.integers(0, 3, n)
+
+    acc = ProfileAccumulator(quantile_k=200)
+    acc.update(chunk, labels)
+    result = acc.finalize()
+
+    assert acc.cluster_counts() == {str(k): int(v) for k, v in enumerate(np.bincount(labels))}
+    for key, col in [("age", "Age"), ("spending", "Spending Score (1-100)")]:
+        for q, name in [(0.33, "q33"), (0.66, "q66")]:
+            # erreur de rang bornée : on vérifie le rang empirique de l'estimation
+            rank = np.mean(chunk[col] <= result["global_quantiles"][key][name])
+            assert rank == pytest.approx(q, abs=0.02)
+    assert "Global quantiles estimated with a KLL sketch" in result["warnings"]
+
+
+def test_accumulator_merge_matches_single_pass():
+    rng = np.random.default_rng(2)
+    parts = [(_synthetic_chunk(rng, 3_000), rng.integers(0, 4, 3_000)) for _ in range(4)]
+
+    single = ProfileAccumulator(quantile_k=256)
+    for chunk, labels in parts:
+        single.update(chunk, labels)
+
+    workers = []
+    for chunk, labels in parts:
+        acc = ProfileAccumulator(quantile_k=256)
+        acc.update(chunk, labels)
+        workers.append(acc)
+    merged = workers[0]
+    for other in workers[1:]:
+        merged.merge(other)
+
+    all_age = np.concatenate([c["Age"] for c, _ in parts])
+    all_labels = np.concatenate([lab for _, lab in parts])
+    got, exp = _by_id(merged.finalize()["profiles"]), _by_id(single.finalize()["profiles"])
+
+    assert merged.n_rows == single.n_rows == 12_000
+    for cid in range(4):
+        ages = all_age[all_labels == cid]
+        assert got[cid]["size"] == exp[cid]["size"] == len(ages)
+        assert got[cid]["mean_age"] == pytest.approx(ages.mean())
+        assert got[cid]["std_age"] == pytest.approx(ages.std(ddof=1))
+    assert abs(np.mean(all_age <= merged.finalize()["global_quantiles"]["age"]["q33"]) - 0.33) < 0.02
+
+
+def test_accumulator_empty():
+    assert ProfileAccumulator().finalize()["n_rows"] == 0
+
+
+def test_profile_clusters_matches_pandas_groupby(bundle, df_ref):
+    labels = predict_labels(bundle, df_ref)
+    df = df_ref.assign(cluster_id=labels)
+    grp = df.groupby("cluster_id").agg(
+        size=("Age", "count"),
+        mean_age=("Age", "mean"),
+        mean_income=("Annual Income (k$)", "mean"),
+        mean_spending=("Spending Score (1-100)", "mean"),
+    )
+
+    result = profile_clusters(bundle, df_ref, labels=labels)
+
+    got = _by_id(result["profiles"])
+    assert sorted(got) == grp.index.tolist()
+    for cid, row in grp.iterrows():
+        assert got[cid]["size"] == row["size"]
+        assert got[cid]["mean_age"] == pytest.approx(row["mean_age"])
+        assert got[cid]["mean_income"] == pytest.approx(row["mean_income"])
+        assert got[cid]["mean_spending"] == pytest.approx(row["mean_spending"])
+    assert result["global_quantiles"]["income"]["q66"] == pytest.approx(
+        df_ref["Annual Income (k$)"].quantile(0.66)
+    )
+
+
+def test_predict_and_profile_single_inference(bundle, df_ref, monkeypatch):
+    import logic_layer.explain_service as explain_service
+
+    calls = []
+    real = explain_service.predict_labels
+    monkeypatch.setattr(
+        explain_service, "predict_labels", lambda b, df: calls.append(1) or real(b, df)
+    )
+
+    labels, result = explain_service.predict_and_profile(bundle, df_ref)
+
+    assert len(calls) == 1
+    assert result["n_rows"] == len(labels) == len(df_ref)
+
+
+def test_profile_clusters_rejects_misaligned_labels(bundle, df_ref):
+    with pytest.raises(ValueError, match="labels"):
+        profile_clusters(bundle, df_ref, labels=np.zeros(3, dtype=np.int32))
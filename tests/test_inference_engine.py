@@ -0,0 +1,186 @@
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_layer.artifacts_repository import (
+    ArtifactFormatError,
+    load_bundle,
+    load_engine,
+    resolve_artifacts_dir,
+    save_engine,
+)
+from data_layer.dataset_repository import load_csv
+from data_layer.settings import ENGINE_FILENAME, PROJECT_ROOT
+from logic_layer.inference_engine import compile_pipeline
+from logic_layer.prediction_service import predict_one
+
+
+@pytest.fixture(scope="module")
+def bundle():
+    return load_bundle()
+
+
+@pytest.fixture(scope="module")
+def df_ref():
+    return load_csv(PROJECT_ROOT / "data" / "Mall_Customers.csv")
+
+
+def test_bundle_has_compiled_engine(bundle):
+    assert bundle.engine is not None
+    assert bundle.engine.n_clusters == bundle.params["n_clusters"]
+
+
+def test_engine_matches_pipeline_on_reference_csv(bundle, df_ref):
+    expected = bundle.pipeline.predict(df_ref[bundle.expected_columns])
+
+    from_dicts = [bundle.engine.predict_one(r) for r in df_ref.to_dict(orient="records")]
+    from_tuples = [
+        bundle.engine.predict_one(t)
+        for t in df_ref[bundle.expected_columns].itertuples(index=False, name=None)
+    ]
+
+    assert from_dicts == expected.tolist()
+    assert from_tuples == expected.tolist()
+
+
+def test_engine_transform_matches_preprocessor(bundle, df_ref):
+    X = bundle.pipeline.named_steps["preprocess"].transform(df_ref[bundle.expected_columns])
+    rows = df_ref[bundle.expected_columns].head(20).to_dict(orient="records")
+
+    for i, row in enumerate(rows):
+        np.testing.assert_allclose(bundle.engine.transform_one(row), X[i])
+
+
+def test_engine_missing_and_unknown_values_match_pipeline(bundle):
+    rows = [
+        {"Gender": None, "Age": np.nan, "Annual Income (k$)": 60, "Spending Score (1-100)": 50},
+        {"Gender": "Other", "Age": 40, "Annual Income (k$)": None, "Spending Score (1-100)": 10},
+    ]
+    expected = bundle.pipeline.predict(pd.DataFrame(rows)[bundle.expected_columns])
+
+    assert [predict_one(bundle, r) for r in rows] == expected.tolist()
+
+
+def test_engine_missing_column_raises(bundle):
+    with pytest.raises(ValueError, match="Missing required columns"):
+        bundle.engine.predict_one({"Gender": "Male", "Age": 30})
+
+
+def test_compile_rejects_unfitted_pipeline():
+    with pytest.raises(ValueError):
+        compile_pipeline(object(), ["Age"])
+
+
+def test_predict_columns_matches_pipeline_across_chunks(bundle, df_ref):
+    expected = bundle.pipeline.predict(df_ref[bundle.expected_columns])
+
+    labels = bundle.engine.predict_columns(df_ref, chunk_size=7)
+
+    assert labels.dtype == np.int32
+    assert labels.tolist() == expected.tolist()
+
+
+def test_predict_columns_accepts_float32_arrays(bundle, df_ref):
+    expected = bundle.pipeline.predict(df_ref[bundle.expected_columns])
+    columns = {
+        c: df_ref[c].to_numpy(dtype=np.float32)
+        for c in ["Age", "Annual Income (k$)", "Spending Score (1-100)"]
+    }
+    columns["Gender"] = df_ref["Gender"].to_numpy(dtype=object)
+
+    labels = bundle.engine.predict_columns(columns)
+
+    assert labels.tolist() == expected.tolist()
+
+
+def test_predict_columns_missing_and_unknown_values_match_pipeline(bundle):
+    df = pd.DataFrame(
+        {
+            "Gender": ["Male", None, "Other", "Female"],
+            "Age": [30, np.nan, 40, 22],
+            "Annual Income (k$)": [60, 15, np.nan, 40],
+            "Spending Score (1-100)": [50, 80, 10, np.nan],
+        }
+    )
+    expected = bundle.pipeline.predict(df)
+
+    assert bundle.engine.predict_columns(df, chunk_size=3).tolist() == expected.tolist()
+
+
+def test_predict_columns_rejects_non_numeric(bundle):
+    df = pd.DataFrame(
+        {
+            "Gender": ["Male"],
+            "Age": ["thirty"],
+            "Annual Income (k$)": [60],
+            "Spending Score (1-100)": [50],
+        }
+    )
+    with pytest.raises(ValueError, match="must be numeric"):
+        bundle.engine.predict_columns(df)
+
+
+def test_exported_engine_round_trip(bundle, df_ref, tmp_path):
+    path = tmp_path / "engine.bin"
+    save_engine(bundle.engine, path)
+
+    engine = load_engine(path)
+
+    assert engine.categorical_maps == bundle.engine.categorical_maps
+    np.testing.assert_array_equal(engine.centroids, bundle.engine.centroids)
+    # vues en lecture seule sur le fichier mappé (pas de copie en mémoire)
+    assert not engine.centroids.flags.writeable
+    assert engine.predict_columns(df_ref).tolist() == bundle.engine.predict_columns(df_ref).tolist()
+
+
+def test_engine_artifact_rejects_corruption_and_unknown_version(bundle, tmp_path):
+    path = tmp_path / "engine.bin"
+    save_engine(bundle.engine, path)
+    raw = bytearray(path.read_bytes())
+
+    flipped = raw.copy()
+    flipped[-65] ^= 0xFF  # un octet dans la zone de données
+    path.write_bytes(bytes(flipped))
+    with pytest.raises(ArtifactFormatError, match="Checksum"):
+        load_engine(path)
+
+    future = raw.copy()
+    future[8] = 99  # version du format
+    path.write_bytes(bytes(future))
+    with pytest.raises(ArtifactFormatError, match="version"):
+        load_engine(path)
+
+
+def test_corrupted_engine_artifact_falls_back_to_pipeline(bundle, df_ref, tmp_path):
+    current, _ = resolve_artifacts_dir()
+    for name in ("clustering_pipeline.joblib", "metadata.json"):
+        (tmp_path / name).write_bytes((current / name).read_bytes())
+    (tmp_path / ENGINE_FILENAME).write_bytes(b"garbage")
+
+    fallback = load_bundle(str(tmp_path), inference_only=True)
+
+    assert fallback.pipeline is not None
+    assert fallback.engine.predict_columns(df_ref).tolist() == bundle.engine.predict_columns(df_ref).tolist()
+
+
+def test_inference_only_bundle_skips_pipeline(bundle, df_ref):
+    slim = load_bundle(inference_only=True)
+
+    assert slim.pipeline is None
+    assert slim.expected_columns == bundle.expected_columns
+    assert slim.engine.predict_columns(df_ref).tolist() == bundle.engine.predict_columns(df_ref).tolist()
+
+
+def test_importing_main_defers_heavy_dependencies():
+    code = (
+        "import sys, main; "
+        "print(sorted(m for m in ('pandas', 'sklearn', 'joblib', 'jinja2') if m in sys.modules))"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+    )
+
+    assert out.stdout.strip() == "[]"
@@ -0,0 +1,109 @@
+import gzip
+import io
+import time
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from data_layer.jobs_repository import JobStore
+
+CSV = b"Gender,Age,Annual Income (k$),Spending Score (1-100)\nMale,30,60,50\nFemale,22,40,70\n"
+
+
+def test_store_progress_finish_and_ttl_cleanup(tmp_path):
+    store = JobStore(tmp_path, ttl_s=60)
+    job = store.create(io.BytesIO(b"x" * 100), filename="a.csv", format="csv")
+    job_id = job["job_id"]
+    assert job["status"] == "queued" and job["input_bytes"] == 100
+
+    store.start(job_id)
+    store.progress(job_id, rows_done=250, elapsed_s=2.0, fraction=0.25)
+    state = store.get(job_id)
+    assert (state["rows_total"], state["rows_per_s"], state["eta_s"]) == (1000, 125.0, 6.0)
+
+    store.finish(job_id, {"n_rows": 1000})
+    state = store.get(job_id)
+    assert state["status"] == "succeeded" and state["progress"] == 1.0
+    assert not store.path(job_id, "input").exists()
+    assert store.result(job_id) == {"n_rows": 1000}
+
+    active = store.create(io.BytesIO(b"y"), filename="b.csv", format="csv")["job_id"]
+    assert store.cleanup(now=time.time() + 30) == 0
+    # seul le job terminé expire ; un job en file n'est jamais purgé
+    assert store.cleanup(now=time.time() + 3600) == 1
+    assert [j["job_id"] for j in store.list()] == [active]
+    with pytest.raises(FileNotFoundError):
+        store.get("../CURRENT")
+
+
+def test_recover_fails_jobs_left_by_a_dead_process(tmp_path):
+    store = JobStore(tmp_path)
+    job_id = store.create(io.BytesIO(b"x"), filename="a.csv", format="csv")["job_id"]
+
+    assert store.recover() == 1  # pid == le nôtre : laissé par un process précédent
+    state = store.get(job_id)
+    assert state["status"] == "failed" and "restart" in state["error"]
+
+
+def _wait(client, job_id, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = client.get(f"/api/jobs/{job_id}").json()
+        if job["status"] not in ("queued", "running"):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} still running")
+
+
+def test_job_api_matches_synchronous_endpoints(tmp_path):
+    from main import app
+
+    with TestClient(app) as client:
+        app.state.job_store = JobStore(tmp_path)
+        files = {"file": ("mall.csv", CSV, "text/csv")}
+        expected = client.post("/api/cluster/file", files=files).json()
+
+        res = client.post("/api/jobs?gzip=true", files=files)
+        assert res.status_code == 202
+        job = _wait(client, res.json()["job_id"])
+        result = client.get(f"/api/jobs/{job['job_id']}/result")
+        export = client.get(f"/api/jobs/{job['job_id']}/export")
+
+        bad = client.post("/api/jobs", files={"file": ("bad.csv", b"a,b\n1,2\n", "text/csv")})
+        failed = _wait(client, bad.json()["job_id"])
+        failed_result = client.get(f"/api/jobs/{failed['job_id']}/result")
+        listed = client.get("/api/jobs").json()
+        unknown = client.get("/api/jobs/" + "0" * 32)
+
+    assert job["status"] == "succeeded"
+    assert (job["rows_done"], job["rows_total"], job["progress"]) == (2, 2, 1.0)
+    assert result.json() == expected
+
+    assert export.headers["content-type"] == "application/gzip"
+    assert 'filename="mall_clustered.csv.gz"' in export.headers["content-disposition"]
+    df = pd.read_csv(io.BytesIO(gzip.decompress(export.content)))
+    assert df["cluster_id"].tolist() == [r["cluster_id"] for r in expected["preview"]]
+
+    assert failed["status"] == "failed" and "Missing" in failed["error"]
+    assert failed_result.status_code == 409
+    assert "jobs" not in listed  # ids jamais listés : accès réservé au détenteur de l'id
+    assert listed["counts"] == {"succeeded": 1, "failed": 1}
+    assert listed["lane"]["workers"] == 1
+    assert unknown.status_code == 404
+
+
+def test_job_fails_instead_of_staying_queued_when_start_raises(tmp_path, monkeypatch):
+    from main import app
+
+    def broken_start(self, job_id):
+        raise OSError("disk full")
+
+    with TestClient(app) as client:
+        app.state.job_store = JobStore(tmp_path)
+        monkeypatch.setattr(JobStore, "start", broken_start)
+        res = client.post("/api/jobs", files={"file": ("mall.csv", CSV, "text/csv")})
+        job = _wait(client, res.json()["job_id"])
+
+    assert job["status"] == "failed"
+    assert job["error"] == "Internal error while processing the file."
@@ -0,0 +1,100 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from logic_layer import metrics_service
+from logic_layer.metrics_service import (
+    Histogram,
+    MetricsRegistry,
+    begin_request,
+    count_rows,
+    end_request,
+    stage,
+    timed,
+)
+
+ROW = {"Gender": "Male", "Age": 30, "Annual Income (k$)": 60, "Spending Score (1-100)": 50}
+CSV = b"Gender,Age,Annual Income (k$),Spending Score (1-100)\nMale,30,60,50\nFemale,22,40,70\n"
+
+
+def test_histogram_quantiles_are_bucket_estimates():
+    hist = Histogram()
+    for _ in range(90):
+        hist.observe(0.002)  # bucket ]0.001, 0.0025]
+    for _ in range(10):
+        hist.observe(0.3)  # bucket ]0.25, 0.5]
+
+    assert 0.001 < hist.quantile(0.5) <= 0.0025
+    assert 0.25 < hist.quantile(0.95) <= 0.5
+    assert hist.count == 100 and hist.sum == pytest.approx(3.18)
+
+
+def test_stages_only_recorded_inside_a_sampled_request():
+    with stage("predict"):
+        count_rows(10)  # hors requête : no-op
+
+    rec, token = begin_request()
+    try:
+        with stage("parse"):
+            pass
+        assert list(timed("parse", [1, 2])) == [1, 2]
+        count_rows(2)
+    finally:
+        end_request(token)
+
+    # 1 bloc explicite + 3 next() (le dernier constate la fin du flux)
+    assert [name for name, _ in rec.stages] == ["parse"] * 4
+    assert rec.rows == 2
+
+    reg = MetricsRegistry()
+    reg.record("/api/x", rec, total_s=0.01, bytes_in=5, bytes_out=7)
+    text = reg.render()
+    assert 'dmai_stage_seconds_count{endpoint="/api/x",stage="parse"} 1' in text
+    assert 'dmai_stage_seconds_bucket{endpoint="/api/x",stage="total",le="+Inf"} 1' in text
+    assert 'dmai_rows_total{endpoint="/api/x"} 2' in text
+    assert 'dmai_response_bytes_total{endpoint="/api/x"} 7' in text
+
+
+@pytest.fixture()
+def registry():
+    metrics_service.registry.reset()
+    yield metrics_service.registry
+    metrics_service.registry.reset()
+
+
+def test_metrics_endpoint_exposes_stages_per_endpoint(registry):
+    from main import app
+
+    with TestClient(app) as client:
+        assert client.post("/api/cluster/row", json=ROW).status_code == 200
+        files = {"file": ("mall.csv", CSV, "text/csv")}
+        assert client.post("/api/cluster/file", files=files).status_code == 200
+        res = client.get("/api/metrics")
+
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/plain")
+    text = res.text
+    for stage_name in ("parse", "predict", "profile", "serialize", "total"):
+        assert f'endpoint="/api/cluster/file",stage="{stage_name}"' in text
+    assert 'dmai_rows_total{endpoint="/api/cluster/file"} 2' in text
+    assert 'dmai_stage_quantile_seconds{endpoint="/api/cluster/row",stage="total",quantile="0.99"}' in text
+    assert 'dmai_requests_total{endpoint="/api/cluster/row",method="POST",status="200"} 1' in text
+    # /api/metrics ne se mesure pas lui-même
+    assert 'endpoint="/api/metrics"' not in text
+
+
+def test_unsampled_requests_are_only_counted(registry, monkeypatch):
+    from main import app
+    from routers_layer.instrumentation import MetricsMiddleware
+
+    stack = app.build_middleware_stack()
+    middleware = stack
+    while not isinstance(middleware, MetricsMiddleware):
+        middleware = middleware.app
+    middleware.sample_rate = 0.0
+    monkeypatch.setattr(app, "middleware_stack", stack)
+
+    with TestClient(app) as client:
+        assert client.post("/api/cluster/row", json=ROW).status_code == 200
+
+    assert registry.requests == {("/api/cluster/row", "POST", 200): 1}
+    assert registry.stages == {}
@@ -0,0 +1,132 @@
+from functools import partial
+
+import pytest
+from fastapi.testclient import TestClient
+
+from data_layer.artifacts_repository import (
+    current_version,
+    list_versions,
+    load_bundle,
+    publish_bundle,
+    resolve_artifacts_dir,
+    set_current_version,
+    version_dir,
+)
+from data_layer.dataset_repository import load_csv
+from data_layer.settings import PROJECT_ROOT
+from logic_layer.modeling_service import fit_kmeans_k4
+from main import app
+from routers_layer.serving import ModelServer, load_model
+
+REF_CSV = str(PROJECT_ROOT / "data" / "Mall_Customers.csv")
+
+
+@pytest.fixture(scope="module")
+def bundles():
+    df = load_csv(REF_CSV)
+    return load_bundle(), fit_kmeans_k4(df, random_state=7)
+
+
+@pytest.fixture()
+def registry(tmp_path, bundles):
+    v1 = publish_bundle(bundles[0], tmp_path)
+    v2 = publish_bundle(bundles[1], tmp_path, activate=False)
+    return tmp_path, v1, v2
+
+
+def test_publish_and_atomic_pointer(registry):
+    base, v1, v2 = registry
+
+    assert list_versions(base) == sorted([v1, v2])
+    assert current_version(base) == v1
+    assert resolve_artifacts_dir(base) == (version_dir(v1, base), v1)
+
+    set_current_version(v2, base)
+    assert current_version(base) == v2
+    assert not list(base.glob("*.tmp"))
+
+
+def test_unknown_or_invalid_versions_are_rejected(registry):
+    base, _, _ = registry
+
+    with pytest.raises(FileNotFoundError):
+        set_current_version("20000101T000000Z-000000", base)
+    with pytest.raises(ValueError):
+        resolve_artifacts_dir(base, "../../etc")
+
+
+def test_server_hot_reloads_and_serves_pinned_versions(registry):
+    base, v1, v2 = registry
+    swaps = []
+    server = ModelServer(
+        partial(load_model, ref_path=REF_CSV, artifacts_dir=str(base)),
+        max_pinned=1,
+        on_swap=swaps.append,
+        artifacts_dir=str(base),
+    )
+    assert server.current.version == v1
+    assert server.refresh() is False
+
+    pinned = server.get(v2)
+    assert pinned.version == v2 and pinned.cluster_profile_map
+    assert server.cached(v2) is pinned
+
+    set_current_version(v2, str(base))
+    assert server.refresh() is True
+    # la version épinglée déjà chargée est promue sans rechargement
+    assert server.current is pinned
+    assert [m.version for m in swaps] == [v1, v2]
+
+
+def test_concurrent_requests_load_a_pinned_version_once(registry):
+    import threading
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    base, v1, v2 = registry
+    loads = []
+    gate = threading.Event()
+
+    def slow_loader(version):
+        loads.append(version)
+        if version is not None:
+            gate.wait(5)
+            time.sleep(0.05)
+        return load_model(version, ref_path=REF_CSV, artifacts_dir=str(base))
+
+    server = ModelServer(slow_loader, artifacts_dir=str(base))
+    with ThreadPoolExecutor(4) as ex:
+        futures = [ex.submit(server.get, v2) for _ in range(4)]
+        time.sleep(0.1)
+        gate.set()
+        models = [f.result() for f in futures]
+
+    assert loads == [None, v2]
+    assert all(m is models[0] for m in models)
+    with pytest.raises(FileNotFoundError):
+        server.get("20000101T000000Z-000000")
+    assert not server._loading
+
+
+def test_api_model_version_parameter(registry):
+    base, v1, v2 = registry
+
+    with TestClient(app) as client:
+        app.state.models.stop()
+        app.state.models = ModelServer(
+            partial(load_model, ref_path=REF_CSV, artifacts_dir=str(base)),
+            artifacts_dir=str(base),
+        )
+        row = {"Gender": "Male", "Age": 30, "Annual Income (k$)": 60, "Spending Score (1-100)": 50}
+
+        default = client.post("/api/cluster/row", json=row)
+        pinned = client.post("/api/cluster/row", params={"model_version": v2}, json=row)
+        unknown = client.post("/api/cluster/row", params={"model_version": "nope"}, json=row)
+        status = client.get("/api/models").json()
+
+    assert default.json()["model_version"] == v1
+    assert pinned.json()["model_version"] == v2
+    assert unknown.status_code == 404
+    assert status["current"] == v1
+    assert v2 in status["loaded"]
+    assert status["available"] == sorted([v1, v2])
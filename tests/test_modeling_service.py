@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+
+from data_layer.dataset_repository import iter_csv_chunks, load_csv
+from data_layer.settings import PROJECT_ROOT
+from logic_layer import modeling_service
+from logic_layer.modeling_service import fit_kmeans_k4, fit_minibatch_kmeans, sweep_kmeans
+from logic_layer.preprocessing import (
+    EXPECTED_COLUMNS,
+    build_preprocessor,
+    fit_preprocessor_streaming,
+    split_feature_types,
+)
+
+REF_CSV = PROJECT_ROOT / "data" / "Mall_Customers.csv"
+
+
+@pytest.fixture(scope="module")
+def df_ref():
+    df = load_csv(REF_CSV)
+    df.loc[[3, 40], "Age"] = np.nan
+    df.loc[[5, 6], "Gender"] = None
+    return df
+
+
+def _chunks(df, size):
+    return (df.iloc[i:i + size] for i in range(0, len(df), size))
+
+
+def test_streaming_preprocessor_matches_batch_fit(df_ref):
+    numeric, categorical = split_feature_types(EXPECTED_COLUMNS)
+    expected = build_preprocessor(numeric, categorical).fit(df_ref[EXPECTED_COLUMNS])
+
+    streamed = fit_preprocessor_streaming(_chunks(df_ref, 7), numeric, categorical)
+
+    np.testing.assert_allclose(
+        streamed.transform(df_ref[EXPECTED_COLUMNS]),
+        expected.transform(df_ref[EXPECTED_COLUMNS]),
+        atol=1e-12,
+    )
+
+
+def test_minibatch_training_out_of_core():
+    df = load_csv(REF_CSV)
+    # blocs plus petits que k : le 1er partial_fit attend d'avoir assez de lignes
+    bundle = fit_minibatch_kmeans(
+        lambda: iter_csv_chunks(REF_CSV, 3, columns=EXPECTED_COLUMNS),
+        batch_size=32,
+        epochs=5,
+        metrics_sample=50,
+    )
+
+    assert bundle.model_name == "minibatch_kmeans"
+    assert bundle.params["n_rows"] == len(df)
+    assert bundle.params["metrics_sample"] == 50
+    assert bundle.engine.predict_columns(df).tolist() == bundle.pipeline.predict(df).tolist()
+
+    # qualité proche du KMeans en mémoire (inertie sur le même espace)
+    reference = fit_kmeans_k4(df)
+    X = reference.pipeline.named_steps["preprocess"].transform(df)
+    inertia = -bundle.pipeline.named_steps["model"].score(X)
+    assert inertia < 1.3 * reference.pipeline.named_steps["model"].inertia_
+
+
+def test_minibatch_training_rejects_too_few_rows(df_ref):
+    with pytest.raises(ValueError, match="Not enough rows"):
+        fit_minibatch_kmeans(lambda: _chunks(df_ref.head(3), 2))
+
+
+@pytest.mark.parametrize(("criterion", "pick"), [("silhouette", max), ("davies_bouldin", min)])
+def test_sweep_selects_best_run_with_single_preprocessing(criterion, pick, monkeypatch):
+    df = load_csv(REF_CSV)
+    calls = []
+    build = modeling_service.build_preprocessor
+    monkeypatch.setattr(
+        modeling_service, "build_preprocessor", lambda *a: calls.append(a) or build(*a)
+    )
+
+    bundle, runs = sweep_kmeans(df, ks=range(2, 7), seeds=(1, 2), criterion=criterion, n_jobs=1)
+
+    assert len(calls) == 1
+    assert [(r["n_clusters"], r["random_state"]) for r in runs] == [
+        (k, s) for k in range(2, 7) for s in (1, 2)
+    ]
+    best = pick(runs, key=lambda r: r["metrics"][criterion])
+    assert bundle.params["n_clusters"] == best["n_clusters"]
+    assert bundle.metrics == best["metrics"]
+    assert bundle.engine.n_clusters == best["n_clusters"]
+
+
+def test_sweep_accepts_one_shot_iterables():
+    _, runs = sweep_kmeans(
+        load_csv(REF_CSV), ks=iter([2, 3]), seeds=(s for s in (1, 2)), n_init=1, n_jobs=1
+    )
+
+    assert [(r["n_clusters"], r["random_state"]) for r in runs] == [(2, 1), (2, 2), (3, 1), (3, 2)]
+
+
+def test_sweep_rejects_unknown_criterion():
+    with pytest.raises(ValueError, match="Unknown criterion"):
+        sweep_kmeans(load_csv(REF_CSV), criterion="accuracy")
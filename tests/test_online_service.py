@@ -0,0 +1,237 @@
+from functools import partial
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from data_layer.artifacts_repository import (
+    current_version,
+    delete_version,
+    list_versions,
+    load_bundle,
+    load_reference_profiles,
+    publish_bundle,
+)
+from data_layer.dataset_repository import load_csv
+from data_layer.settings import PROJECT_ROOT
+from logic_layer.online_service import OnlineKMeans, configure_online_learning
+from routers_layer.serving import ModelServer, load_model, publish_checkpoint
+
+REF_CSV = str(PROJECT_ROOT / "data" / "Mall_Customers.csv")
+SPENDING = "Spending Score (1-100)"
+
+
+@pytest.fixture(scope="module")
+def bundle():
+    return load_bundle()
+
+
+def _spending_axis(bundle):
+    engine = bundle.engine
+    return int(engine.numeric_index[engine.numeric_columns.index(SPENDING)])
+
+
+def test_centroids_are_stable_on_training_data_and_follow_drift(tmp_path, bundle):
+    df = load_csv(REF_CSV)
+    learner = OnlineKMeans(
+        bundle, publish=partial(publish_bundle, artifacts_dir=tmp_path), half_life_rows=200
+    )
+    start = learner.centroids.copy()
+
+    # KMeans convergé : chaque centroïde est la moyenne de ses points -> point fixe
+    for _ in range(5):
+        learner.update(df)
+    assert np.allclose(learner.centroids, start, atol=0.05)
+
+    shifted = df.assign(**{SPENDING: df[SPENDING] + 15})
+    for _ in range(10):
+        learner.update(shifted)
+    axis = _spending_axis(bundle)
+    assert (learner.centroids[:, axis] > start[:, axis]).all()
+    assert learner.stats()["rows_seen"] == 15 * len(df)
+
+    version = learner.checkpoint()
+    assert current_version(tmp_path) == version
+    published = load_bundle(str(tmp_path))
+    assert learner.owns(published) and not learner.owns(bundle)
+    assert np.allclose(published.engine.centroids, learner.centroids)
+    # pipeline sklearn et moteur NumPy publiés prédisent pareil
+    assert (published.pipeline.predict(df) == published.engine.predict_columns(df)).all()
+    assert published.params["online"]["rows_seen"] == 15 * len(df)
+
+
+def test_queue_is_bounded_and_checkpoint_needs_min_rows(tmp_path, bundle):
+    df = load_csv(REF_CSV)
+    learner = OnlineKMeans(
+        bundle,
+        publish=partial(publish_bundle, artifacts_dir=tmp_path),
+        min_rows=1_000,
+        max_queued_rows=300,
+    )
+
+    assert learner.observe(df, len(df)) is True
+    assert learner.observe(df, len(df)) is False  # 400 > 300 : lot ignoré
+    learner.flush()
+
+    stats = learner.stats()
+    assert (stats["rows_seen"], stats["rows_dropped"], stats["rows_queued"]) == (200, 200, 0)
+    assert learner.checkpoint() is None
+    assert learner.checkpoint(force=True) is not None
+
+
+def test_checkpoints_ship_reference_profiles_and_are_pruned(tmp_path, bundle, monkeypatch):
+    import routers_layer.serving as serving
+
+    base = publish_bundle(bundle, tmp_path)
+    df = load_csv(REF_CSV)
+    learner = OnlineKMeans(
+        bundle,
+        publish=partial(
+            publish_checkpoint, ref_path=REF_CSV, artifacts_dir=str(tmp_path), keep_versions=2
+        ),
+        version=base,
+    )
+    shifted = df.assign(**{SPENDING: df[SPENDING] + 10})
+    checkpoints = []
+    for _ in range(4):
+        learner.update(shifted)
+        checkpoints.append(learner.checkpoint(force=True))
+
+    # version de base (hors ligne) + 2 derniers checkpoints
+    assert sorted(list_versions(tmp_path)) == sorted([base, *checkpoints[-2:]])
+    assert current_version(tmp_path) == checkpoints[-1]
+    with pytest.raises(ValueError, match="current"):
+        delete_version(checkpoints[-1], tmp_path)
+
+    # profils écrits avec le checkpoint : rechargement sans re-profiler le dataset
+    assert load_reference_profiles(REF_CSV, str(tmp_path)) is not None
+    monkeypatch.setattr(serving, "profile_clusters", lambda *a: pytest.fail("re-profiled"))
+    model = load_model(ref_path=REF_CSV, artifacts_dir=str(tmp_path))
+    assert model.version == checkpoints[-1] and model.ref_n_rows == len(df)
+
+
+def test_refresh_racing_a_checkpoint_keeps_the_learned_state(tmp_path, bundle):
+    import main
+
+    v1 = publish_bundle(bundle, tmp_path)
+    server = ModelServer(
+        partial(load_model, ref_path=REF_CSV, artifacts_dir=str(tmp_path)),
+        on_swap=main._publish_current,
+        artifacts_dir=str(tmp_path),
+    )
+
+    def publish(updated):
+        version = publish_checkpoint(updated, ref_path=REF_CSV, artifacts_dir=str(tmp_path))
+        # hot reload du watcher entre la bascule de CURRENT et le retour de checkpoint()
+        assert server.refresh()
+        return version
+
+    df = load_csv(REF_CSV)
+    learner = configure_online_learning(
+        OnlineKMeans(server.current.bundle, publish=publish, version=v1, checkpoint_s=3600)
+    )
+    try:
+        learner.update(df.assign(**{SPENDING: df[SPENDING] + 15}))
+        before = learner.stats()["effective_counts"], learner.centroids.copy()
+        version = learner.checkpoint(force=True)
+        after = learner.stats()["effective_counts"], learner.centroids.copy()
+
+        # version publiée hors ligne : le learner repart d'elle
+        v3 = publish_bundle(bundle, tmp_path)
+        assert server.refresh()
+        rebased = learner.stats()
+    finally:
+        configure_online_learning(None)
+
+    assert server.current.version == v3 and version != v1
+    assert after[0] == before[0] and np.array_equal(after[1], before[1])
+    assert rebased["base_version"] == v3 and rebased["effective_counts"] != before[0]
+
+
+def test_single_online_learner_per_registry(tmp_path):
+    import os
+    import subprocess
+    import sys
+
+    from data_layer.artifacts_repository import acquire_online_lock, release_online_lock
+
+    peer = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+    try:
+        (tmp_path / "online.lock").write_text(str(peer.pid))
+        assert acquire_online_lock(tmp_path) is False  # worker vivant : il garde le verrou
+    finally:
+        peer.kill()
+        peer.wait()
+
+    assert acquire_online_lock(tmp_path) is True  # verrou d'un process mort repris
+    assert (tmp_path / "online.lock").read_text() == str(os.getpid())
+    release_online_lock(tmp_path)
+    assert not (tmp_path / "online.lock").exists()
+
+
+def test_background_thread_survives_unexpected_update_errors(tmp_path, bundle, monkeypatch):
+    df = load_csv(REF_CSV)
+    learner = OnlineKMeans(bundle, publish=partial(publish_bundle, artifacts_dir=tmp_path))
+    real_update = learner.update
+    calls = []
+
+    def flaky_update(columns):
+        calls.append(len(columns))
+        if len(calls) == 1:
+            raise TypeError("boom")
+        return real_update(columns)
+
+    monkeypatch.setattr(learner, "update", flaky_update)
+    learner.start()
+    try:
+        learner.observe(df, len(df))
+        learner.observe(df, len(df))
+        learner.flush()
+    finally:
+        learner.stop()
+
+    stats = learner.stats()
+    assert stats["last_error"] == "boom"
+    assert (stats["rows_seen"], stats["rows_dropped"], stats["rows_queued"]) == (200, 200, 0)
+
+
+def test_ingest_and_checkpoint_swap_the_served_model(tmp_path, bundle):
+    from main import app
+
+    v1 = publish_bundle(bundle, tmp_path)
+    rows = load_csv(REF_CSV).head(50)
+    payload = {c: rows[c].tolist() for c in bundle.expected_columns}
+    payload[SPENDING] = [s + 20 for s in payload[SPENDING]]
+
+    with TestClient(app) as client:
+        assert client.get("/api/online").json() == {"enabled": False}
+        assert client.post("/api/online/ingest", json=payload).status_code == 404
+
+        app.state.models.stop()
+        server = app.state.models = ModelServer(
+            partial(load_model, ref_path=REF_CSV, artifacts_dir=str(tmp_path)),
+            artifacts_dir=str(tmp_path),
+        )
+        configure_online_learning(
+            OnlineKMeans(
+                server.current.bundle,
+                publish=partial(publish_bundle, artifacts_dir=tmp_path),
+                on_checkpoint=lambda _: server.refresh(),
+                version=v1,
+                checkpoint_s=3600,
+            )
+        )
+        try:
+            ingest = client.post("/api/online/ingest", json=payload).json()
+            row = {"Gender": "Male", "Age": 30, "Annual Income (k$)": 60, SPENDING: 50}
+            assert client.post("/api/cluster/row", json=row).json()["model_version"] == v1
+            res = client.post("/api/online/checkpoint").json()
+            after = client.post("/api/cluster/row", json=row).json()
+            metadata = client.get("/api/metadata").json()
+        finally:
+            configure_online_learning(None)
+
+    assert ingest == {"n_rows": 50, "accepted": True}
+    assert res["rows_seen"] == 51 and res["base_version"] == res["model_version"] != v1
+    assert after["model_version"] == res["model_version"]
+    assert metadata["params"]["online"]["base_version"] == v1
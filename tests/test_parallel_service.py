@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_layer.artifacts_repository import load_bundle
+from data_layer.dataset_repository import load_csv
+from data_layer.settings import PROJECT_ROOT
+from logic_layer.parallel_service import (
+    ParallelScorer,
+    configure_parallel_scoring,
+    shutdown_parallel_scoring,
+)
+from logic_layer.prediction_service import predict_labels
+
+
+@pytest.fixture(scope="module")
+def bundle():
+    return load_bundle()
+
+
+@pytest.fixture(scope="module")
+def scorer():
+    s = ParallelScorer(n_workers=2, min_rows=10)
+    yield s
+    s.shutdown()
+
+
+def test_parallel_scorer_matches_serial_engine(bundle, scorer):
+    df = load_csv(PROJECT_ROOT / "data" / "Mall_Customers.csv")
+    df.loc[3, "Age"] = np.nan
+    df.loc[5, "Gender"] = None
+
+    labels = scorer.predict(bundle.engine, df)
+
+    assert labels.dtype == np.int32
+    assert labels.tolist() == bundle.engine.predict_columns(df).tolist()
+
+
+def test_parallel_scorer_small_batch_stays_in_process(bundle, scorer):
+    df = pd.DataFrame(
+        [{"Gender": "Male", "Age": 30, "Annual Income (k$)": 60, "Spending Score (1-100)": 50}]
+    )
+
+    assert scorer.predict(bundle.engine, df).tolist() == bundle.engine.predict_columns(df).tolist()
+
+
+def test_predict_labels_uses_configured_pool(bundle):
+    rng = np.random.default_rng(0)
+    n = 5_000
+    df = pd.DataFrame(
+        {
+            "Gender": rng.choice(["Male", "Female"], n),
+            "Age": rng.integers(18, 70, n),
+            "Annual Income (k$)": rng.integers(15, 140, n),
+            "Spending Score (1-100)": rng.integers(1, 100, n),
+        }
+    )
+    expected = bundle.pipeline.predict(df)
+
+    configure_parallel_scoring(n_workers=2, min_rows=1_000)
+    try:
+        labels = predict_labels(bundle, df)
+    finally:
+        shutdown_parallel_scoring()
+
+    assert labels.tolist() == expected.tolist()
+
+
+def test_concurrent_requests_with_two_engines_share_one_pool(bundle, scorer):
+    import dataclasses
+    from concurrent.futures import ThreadPoolExecutor
+
+    df = load_csv(PROJECT_ROOT / "data" / "Mall_Customers.csv")
+    # 2e version : centroïdes permutés -> labels différents pour les mêmes lignes
+    centroids = bundle.engine.centroids[::-1].copy()
+    other = dataclasses.replace(
+        bundle.engine,
+        centroids=centroids,
+        centroid_sq_norms=np.einsum("ij,ij->i", centroids, centroids),
+    )
+    engines = [bundle.engine, other] * 8
+    expected = [e.predict_columns(df).tolist() for e in engines[:2]]
+    assert expected[0] != expected[1]
+
+    pool_before = scorer._get_pool()
+    with ThreadPoolExecutor(8) as ex:
+        results = list(ex.map(lambda e: scorer.predict(e, df).tolist(), engines))
+
+    assert results == expected * 8
+    # changer de moteur ne recrée pas le pool
+    assert scorer._get_pool() is pool_before
@@ -0,0 +1,137 @@
+import pstats
+import threading
+import tracemalloc
+
+import pytest
+from fastapi.testclient import TestClient
+
+from data_layer.profiling_repository import ProfileStore, new_profile_id
+from logic_layer.profiling_service import RequestProfile, run_profiled
+
+ROW = {"Gender": "Male", "Age": 30, "Annual Income (k$)": 60, "Spending Score (1-100)": 50}
+
+
+def _work(n: int) -> list[int]:
+    return [i * i for i in range(n)]
+
+
+def test_request_profile_merges_calls_across_threads():
+    assert run_profiled(_work, 3) == [0, 1, 4]  # hors requête profilée : appel direct
+
+    prof = RequestProfile()
+    token = prof.start()
+    try:
+        threads = [threading.Thread(target=run_profiled, args=(_work, 10_000)) for _ in range(3)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        prof.stop(token)
+
+    assert not tracemalloc.is_tracing()
+    # le contexte n'est pas hérité par threading.Thread : aucun appel profilé
+    assert prof.stats is None
+
+    token = prof.start()
+    try:
+        run_profiled(_work, 10_000)
+        run_profiled(_work, 10_000)
+    finally:
+        prof.stop(token)
+
+    calls = {fn[2]: cc for fn, (cc, *_rest) in prof.stats.stats.items()}
+    assert calls["_work"] == 2
+    assert "_work" in prof.cpu_summary()
+    assert prof.peak_bytes > 0 and prof.alloc_summary()
+
+
+def test_store_keeps_only_most_recent_profiles(tmp_path):
+    store = ProfileStore(tmp_path, max_profiles=2)
+    ids = [f"2026010{i}T000000Z-0000000{i}" for i in range(1, 4)]
+    for profile_id in ids:
+        prof = RequestProfile()
+        prof.stop(prof.start())
+        prof.runcall(_work, 10)
+        store.save(profile_id, {"path": "/api/x"}, prof)
+
+    assert [p["id"] for p in store.list()] == ids[:0:-1]
+    assert store.get(ids[2])["files"] == ["cpu", "alloc"]
+    assert not store.path(ids[0], "cpu").exists()
+    assert pstats.Stats(str(store.path(ids[2], "cpu"))).total_calls > 0
+    with pytest.raises(FileNotFoundError):
+        store.path("../CURRENT", "meta")
+    with pytest.raises(FileNotFoundError):
+        store.get(new_profile_id())
+
+
+@pytest.fixture()
+def profiled_app(tmp_path, monkeypatch):
+    from main import app
+    from routers_layer.instrumentation import ProfilingMiddleware
+
+    store = ProfileStore(tmp_path)
+    monkeypatch.setattr(app.state, "profile_store", store, raising=False)
+    monkeypatch.setattr(app.state, "profiling_token", "s3cret", raising=False)
+    inner = app.build_middleware_stack()
+    stack = ProfilingMiddleware(inner, store=store, token="s3cret")
+    monkeypatch.setattr(app, "middleware_stack", stack)
+    return app
+
+
+def test_header_triggered_profile_is_listed_and_downloadable(profiled_app):
+    auth = {"X-Profile-Token": "s3cret"}
+    with TestClient(profiled_app) as client:
+        plain = client.post("/api/cluster/row", json=ROW)
+        wrong = client.post("/api/cluster/row", json=ROW, headers={"X-Profile": "1"})
+        # autre ligne : un hit du cache de prédictions n'exécute rien dans la lane
+        row = {**ROW, "Age": 31}
+        res = client.post("/api/cluster/row", json=row, headers={"X-Profile": "1", **auth})
+        assert "x-profile-id" not in plain.headers and "x-profile-id" not in wrong.headers
+        profile_id = res.headers["x-profile-id"]
+
+        assert client.get("/api/profiling").status_code == 403
+        listed = client.get("/api/profiling", headers=auth).json()["profiles"]
+        meta = client.get(f"/api/profiling/{profile_id}", headers=auth).json()
+        cpu = client.get(f"/api/profiling/{profile_id}/cpu", headers=auth)
+        missing = client.get(f"/api/profiling/{profile_id}/meta", headers=auth)
+
+    assert [p["id"] for p in listed] == [profile_id]
+    assert "cpu_top" not in listed[0]
+    assert (meta["path"], meta["endpoint"], meta["status"]) == (
+        "/api/cluster/row",
+        "/api/cluster/row",
+        200,
+    )
+    assert "predict_one" in meta["cpu_top"]
+    assert meta["alloc_top"] and meta["alloc_peak_bytes"] > 0
+    assert cpu.status_code == 200 and cpu.content
+    assert missing.status_code == 404
+
+
+def test_without_token_header_is_ignored_and_endpoints_refused(tmp_path, monkeypatch):
+    from main import app
+    from routers_layer.instrumentation import ProfilingMiddleware
+
+    store = ProfileStore(tmp_path)
+    monkeypatch.setattr(app.state, "profile_store", store, raising=False)
+    monkeypatch.setattr(app.state, "profiling_token", None, raising=False)
+    stack = ProfilingMiddleware(app.build_middleware_stack(), store=store, token=None)
+    monkeypatch.setattr(app, "middleware_stack", stack)
+
+    with TestClient(app) as client:
+        res = client.post("/api/cluster/row", json=ROW, headers={"X-Profile": "1"})
+        listed = client.get("/api/profiling")
+
+    assert res.status_code == 200 and "x-profile-id" not in res.headers
+    assert store.list() == []
+    assert listed.status_code == 403
+
+
+def test_profiling_endpoints_404_when_disabled():
+    from main import app
+
+    with TestClient(app) as client:
+        res = client.get("/api/profiling")
+
+    assert res.status_code == 404
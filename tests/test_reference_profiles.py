@@ -0,0 +1,112 @@
+import os
+import shutil
+
+import pytest
+
+from data_layer.artifacts_repository import (
+    load_bundle,
+    load_reference_profiles,
+    resolve_artifacts_dir,
+    save_reference_profiles,
+)
+from data_layer.dataset_repository import load_csv
+from data_layer.settings import (
+    METADATA_FILENAME,
+    PIPELINE_FILENAME,
+    PROFILES_FILENAME,
+    PROJECT_ROOT,
+)
+from logic_layer.explain_service import profile_clusters
+
+
+@pytest.fixture()
+def workspace(tmp_path):
+    art = tmp_path / "artifacts"
+    art.mkdir()
+    current, _ = resolve_artifacts_dir()
+    for name in (PIPELINE_FILENAME, METADATA_FILENAME):
+        shutil.copy(current / name, art / name)
+    data = tmp_path / "ref.csv"
+    shutil.copy(PROJECT_ROOT / "data" / "Mall_Customers.csv", data)
+    return art, data
+
+
+def _profile(art, data):
+    return profile_clusters(load_bundle(str(art)), load_csv(data))
+
+
+def test_cached_profiles_round_trip(workspace):
+    art, data = workspace
+    prof = _profile(art, data)
+
+    save_reference_profiles(prof, data, str(art))
+
+    assert load_reference_profiles(data, str(art)) == prof
+
+
+def test_precomputed_data_fingerprint_is_reused(workspace, monkeypatch):
+    import data_layer.artifacts_repository as artifacts
+
+    art, data = workspace
+    prof = _profile(art, data)
+    fingerprint = artifacts.file_fingerprint(data)
+    hashed = []
+    real = artifacts.file_fingerprint
+    monkeypatch.setattr(artifacts, "file_fingerprint", lambda p: hashed.append(p) or real(p))
+
+    save_reference_profiles(prof, data, str(art), data_fingerprint=fingerprint)
+
+    assert hashed == [art / PIPELINE_FILENAME]  # dataset non relu
+    monkeypatch.undo()
+    assert load_reference_profiles(data, str(art)) == prof
+
+
+def test_cache_survives_touch_but_not_content_change(workspace):
+    art, data = workspace
+    save_reference_profiles(_profile(art, data), data, str(art))
+
+    # mtime modifié, contenu identique -> cache toujours valide (comparaison sha256)
+    os.utime(data, ns=(0, 0))
+    assert load_reference_profiles(data, str(art)) is not None
+
+    data.write_text(data.read_text(encoding="utf-8").replace("Male", "Mala", 1), encoding="utf-8")
+    assert load_reference_profiles(data, str(art)) is None
+
+
+def test_cache_invalidated_by_new_pipeline(workspace):
+    art, data = workspace
+    save_reference_profiles(_profile(art, data), data, str(art))
+
+    with (art / PIPELINE_FILENAME).open("ab") as f:
+        f.write(b"\0")
+
+    assert load_reference_profiles(data, str(art)) is None
+
+
+def test_missing_or_corrupted_cache_is_ignored(workspace):
+    art, data = workspace
+    assert load_reference_profiles(data, str(art)) is None
+
+    save_reference_profiles(_profile(art, data), data, str(art))
+    (art / PROFILES_FILENAME).write_text("{not json", encoding="utf-8")
+
+    assert load_reference_profiles(data, str(art)) is None
+
+
+def test_startup_uses_cache_without_recomputing(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    import main
+    from routers_layer import serving
+
+    ref_path = main._resolve_ref_data_path()
+    if load_reference_profiles(ref_path) is None:
+        pytest.skip("reference profiles not precomputed (run python -m scripts.train)")
+
+    def _fail(*args, **kwargs):
+        raise AssertionError("profiles recomputed at startup")
+
+    monkeypatch.setattr(serving, "profile_clusters", _fail)
+    with TestClient(main.app) as client:
+        assert client.get("/api/profiles").status_code == 200
+        assert client.app.state.cluster_profile_map
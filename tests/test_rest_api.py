@@ -1,5 +1,6 @@
 import io
 
+import numpy as np
 import pandas as pd
 from fastapi.testclient import TestClient
 
@@ -64,3 +65,198 @@ def test_cluster_file():
 
         assert data["n_rows"] == 2
         assert "cluster_counts" in data
+
+
+def test_cluster_file_streams_in_chunks(monkeypatch):
+    import routers_layer.rest_router as rest_router
+    from data_layer.dataset_repository import load_csv
+    from logic_layer.prediction_service import predict_labels
+
+    monkeypatch.setattr(rest_router, "UPLOAD_CHUNK_ROWS", 7)
+    csv_path = "data/Mall_Customers.csv"
+
+    with TestClient(app) as client, open(csv_path, "rb") as f:
+        res = client.post("/api/cluster/file", files={"file": ("mall.csv", f, "text/csv")})
+
+        assert res.status_code == 200, res.text
+        data = res.json()
+
+        labels = predict_labels(app.state.bundle, load_csv(csv_path))
+        expected_counts = {str(k): int(v) for k, v in enumerate(np.bincount(labels)) if v}
+
+        assert data["n_rows"] == 200
+        assert data["cluster_counts"] == expected_counts
+        assert len(data["preview"]) == 20
+        assert [r["cluster_id"] for r in data["preview"]] == labels[:20].tolist()
+        assert sum(p["size"] for p in data["profiles"]) == 200
+
+
+def test_cluster_file_missing_columns_returns_400():
+    csv_bytes = io.BytesIO(b"Gender,Age\nMale,30\n")
+
+    with TestClient(app) as client:
+        res = client.post(
+            "/api/cluster/file",
+            files={"file": ("bad.csv", csv_bytes, "text/csv")},
+        )
+
+        assert res.status_code == 400
+        assert "Missing required columns" in res.json()["detail"]
+
+
+def test_cluster_file_export_streams_chunks(monkeypatch):
+    import gzip
+
+    import routers_layer.rest_router as rest_router
+    from data_layer.dataset_repository import load_csv
+    from logic_layer.prediction_service import predict_labels
+
+    monkeypatch.setattr(rest_router, "UPLOAD_CHUNK_ROWS", 7)
+    csv_path = "data/Mall_Customers.csv"
+    df_ref = load_csv(csv_path)
+
+    with TestClient(app) as client:
+        with open(csv_path, "rb") as f:
+            res = client.post(
+                "/api/cluster/file/export",
+                files={"file": ("mall.csv", f, "text/csv")},
+            )
+        assert res.status_code == 200, res.text
+        assert 'filename="mall_clustered.csv"' in res.headers["content-disposition"]
+        df_out = pd.read_csv(io.BytesIO(res.content))
+
+        with open(csv_path, "rb") as f:
+            res_gz = client.post(
+                "/api/cluster/file/export?gzip=true",
+                files={"file": ("mall.csv", f, "text/csv")},
+            )
+        assert res_gz.status_code == 200, res_gz.text
+        df_gz = pd.read_csv(io.BytesIO(gzip.decompress(res_gz.content)))
+
+        labels = predict_labels(app.state.bundle, df_ref)
+
+    assert rest_router.file_lane.pending == 0
+    assert list(df_out.columns) == [*df_ref.columns, "cluster_id"]
+    assert df_out["cluster_id"].tolist() == labels.tolist()
+    pd.testing.assert_frame_equal(df_out, df_gz)
+
+
+def test_cluster_file_export_invalid_csv_returns_400():
+    csv_bytes = io.BytesIO(b"Gender,Age\nMale,30\n")
+
+    with TestClient(app) as client:
+        res = client.post(
+            "/api/cluster/file/export",
+            files={"file": ("bad.csv", csv_bytes, "text/csv")},
+        )
+
+        assert res.status_code == 400
+
+
+def test_cluster_rows_columnar_and_records():
+    from data_layer.dataset_repository import load_csv
+    from logic_layer.prediction_service import predict_labels
+
+    df = load_csv("data/Mall_Customers.csv")
+    columnar = {c: df[c].tolist() for c in df.columns}
+    records = df.rename(
+        columns={"Annual Income (k$)": "Annual_Income_k", "Spending Score (1-100)": "Spending_Score"}
+    ).to_dict(orient="records")
+
+    with TestClient(app) as client:
+        res_cols = client.post("/api/cluster/rows", json=columnar)
+        res_recs = client.post("/api/cluster/rows", json=records)
+
+        assert res_cols.status_code == 200, res_cols.text
+        assert res_recs.status_code == 200, res_recs.text
+        data = res_cols.json()
+
+        expected = predict_labels(app.state.bundle, df).tolist()
+        prof_map = app.state.cluster_profile_map
+
+    assert data["n_rows"] == 200
+    assert data["cluster_ids"] == expected
+    assert data["cluster_labels"] == [prof_map[c]["label"] for c in expected]
+    assert res_recs.json()["cluster_ids"] == expected
+
+
+def test_cluster_rows_reports_invalid_values():
+    payload = {
+        "Gender": ["Male", 3],
+        "Age": [30, "abc"],
+        "Annual Income (k$)": [60, 40],
+        "Spending Score (1-100)": [50, None],
+    }
+
+    with TestClient(app) as client:
+        res = client.post("/api/cluster/rows", json=payload)
+        missing = client.post("/api/cluster/rows", json={"Gender": ["Male"]})
+
+    assert res.status_code == 422
+    locs = [e["loc"] for e in res.json()["detail"]]
+    assert ["body", "Gender", 1] in locs
+    assert ["body", "Age", 1] in locs
+    assert ["body", "Spending Score (1-100)", 1] in locs
+    assert missing.status_code == 422
+
+
+def test_cluster_rows_limits_rows_before_validation_and_body_size(monkeypatch):
+    import routers_layer.rest_router as rest_router
+
+    monkeypatch.setattr(rest_router, "BULK_ROWS_LIMIT", 3)
+    monkeypatch.setattr(rest_router, "BULK_BODY_LIMIT_BYTES", 2_000)
+    validated = []
+    monkeypatch.setattr(
+        rest_router,
+        "_validate_rows_columns",
+        lambda *args: validated.append(args) or {},
+    )
+    record = {"Gender": "Male", "Age": 30, "Annual Income (k$)": 60, "Spending Score (1-100)": 50}
+
+    with TestClient(app) as client:
+        too_many = client.post("/api/cluster/rows", json=[record] * 4)
+        too_many_cols = client.post("/api/cluster/rows", json={"Age": [1, 2, 3, 4]})
+        too_big = client.post("/api/cluster/rows", json=[record] * 40)
+
+    assert too_many.status_code == too_many_cols.status_code == 413
+    assert "Too many rows (4 > 3)" in too_many.json()["detail"]
+    assert validated == []  # rejeté avant la validation O(n)
+    assert too_big.status_code == 413
+    assert "too large" in too_big.json()["detail"]
+
+
+def test_export_error_after_first_chunk_is_not_a_complete_download(monkeypatch):
+    import zlib
+
+    import pytest
+
+    import routers_layer.rest_router as rest_router
+
+    monkeypatch.setattr(rest_router, "UPLOAD_CHUNK_ROWS", 7)
+    header = "Gender,Age,Annual Income (k$),Spending Score (1-100)\n"
+    body = header + "Male,30,60,50\n" * 9 + "Male,abc,60,50\n" + "Female,22,40,70\n" * 4
+
+    with TestClient(app) as client:
+        bundle = app.state.bundle
+        # en-têtes déjà partis : l'erreur du bloc 2 interrompt la réponse (pas de 200 complet)
+        with pytest.raises(ValueError, match="Age"):
+            client.post(
+                "/api/cluster/file/export",
+                files={"file": ("late_error.csv", body.encode(), "text/csv")},
+            )
+
+    for compress in (False, True):
+        first, scored = rest_router._start_export(bundle, io.BytesIO(body.encode()), "csv")
+        sent: list[bytes] = []
+        with pytest.raises(ValueError, match="Age"):
+            for data in rest_router._iter_export(first, scored, "csv", compress):
+                sent.append(data)
+
+        raw = b"".join(sent)
+        if compress:
+            gz = zlib.decompressobj(wbits=31)
+            raw = gz.decompress(raw)
+            assert not gz.eof  # pas de trailer gzip : archive détectée comme incomplète
+        lines = raw.decode().splitlines()
+        assert len(lines) == 1 + 7 + 1  # en-tête + bloc 1 + marqueur
+        assert lines[-1].startswith(rest_router.EXPORT_ERROR_MARKER)
@@ -0,0 +1,85 @@
+import asyncio
+import io
+import threading
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+import routers_layer.rest_router as rest_router
+from main import app
+from routers_layer.scheduling import Lane
+
+
+def test_lane_rejects_when_saturated():
+    lane = Lane("test", max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def scenario():
+        first = asyncio.ensure_future(lane.run(release.wait))
+        second = asyncio.ensure_future(lane.run(release.wait))
+        await asyncio.sleep(0.05)
+
+        assert lane.pending == 2
+        with pytest.raises(HTTPException) as exc:
+            await lane.run(release.wait)
+        assert exc.value.status_code == 429
+
+        release.set()
+        await asyncio.gather(first, second)
+
+    asyncio.run(scenario())
+    lane.shutdown()
+
+    assert lane.pending == 0
+    assert lane.rejected == 1
+
+
+def test_saturated_file_lane_does_not_block_row_lookups(monkeypatch):
+    lane = Lane("file", max_workers=2, max_queue=0)
+    monkeypatch.setattr(rest_router, "file_lane", lane)
+    payload = {
+        "Gender": "Male",
+        "Age": 31,
+        "Annual Income (k$)": 61,
+        "Spending Score (1-100)": 51,
+    }
+    gate = threading.Event()
+    started = threading.Semaphore(0)
+
+    def blocking() -> None:
+        started.release()
+        gate.wait(30)
+
+    with TestClient(app) as client:
+        # tous les workers de la lane "file" occupés par du travail bloquant réel
+        busy = [lane.submit(lane.acquire(), blocking) for _ in range(lane.max_workers)]
+        try:
+            for _ in busy:
+                assert started.acquire(timeout=5)
+
+            res = client.post(
+                "/api/cluster/file",
+                files={"file": ("test.csv", io.BytesIO(b"Gender,Age\n"), "text/csv")},
+            )
+            assert res.status_code == 429
+            assert res.headers["retry-after"] == "1"
+
+            # un lookup qui passerait par l'exécuteur de la lane "file" resterait bloqué
+            result = {}
+            lookup = threading.Thread(
+                target=lambda: result.update(res=client.post("/api/cluster/row", json=payload))
+            )
+            lookup.start()
+            lookup.join(timeout=10)
+            assert not lookup.is_alive(), "row lookup blocked behind the file lane"
+            assert result["res"].status_code == 200
+            assert client.get("/api/health").status_code == 200
+            assert not any(f.done() for f in busy)
+        finally:
+            gate.set()
+        for f in busy:
+            f.result(timeout=5)
+
+    assert lane.pending == 0
+    lane.shutdown()
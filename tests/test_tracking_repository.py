@@ -0,0 +1,72 @@
+import math
+import threading
+
+import pytest
+
+from data_layer.tracking_repository import TrackingStore
+
+
+@pytest.fixture()
+def store(tmp_path):
+    with TrackingStore(tmp_path / "tracking.sqlite3") as s:
+        yield s
+
+
+def test_run_round_trip(store, tmp_path):
+    run = store.start_run(
+        "kmeans", params={"n_clusters": 4}, dataset_path="mall.csv", dataset_hash="abc", n_rows=200
+    )
+    store.log_metrics(run, {"silhouette": 0.35, "davies_bouldin": float("nan")})
+    store.log_timing(run, "fit", 0.5)
+    store.end_run(run, model_name="kmeans", artifact_path=tmp_path / "v1", version="v1")
+
+    got = store.get_run(run)
+    assert got["status"] == "finished"
+    assert got["params"] == {"n_clusters": 4}
+    assert got["dataset_hash"] == "abc"
+    assert got["version"] == "v1"
+    assert got["metrics"]["silhouette"] == 0.35
+    assert got["metrics"]["davies_bouldin"] is None
+    assert got["rows_per_s"] == pytest.approx(400)
+    assert got["duration_s"] >= 0
+
+
+def test_writes_do_not_block_the_caller(store, monkeypatch):
+    # écrivain bloqué : l'appelant continue (mise en file seulement)
+    gate = threading.Event()
+    write = store._write
+    monkeypatch.setattr(store, "_write", lambda con, batch: gate.wait() and write(con, batch))
+
+    run = store.start_run("kmeans")
+    for i in range(1000):
+        store.log_timing(run, f"stage-{i}", 0.001)
+    gate.set()
+
+    assert len(store.get_run(run)["timings"]) == 1000
+
+
+def test_compare_runs_orders_by_metric(store):
+    parent = store.start_run("sweep")
+    for k, score in [(2, 0.3), (3, 0.5), (4, 0.4)]:
+        child = store.start_run("sweep-candidate", params={"n_clusters": k}, parent_id=parent)
+        store.log_metrics(child, {"silhouette": score})
+        store.end_run(child)
+    store.start_run("sweep-candidate", parent_id=parent)  # sans métrique : en dernier
+
+    best = store.compare_runs("silhouette", parent_id=parent)
+    assert [r["params"].get("n_clusters") for r in best] == [3, 4, 2, None]
+
+    worst_first = store.compare_runs("silhouette", higher_is_better=False, parent_id=parent)
+    assert worst_first[0]["params"]["n_clusters"] == 2
+    assert len(store.list_runs(name="sweep")) == 1
+
+
+def test_store_survives_reopen(tmp_path):
+    path = tmp_path / "tracking.sqlite3"
+    with TrackingStore(path) as s:
+        run = s.start_run("kmeans")
+        s.log_metrics(run, {"silhouette": 0.1})
+
+    with TrackingStore(path) as s:
+        assert math.isclose(s.get_run(run)["metrics"]["silhouette"], 0.1)
+        assert s.get_run(run)["status"] == "running"